@@ -0,0 +1,69 @@
+// bubblesort.asm
+// Sorts the R1 words starting at RAM[R0] into ascending order, in place.
+// Words are compared by subtraction, so must all be below 16384.
+
+(PASS)
+    @swapped
+    M=0
+    @R0
+    D=M
+    @p
+    M=D // p = first word
+    @R1
+    D=M
+    @R0
+    D=D+M
+    D=D-1
+    @last
+    M=D // last = address of the final word
+
+(COMPARE)
+    @p
+    D=M
+    @last
+    D=D-M
+    @PASSDONE
+    D;JGE // If p >= last, the pass is done
+
+    @p
+    A=M
+    D=M
+    A=A+1
+    D=D-M // D = RAM[p] - RAM[p+1]
+    @NOSWAP
+    D;JLE
+
+    // swap RAM[p] and RAM[p+1]
+    @p
+    A=M
+    D=M
+    @tmp
+    M=D
+    @p
+    A=M+1
+    D=M
+    A=A-1
+    M=D
+    @tmp
+    D=M
+    @p
+    A=M+1
+    M=D
+    @swapped
+    M=1
+
+(NOSWAP)
+    @p
+    M=M+1
+    @COMPARE
+    0;JMP
+
+(PASSDONE)
+    @swapped
+    D=M
+    @PASS
+    D;JNE // Repeat until a pass swaps nothing
+
+(END)
+    @END
+    0;JMP
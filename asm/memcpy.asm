@@ -0,0 +1,29 @@
+// memcpy.asm
+// Copies the R2 words starting at RAM[R0] to RAM[R1]. The ranges must not
+// overlap.
+
+(LOOP)
+    @R2
+    D=M
+    @END
+    D;JLE // If no words are left, done
+
+    @R0
+    A=M
+    D=M
+    @R1
+    A=M
+    M=D // RAM[R1] = RAM[R0]
+
+    @R0
+    M=M+1
+    @R1
+    M=M+1
+    @R2
+    M=M-1
+    @LOOP
+    0;JMP
+
+(END)
+    @END
+    0;JMP
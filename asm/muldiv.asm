@@ -0,0 +1,135 @@
+// muldiv.asm
+// For each of the R0 operand pairs in RAM[100..], RAM[200..], computes
+// RAM[300+i] = RAM[100+i] * RAM[200+i] by shift-and-add, and
+// RAM[400+i] = RAM[100+i] / RAM[200+i], RAM[500+i] = RAM[100+i] % RAM[200+i]
+// by repeated subtraction. Operands are nonnegative, divisors nonzero.
+
+@i
+M=0
+
+(NEXT)
+    @i
+    D=M
+    @R0
+    D=D-M
+    @END
+    D;JGE // If i >= R0, done
+
+    // x = RAM[100+i], y = RAM[200+i]
+    @i
+    D=M
+    @100
+    A=D+A
+    D=M
+    @x
+    M=D
+    @i
+    D=M
+    @200
+    A=D+A
+    D=M
+    @y
+    M=D
+
+    // product = 0, addend = x, mask = 1
+    @product
+    M=0
+    @x
+    D=M
+    @addend
+    M=D
+    @mask
+    M=1
+
+(MULTIPLY)
+    @y
+    D=M
+    @mask
+    D=D&M
+    @SKIPADD
+    D;JEQ // If y & mask == 0, skip adding
+
+    @addend
+    D=M
+    @product
+    M=D+M
+
+(SKIPADD)
+    @addend
+    D=M
+    M=D+M // addend <<= 1
+    @mask
+    D=M
+    MD=D+M // mask <<= 1
+    @MULTIPLY
+    D;JNE // Until the mask shifts out
+
+    // RAM[300+i] = product
+    @i
+    D=M
+    @300
+    D=D+A
+    @target
+    M=D
+    @product
+    D=M
+    @target
+    A=M
+    M=D
+
+    // quotient = 0, remainder = x
+    @quotient
+    M=0
+    @x
+    D=M
+    @remainder
+    M=D
+
+(DIVIDE)
+    @remainder
+    D=M
+    @y
+    D=D-M
+    @DIVIDED
+    D;JLT // If remainder < y, done
+
+    @remainder
+    M=D
+    @quotient
+    M=M+1
+    @DIVIDE
+    0;JMP
+
+(DIVIDED)
+    // RAM[400+i] = quotient, RAM[500+i] = remainder
+    @i
+    D=M
+    @400
+    D=D+A
+    @target
+    M=D
+    @quotient
+    D=M
+    @target
+    A=M
+    M=D
+    @i
+    D=M
+    @500
+    D=D+A
+    @target
+    M=D
+    @remainder
+    D=M
+    @target
+    A=M
+    M=D
+
+    @i
+    M=M+1
+    @NEXT
+    0;JMP
+
+(END)
+    @END
+    0;JMP
@@ -0,0 +1,44 @@
+// screenfill.asm
+// Draws horizontal stripes: even screen rows filled with 0x5555, odd rows
+// with 0xAAAA. Then halts.
+
+@21845 // 0x5555
+D=A
+@pattern
+M=D
+@SCREEN
+D=A
+@address
+M=D
+
+(ROW)
+    @32
+    D=A
+    @count
+    M=D // count = words per row
+
+(WORD)
+    @pattern
+    D=M
+    @address
+    A=M
+    M=D
+    @address
+    M=M+1
+    @count
+    MD=M-1
+    @WORD
+    D;JGT
+
+    @pattern
+    M=!M // alternate the stripe
+    @address
+    D=M
+    @KBD
+    D=D-A
+    @ROW
+    D;JLT // Until the end of the screen
+
+(END)
+    @END
+    0;JMP
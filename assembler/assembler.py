@@ -1,42 +1,90 @@
 """Assemble Hack-assembly files (.asm) into Hack-machine code (.hack).
 """
 
-from assembler.parser import AsmParser, Command, comp_bits, dest_bits, jump_bits
+from assembler.parser import AsmParser, AsmBytesParser, Command
 import io
+import mmap
+import os
 
 from assembler.symboltable import SymbolTable
 
 
-def assemble_file(input_file, output_file):
-    """Assemble a Hack-assembly file (.asm) into Hack-machine code (.hack)"""
+def assemble_file(input_file, output_file, source_map_file=None, optimize=False):
+    """Assemble a Hack-assembly file (.asm) into Hack-machine code (.hack)
+    :param source_map_file: optional file to write a SourceMap of the output to
+    :param optimize: if True, run the peephole optimizer before encoding
+    """
+
+    source_map = None
+    if source_map_file:
+        # imported here, as it imports json, to keep startup of plain assembly short
+        from assembler.sourcemap import SourceMap
+        source_map = SourceMap()
 
-    with open(input_file, "r") as f:
-        asm_string = f.read()
+    with open(input_file, "rb") as f:
+        if optimize or os.fstat(f.fileno()).st_size == 0:
+            # the optimizer rewrites a list of commands, so needs no mapping
+            out_string = assemble(f.read().decode(), source_map, optimize)
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                out_string = assemble(data, source_map)
 
-    out_string = assemble(asm_string)
     with open(output_file, "w") as f:
         f.write(out_string)
 
+    if source_map is not None:
+        source_map.save(source_map_file)
 
-def assemble(asm_string):
+
+def assemble(asm_string, source_map=None, optimize=False, optimization_report=None, symbols=None):
     """Assemble a Hack-assembly string, return Hack-machine code.
+    The source may also be given as bytes or an mmap, which is
+    parsed in place by AsmBytesParser.
 
     Machine-code format is 16 0s and 1s representing a 16-bit word on
     each line of a file. The line number of a file is the  address of that
-    command once loaded into ROM"""
-
-    p = AsmParser(asm_string)
-
-    symbol_table = SymbolTable()
-    add_label_symbols(p, symbol_table)
-    next_symbol_address = 16
-
+    command once loaded into ROM
+    :param source_map: optional SourceMap to fill with the source line of
+        each ROM address and the address of each label
+    :param optimize: if True, run the peephole optimizer before encoding
+    :param optimization_report: optional OptimizationReport to fill when optimizing
+    :param symbols: optional empty mapping to hold the symbol table, such as a
+        CompactSymbols or SpilledSymbols from assembler.symbolstore for
+        programs with millions of symbols"""
+
+    if isinstance(asm_string, str):
+        p = AsmParser(asm_string)
+    elif optimize:
+        p = AsmParser(bytes(asm_string).decode())
+    else:
+        p = AsmBytesParser(asm_string)
+
+    if optimize:
+        from assembler import optimizer
+        optimizer.optimize(p, optimization_report)
+
+    symbol_table = SymbolTable(symbols)
+    add_label_symbols(p, symbol_table, source_map)
+    return encode(p, symbol_table, source_map)
+
+
+def encode(parser, symbol_table, source_map=None, next_symbol_address=16):
+    """Second pass: encode every command of parser into Hack-machine code.
+    :param symbol_table: SymbolTable holding all labels. Symbols not in the
+        table are variables, added at next_symbol_address onwards
+    :param source_map: optional SourceMap to add the line of each instruction to
+    """
+    p = parser
     p.reset()
+    symbol_table.next_variable_address = next_symbol_address
     machine_code = io.StringIO()
 
     while p.has_more():
         p.advance()
         command_type = p.command_type()
+        if source_map is not None and command_type is not Command.L_COMMAND:
+            source_map.add_instruction(p.get_line_number() + 1)
+
         if command_type is Command.A_COMMAND:
             symbol = p.get_symbol()
 
@@ -45,21 +93,13 @@ def assemble(asm_string):
                 c = int(symbol)
 
             except ValueError:
-                # this is a variable name instead of constant
-                if symbol_table.contains(symbol):
-                    c = symbol_table.get_address(symbol)
-                else:
-                    symbol_table.add_symbol(symbol, next_symbol_address)
-                    c = next_symbol_address
-                    next_symbol_address += 1
+                # this is a label or variable name instead of constant
+                c = symbol_table.get_or_allocate(symbol)
 
             machine_code.write(_constant_to_binary_string(c))
             machine_code.write("\n")
         elif command_type is Command.C_COMMAND:
-            machine_code.write("111")
-            machine_code.write(comp_bits(p.get_comp()))
-            machine_code.write(dest_bits(p.get_dest()))
-            machine_code.write(jump_bits(p.get_jump()))
+            machine_code.write(p.get_c_bits())
             machine_code.write("\n")
         elif command_type is Command.L_COMMAND:
             # Label commands do not generate machine code
@@ -71,10 +111,11 @@ def assemble(asm_string):
     machine_code.close()
     return output_string
 
-def add_label_symbols(parser, symbol_table):
+def add_label_symbols(parser, symbol_table, source_map=None):
     """Pass through code once to get all LABELS & which address they point to
     :param parser AsmParser to iterate through. Must be rest after calling this
     :param symbol_table Existing symbol table to add labels to
+    :param source_map optional SourceMap to add labels to
     """
 
     parser.reset()
@@ -84,12 +125,13 @@ def add_label_symbols(parser, symbol_table):
         t = parser.command_type()
         if t is Command.L_COMMAND:
             name = parser.get_symbol()
-            if symbol_table.contains(name):
+            if not symbol_table.try_add(name, rom_address):
                 line = parser.get_line_number()
                 raise Exception(
                     f"Duplicate Label: ({name}) on line {line} has already been defined.")
 
-            symbol_table.add_symbol(name, rom_address)
+            if source_map is not None:
+                source_map.add_label(name, rom_address)
         else:
             rom_address += 1
 
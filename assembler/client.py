@@ -0,0 +1,87 @@
+"""Client for the assembler daemon (see assembler.daemon).
+
+Requests and responses are JSON objects, one per line. This module imports
+nothing from the assembler, so that a client starts quickly and leaves the
+work to a daemon that already has it loaded.
+"""
+import json
+import os
+import socket
+
+DEFAULT_SOCKET = os.environ.get("HACK_ASSEMBLER_SOCKET") or os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or "/tmp", f"hack-assembler-{os.getuid()}.sock")
+
+
+def request(message, socket_path=DEFAULT_SOCKET):
+    """Send one request to the daemon, return its response
+    :raises OSError if no daemon is listening on socket_path
+    """
+    with _connect(socket_path) as sock:
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            return _read_response(f)
+
+
+def assemble_file(input_file, output_file, source_map_file=None, optimize=False, socket_path=DEFAULT_SOCKET):
+    """Have the daemon assemble input_file into output_file, as
+    assembler.assemble_file() does
+    :returns response of the daemon, with the seconds the assembly took
+    :raises Exception with the daemon's message if assembly failed
+    """
+    response = request(_assemble_message("assemble", input_file, output_file, source_map_file, optimize), socket_path)
+    if not response["ok"]:
+        raise Exception(response["error"])
+    return response
+
+
+def watch(input_file, output_file, source_map_file=None, optimize=False, socket_path=DEFAULT_SOCKET):
+    """Have the daemon assemble input_file now and again whenever it changes.
+    Watching stops when the generator is closed.
+    :returns generator of the daemon's response to each assembly
+    """
+    message = _assemble_message("watch", input_file, output_file, source_map_file, optimize)
+    with _connect(socket_path) as sock:
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            while True:
+                yield _read_response(f)
+
+
+def ping(socket_path=DEFAULT_SOCKET):
+    """True if a daemon is listening on socket_path"""
+    try:
+        return request({"command": "ping"}, socket_path)["ok"]
+    except OSError:
+        return False
+
+
+def shutdown(socket_path=DEFAULT_SOCKET):
+    request({"command": "shutdown"}, socket_path)
+
+
+def _assemble_message(command, input_file, output_file, source_map_file, optimize):
+    # the daemon has its own working directory
+    return {
+        "command": command,
+        "input": os.path.abspath(input_file),
+        "output": os.path.abspath(output_file),
+        "source_map": os.path.abspath(source_map_file) if source_map_file else None,
+        "optimize": optimize,
+    }
+
+
+def _connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _read_response(f):
+    line = f.readline()
+    if not line:
+        raise ConnectionError("Assembler daemon closed the connection")
+    return json.loads(line)
@@ -0,0 +1,164 @@
+"""Long-running assembler daemon on a Unix socket.
+
+The daemon keeps the assembler imported and its tables built, so a request
+costs only the assembly itself. Requests from any number of clients are
+handled concurrently: each assembly runs on a pool of worker processes
+forked from the warm daemon.
+
+Requests are JSON objects, one per line (see assembler.client):
+
+  {"command": "assemble", "input": ..., "output": ..., "source_map": ..., "optimize": ...}
+      assemble once, respond {"ok": true, "seconds": ...} or {"ok": false, "error": ...}
+  {"command": "watch", ...same fields}
+      assemble now and whenever the input changes, with one response for
+      each assembly, until the client disconnects
+  {"command": "ping"}
+  {"command": "shutdown"}
+"""
+import asyncio
+import concurrent.futures
+import json
+import os
+import socket
+import time
+
+from assembler.assembler import assemble_file
+from assembler.client import DEFAULT_SOCKET
+
+# seconds between checks of a watched file
+_POLL_INTERVAL = 0.2
+
+
+class AssemblerDaemon:
+    def __init__(self, socket_path=DEFAULT_SOCKET, workers=None, poll_interval=_POLL_INTERVAL):
+        """:param workers: number of worker processes, defaults to the cpu count"""
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._stopped = None
+        # writer -> task handling each open connection
+        self._connections = {}
+
+    def run(self):
+        """Serve until a shutdown request or KeyboardInterrupt"""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self):
+        _remove_stale_socket(self.socket_path)
+        self._stopped = asyncio.Event()
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        # start the workers now, rather than on the first request
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, int) for _ in range(self.workers)))
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            for writer in self._connections:
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await server.wait_closed()
+            self._executor.shutdown()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def stop(self):
+        self._stopped.set()
+
+    async def _handle(self, reader, writer):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    message = json.loads(line)
+                    command = message["command"]
+                except (ValueError, KeyError, TypeError):
+                    await _respond(writer, {"ok": False, "error": f"Malformed request: {line!r}"})
+                    continue
+
+                if command == "watch":
+                    await self._watch(message, reader, writer)
+                    break
+                elif command == "assemble":
+                    response = await self._assemble(message)
+                elif command == "ping":
+                    response = {"ok": True}
+                elif command == "shutdown":
+                    self.stop()
+                    response = {"ok": True}
+                else:
+                    response = {"ok": False, "error": f"Unrecognized command: {command}"}
+
+                await _respond(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+    async def _assemble(self, message):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            await loop.run_in_executor(
+                self._executor, assemble_file,
+                message["input"], message["output"], message.get("source_map"), message.get("optimize", False))
+        except Exception as e:
+            return {"ok": False, "error": f"{message.get('input')}: {e}"}
+        return {"ok": True, "seconds": time.perf_counter() - start}
+
+    async def _watch(self, message, reader, writer):
+        # the client sends nothing more, so reading returns once it disconnects
+        disconnected = asyncio.ensure_future(reader.read())
+        last_stamp = ()
+        try:
+            while not disconnected.done():
+                stamp = _file_stamp(message.get("input"))
+                if stamp != last_stamp:
+                    last_stamp = stamp
+                    await _respond(writer, await self._assemble(message))
+                await asyncio.wait({disconnected}, timeout=self.poll_interval)
+        finally:
+            disconnected.cancel()
+
+
+async def _respond(writer, response):
+    writer.write(json.dumps(response).encode() + b"\n")
+    await writer.drain()
+
+
+def _file_stamp(path):
+    """(modification time, size) of a file, or None if it can't be read"""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _remove_stale_socket(socket_path):
+    """Remove a socket file left by a daemon that is no longer running
+    :raises Exception if a daemon is still listening on it
+    """
+    if not os.path.exists(socket_path):
+        return
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        os.remove(socket_path)
+    else:
+        raise Exception(f"An assembler daemon is already listening on {socket_path}")
+    finally:
+        sock.close()
@@ -0,0 +1,202 @@
+"""Disassemble Hack-machine code back into Hack assembly.
+
+Every 16-bit word is decoded by a single lookup in a 65,536-entry table of
+assembly text, built on first use by inverting the C_COMMAND_COMP,
+C_COMMAND_DEST and C_COMMAND_JUMP tables of the parser. ROMs are decoded
+in chunks, so images of any size stream through in bounded memory.
+
+ROMs are read as Hack-machine code text (.hack) or as binary: 16-bit
+big-endian words. With a SourceMap, label declarations are put back in
+front of the instructions they label, and jump targets are named.
+
+Words that are not valid instructions (C-instructions not starting 111, or
+with a comp code that has no mnemonic) are written as comments, as Hack
+assembly has no way to express them.
+"""
+import array
+import itertools
+import sys
+
+from assembler.parser import C_COMMAND_COMP, C_COMMAND_DEST, C_COMMAND_JUMP
+
+# words read at a time when streaming
+_CHUNK_WORDS = 2**16
+# .hack text bytes read at a time, 17 per word
+_CHUNK_TEXT_BYTES = 17*_CHUNK_WORDS
+
+_C_PREFIX = 0b111
+_JUMP_MASK = 0b111
+
+_decode_table = None
+
+
+def decode_table():
+    """Assembly text of every 16-bit word, indexed by word"""
+    global _decode_table
+    if _decode_table is None:
+        _decode_table = _build_decode_table()
+    return _decode_table
+
+
+def _build_decode_table():
+    comps = {int(bits, 2): mnemonic for mnemonic, bits in C_COMMAND_COMP.items()}
+    dests = {int(bits, 2): mnemonic + "=" for mnemonic, bits in C_COMMAND_DEST.items()}
+    jumps = {int(bits, 2): ";" + mnemonic for mnemonic, bits in C_COMMAND_JUMP.items()}
+    dests[0] = ""
+    jumps[0] = ""
+
+    table = [f"@{word}" for word in range(2**15)]
+    for word in range(2**15, 2**16):
+        comp = comps.get((word >> 6) & 0x7F)
+        if word >> 13 != _C_PREFIX or comp is None:
+            table.append(f"// invalid instruction {word:016b}")
+        else:
+            table.append(dests[(word >> 3) & 0b111] + comp + jumps[word & _JUMP_MASK])
+
+    return tuple(table)
+
+
+def disassemble(words, source_map=None):
+    """Disassemble a sequence of 16-bit words, return Hack assembly"""
+    return "".join(_disassemble_chunks(_chunked(words), source_map))
+
+
+def disassemble_hack(hack_string, source_map=None):
+    """Disassemble Hack-machine code text, return Hack assembly"""
+    return disassemble([int(line, 2) for line in hack_string.split()], source_map)
+
+
+def disassemble_file(input_file, output_file, source_map_file=None, binary=None):
+    """Disassemble a Hack ROM into a Hack-assembly file (.asm)
+    :param source_map_file: optional source map (see assembler.sourcemap) to
+        take label names from
+    :param binary: True for a ROM of 16-bit big-endian words, False for
+        Hack-machine code text. Detected from the file when None
+    """
+    source_map = None
+    if source_map_file:
+        from assembler.sourcemap import load
+        source_map = load(source_map_file)
+
+    with open(input_file, "rb") as f, open(output_file, "w") as out:
+        if binary is None:
+            binary = not _is_hack_text(f.peek(17)[:17])
+        chunks = _read_binary_chunks(f) if binary else _read_text_chunks(f)
+        for text in _disassemble_chunks(chunks, source_map):
+            out.write(text)
+
+
+def to_binary(words):
+    """Encode words as a binary ROM of 16-bit big-endian words"""
+    rom = array.array("H", words)
+    if sys.byteorder == "little":
+        rom.byteswap()
+    return rom.tobytes()
+
+
+def from_binary(data):
+    """Decode a binary ROM of 16-bit big-endian words into an array of ints"""
+    rom = array.array("H")
+    rom.frombytes(data)
+    if sys.byteorder == "little":
+        rom.byteswap()
+    return rom
+
+
+def _is_hack_text(head):
+    """True if head, the first bytes of a ROM, start a line of Hack-machine code text"""
+    return len(head) >= 16 and not head[:16].strip(b"01") and head[16:] in (b"", b"\n", b"\r")
+
+
+def _chunked(words):
+    words = iter(words)
+    while True:
+        chunk = list(itertools.islice(words, _CHUNK_WORDS))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _read_binary_chunks(f):
+    while True:
+        data = f.read(2*_CHUNK_WORDS)
+        if not data:
+            return
+        if len(data) % 2:
+            raise ValueError("Binary ROM has an odd number of bytes")
+        yield from_binary(data)
+
+
+def _read_text_chunks(f):
+    while True:
+        lines = f.readlines(_CHUNK_TEXT_BYTES)
+        if not lines:
+            return
+        words = [int(line, 2) for line in lines if not line.isspace()]
+        if words:
+            yield words
+
+
+def _disassemble_chunks(chunks, source_map):
+    """Assembly text for each chunk of words"""
+    table = decode_table()
+    if source_map is None:
+        for words in chunks:
+            yield "\n".join(map(table.__getitem__, words)) + "\n"
+        return
+
+    labels = _LabelWriter(source_map)
+    address = 0
+    # each chunk is written once the next is known, as naming a jump target
+    # in the last word of a chunk depends on the first word of the next
+    previous = None
+    for words in chunks:
+        if previous is not None:
+            yield labels.disassemble(table, previous, address, words[0])
+            address += len(previous)
+        previous = words
+    if previous is not None:
+        yield labels.disassemble(table, previous, address, None)
+        address += len(previous)
+
+    yield labels.trailing(address)
+
+
+class _LabelWriter:
+    """Puts label declarations and named jump targets into disassembly"""
+
+    def __init__(self, source_map):
+        # rom address -> names of the labels declared there, in source order
+        self.declared = {}
+        for name, address in source_map.labels.items():
+            self.declared.setdefault(address, []).append(name)
+
+        # rom address -> name used for a jump to it: the last label declared
+        # there, matching SourceMap.label_at()
+        self.targets = {address: names[-1] for address, names in self.declared.items()}
+
+    def disassemble(self, table, words, address, next_word):
+        lines = []
+        targets = self.targets
+        declared = self.declared
+        end = len(words) - 1
+        for i, word in enumerate(words):
+            if address + i in declared:
+                lines.extend(f"({name})" for name in declared[address + i])
+
+            following = words[i + 1] if i < end else next_word
+            if word in targets and following is not None and following >> 13 == _C_PREFIX and following & _JUMP_MASK:
+                lines.append("@" + targets[word])
+            else:
+                lines.append(table[word])
+
+        return "\n".join(lines) + "\n"
+
+    def trailing(self, end_address):
+        """Labels declared at or after the end of the ROM"""
+        lines = [
+            f"({name})"
+            for address in sorted(self.declared) if address >= end_address
+            for name in self.declared[address]
+        ]
+        return "".join(line + "\n" for line in lines)
@@ -0,0 +1,80 @@
+"""Link relocatable object files into Hack-machine code (.hack).
+
+Modules are loaded into ROM one after another in the order given. Linking
+the modules of a program in source order produces exactly the output of
+assembling the concatenated source with assemble(), including the order
+in which variables are given addresses from 16 upward.
+"""
+import os
+
+from assembler.objectfile import ROM, SYMBOL, assemble_object_file, load
+from assembler.symboltable import SymbolTable
+
+_ROM_SIZE = 2**15
+_FIRST_VARIABLE_ADDRESS = 16
+
+
+def link(objects):
+    """Link ObjectFiles, return Hack-machine code"""
+    symbol_table = SymbolTable()
+    bases = []
+    base = 0
+    for obj in objects:
+        bases.append(base)
+        for name, address in obj.exports.items():
+            if not symbol_table.try_add(name, base + address):
+                raise Exception(f"Duplicate Label: ({name}) is defined by more than one module.")
+        base += len(obj.code)
+
+    if base > _ROM_SIZE:
+        raise Exception(f"Linked program of {base} words does not fit in ROM")
+
+    symbol_table.next_variable_address = _FIRST_VARIABLE_ADDRESS
+    lines = []
+    for obj, base in zip(objects, bases):
+        code = list(obj.code)
+        for offset, kind, symbol in obj.relocations:
+            if kind == ROM:
+                code[offset] += base
+            elif kind == SYMBOL:
+                # a symbol that is not a label of any module is a new variable
+                code[offset] = symbol_table.get_or_allocate(symbol)
+            else:
+                raise Exception(f"Unrecognized relocation kind: {kind}")
+
+        lines.extend(f"{word:016b}\n" for word in code)
+
+    return "".join(lines)
+
+
+def link_files(object_files, output_file):
+    """Link object files (.hobj) into a Hack-machine code file (.hack)"""
+    with open(output_file, "w") as f:
+        f.write(link([load(name) for name in object_files]))
+
+
+def object_file_name(asm_file, object_dir=None):
+    """Object file that build() keeps for an assembly module"""
+    base = os.path.splitext(asm_file)[0] + ".hobj"
+    if object_dir is None:
+        return base
+    return os.path.join(object_dir, os.path.basename(base))
+
+
+def build(asm_files, output_file, object_dir=None):
+    """Assemble modules that changed since their object file was written,
+    then link every module into output_file.
+    :param object_dir: directory for object files; defaults to beside each module
+    :returns list of modules that were re-assembled
+    """
+    rebuilt = []
+    object_files = []
+    for asm_file in asm_files:
+        object_file = object_file_name(asm_file, object_dir)
+        if not os.path.exists(object_file) or os.path.getmtime(object_file) < os.path.getmtime(asm_file):
+            assemble_object_file(asm_file, object_file)
+            rebuilt.append(asm_file)
+        object_files.append(object_file)
+
+    link_files(object_files, output_file)
+    return rebuilt
@@ -0,0 +1,111 @@
+"""Relocatable object files for separate assembly.
+
+An object file holds the encoded code of one assembly module, assembled as
+if it were loaded at ROM address 0, together with:
+
+  exports: every label the module defines, with its module-relative address
+  relocations: (offset, kind, symbol) entries for code words the linker must
+      patch. kind is ROM for references to the module's own labels, which
+      are moved by the module's load address, or SYMBOL for @symbol
+      references the module cannot resolve: labels of other modules, or
+      variables if no module defines them.
+
+Object files are stored as JSON (.hobj).
+"""
+import json
+
+from assembler.assembler import add_label_symbols
+from assembler.parser import AsmParser, Command, comp_bits, dest_bits, jump_bits
+from assembler.symboltable import SymbolTable
+
+ROM = "rom"
+SYMBOL = "symbol"
+
+_FORMAT = "hack-object/1"
+
+
+class ObjectFile:
+    def __init__(self, code=None, exports=None, relocations=None):
+        # encoded 16-bit words
+        self.code = code if code is not None else []
+        # label -> module-relative ROM address
+        self.exports = exports if exports is not None else {}
+        # list of (offset, kind, symbol), in code order
+        self.relocations = relocations if relocations is not None else []
+
+    def dumps(self):
+        return json.dumps({
+            "format": _FORMAT,
+            "code": self.code,
+            "exports": self.exports,
+            "relocations": self.relocations,
+        })
+
+    def save(self, filename):
+        with open(filename, "w") as f:
+            f.write(self.dumps())
+
+
+def loads(object_string):
+    data = json.loads(object_string)
+    if data.get("format") != _FORMAT:
+        raise ValueError(f"Not a Hack object file: format {data.get('format')}")
+
+    relocations = [(offset, kind, symbol) for offset, kind, symbol in data["relocations"]]
+    return ObjectFile(data["code"], data["exports"], relocations)
+
+
+def load(filename):
+    with open(filename, "r") as f:
+        return loads(f.read())
+
+
+def assemble_object(asm_string):
+    """Assemble one module of a program into an ObjectFile"""
+    p = AsmParser(asm_string)
+    symbol_table = SymbolTable()
+    add_label_symbols(p, symbol_table)
+    # the table holds only the labels added, not the predefined symbols
+    exports = dict(symbol_table.symbols)
+
+    obj = ObjectFile(exports=exports)
+    p.reset()
+    while p.has_more():
+        p.advance()
+        command_type = p.command_type()
+        if command_type is Command.A_COMMAND:
+            symbol = p.get_symbol()
+            offset = len(obj.code)
+            if symbol.isdigit():
+                word = int(symbol)
+                if word >= 2**15:
+                    raise Exception("A-command Constant must be positive integer less than 2**15")
+            elif symbol in exports:
+                word = exports[symbol]
+                obj.relocations.append((offset, ROM, symbol))
+            elif symbol_table.contains(symbol):
+                # predefined symbol
+                word = symbol_table.get_address(symbol)
+            else:
+                word = 0
+                obj.relocations.append((offset, SYMBOL, symbol))
+
+            obj.code.append(word)
+        elif command_type is Command.C_COMMAND:
+            bits = "111" + comp_bits(p.get_comp()) + dest_bits(p.get_dest()) + jump_bits(p.get_jump())
+            obj.code.append(int(bits, 2))
+        elif command_type is Command.L_COMMAND:
+            # Label commands do not generate machine code
+            pass
+        else:
+            raise Exception(f"Unrecognized Command type: {command_type}")
+
+    return obj
+
+
+def assemble_object_file(input_file, output_file):
+    """Assemble a Hack-assembly module (.asm) into an object file (.hobj)"""
+    with open(input_file, "r") as f:
+        asm_string = f.read()
+
+    assemble_object(asm_string).save(output_file)
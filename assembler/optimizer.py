@@ -0,0 +1,328 @@
+"""Peephole optimizer for Hack assembly.
+
+Runs on the parsed command list, between AsmParser and encoding, and
+repeats these rewrites until none applies:
+
+  - redundant A-loads: @X when A already holds X, e.g. a second @SP
+  - jumps to the next instruction: removed, or reduced to their dest part
+  - unreachable code: instructions after an unconditional jump that no
+    label leads to
+  - jump chains: a jump to a label whose code is just @T, 0;JMP is sent
+    straight to T
+
+Labels are resolved again when the result is encoded. Jumps to numeric ROM
+addresses (@133 followed by a jump) are turned into generated labels first,
+so they still reach the same instruction after code moves. Numeric constants
+used any other way are treated as data.
+"""
+
+from assembler.symboltable import _PREDEFINED_SYMBOLS
+
+# prefix of labels generated for numeric jump targets
+_ROM_LABEL_PREFIX = "$rom."
+
+_MAX_PASSES = 100
+
+
+class OptimizationReport:
+    """Result of optimizing one program"""
+
+    def __init__(self):
+        self.words_before = 0
+        self.words_after = 0
+
+        # rewrite name -> number of times applied
+        self.rewrites = {
+            "redundant_a_load": 0,
+            "jump_to_next": 0,
+            "unreachable": 0,
+            "jump_chain": 0,
+        }
+
+    @property
+    def words_saved(self):
+        return self.words_before - self.words_after
+
+    def __str__(self):
+        rewrites = ", ".join(f"{name}={count}" for name, count in self.rewrites.items())
+        return f"{self.words_before} -> {self.words_after} words ({self.words_saved} saved; {rewrites})"
+
+
+def optimize(parser, report=None):
+    """Optimize the commands of an AsmParser in place.
+    :param report: optional OptimizationReport to fill
+    :returns the OptimizationReport
+    """
+    if report is None:
+        report = OptimizationReport()
+
+    commands = parser.get_commands()
+    report.words_before = _count_instructions(commands)
+    commands = _label_numeric_jump_targets(commands)
+
+    for _ in range(_MAX_PASSES):
+        changed = False
+        for name, rewrite in _REWRITES:
+            commands, count = rewrite(commands)
+            report.rewrites[name] += count
+            changed = changed or count > 0
+
+        if not changed:
+            break
+
+    report.words_after = _count_instructions(commands)
+    parser.set_commands(commands)
+    return report
+
+
+def _is_a(command):
+    return command[0] == "@"
+
+
+def _is_label(command):
+    return command[0] == "("
+
+
+def _split_c(command):
+    """Split C-command into (dest, comp, jump), using "null" for missing parts"""
+    eq = command.find("=")
+    dest = command[:eq] if eq != -1 else "null"
+    rest = command[eq + 1:]
+    semi = rest.find(";")
+    if semi == -1:
+        return dest, rest, "null"
+    return dest, rest[:semi], rest[semi + 1:]
+
+
+def _join_c(dest, comp, jump):
+    command = comp
+    if dest != "null":
+        command = dest + "=" + command
+    if jump != "null":
+        command += ";" + jump
+    return command
+
+
+def _a_key(symbol):
+    """Value an A-command loads, as an int where known before label resolution"""
+    if symbol.isdigit():
+        return int(symbol)
+    return _PREDEFINED_SYMBOLS.get(symbol, symbol)
+
+
+def _count_instructions(commands):
+    return sum(1 for command, _ in commands if not _is_label(command))
+
+
+def _is_jump(command):
+    return not _is_a(command) and not _is_label(command) and ";" in command
+
+
+def _is_unconditional_jump(command):
+    return _is_jump(command) and command.endswith(";JMP")
+
+
+def _next_instruction(commands, i):
+    """Index of the first non-label command at or after i, or len(commands)"""
+    while i < len(commands) and _is_label(commands[i][0]):
+        i += 1
+    return i
+
+
+def _labels_at(commands, i):
+    """Names of the labels starting at index i, up to the next instruction"""
+    names = set()
+    while i < len(commands) and _is_label(commands[i][0]):
+        names.add(commands[i][0][1:-1])
+        i += 1
+    return names
+
+
+def _label_numeric_jump_targets(commands):
+    """Replace @N used as a jump target with a label placed at ROM address N"""
+    labels = {command[1:-1] for command, _ in commands if _is_label(command)}
+    instruction_count = _count_instructions(commands)
+
+    targets = set()
+    for i in range(len(commands) - 1):
+        command = commands[i][0]
+        if _is_a(command) and command[1:].isdigit() and _is_jump(commands[i + 1][0]):
+            address = int(command[1:])
+            if address < instruction_count:
+                targets.add(address)
+
+    if not targets:
+        return commands
+
+    def label_name(address):
+        name = f"{_ROM_LABEL_PREFIX}{address}"
+        while name in labels:
+            name = "$" + name
+        return name
+
+    names = {address: label_name(address) for address in targets}
+    result = []
+    address = 0
+    for i, (command, line) in enumerate(commands):
+        if _is_label(command):
+            result.append((command, line))
+            continue
+
+        if address in names:
+            result.append((f"({names[address]})", line))
+        if _is_a(command) and command[1:].isdigit() and i + 1 < len(commands) \
+                and _is_jump(commands[i + 1][0]) and int(command[1:]) in names:
+            command = "@" + names[int(command[1:])]
+        result.append((command, line))
+        address += 1
+
+    return result
+
+
+def _remove_redundant_a_loads(commands):
+    result = []
+    count = 0
+    known = None
+    for command, line in commands:
+        if _is_label(command):
+            # reachable from elsewhere, A is unknown
+            known = None
+        elif _is_a(command):
+            key = _a_key(command[1:])
+            if key == known:
+                count += 1
+                continue
+            known = key
+        elif "A" in _split_c(command)[0]:
+            known = None
+
+        result.append((command, line))
+
+    return result, count
+
+
+def _remove_jumps_to_next(commands):
+    result = []
+    count = 0
+    known = None
+    i = 0
+    while i < len(commands):
+        command, line = commands[i]
+        if _is_label(command):
+            known = None
+        elif _is_a(command):
+            known = command[1:]
+        else:
+            dest, comp, jump = _split_c(command)
+            if jump != "null" and known is not None and known in _labels_at(commands, i + 1):
+                count += 1
+                if dest != "null":
+                    result.append((_join_c(dest, comp, "null"), line))
+                elif result and result[-1][0] == "@" + known and \
+                        _is_a(_command_at(commands, _next_instruction(commands, i + 1))):
+                    # A is reloaded before it is used again, so the @label is dead too
+                    result.pop()
+                i += 1
+                continue
+
+            if "A" in dest:
+                known = None
+
+        result.append((command, line))
+        i += 1
+
+    return result, count
+
+
+def _command_at(commands, i):
+    return commands[i][0] if i < len(commands) else "@0"
+
+
+def _remove_unreachable(commands):
+    referenced = {command[1:] for command, _ in commands if _is_a(command)}
+    result = []
+    count = 0
+    reachable = True
+    for command, line in commands:
+        if _is_label(command):
+            name = command[1:-1]
+            if not reachable and name not in referenced:
+                # nothing jumps here, the label starts no live code
+                continue
+            reachable = True
+        elif not reachable:
+            count += 1
+            continue
+        elif _is_unconditional_jump(command):
+            reachable = False
+
+        result.append((command, line))
+
+    return result, count
+
+
+def _trampolines(commands):
+    """Labels whose code is just @T, 0;JMP, mapped to T"""
+    targets = {}
+    for i, (command, _) in enumerate(commands):
+        if not _is_label(command):
+            continue
+
+        j = _next_instruction(commands, i + 1)
+        if j + 1 >= len(commands):
+            continue
+
+        load, jump = commands[j][0], commands[j + 1][0]
+        if _is_a(load) and _is_unconditional_jump(jump) and _split_c(jump)[0] == "null":
+            targets[command[1:-1]] = load[1:]
+
+    return targets
+
+
+def _shorten_jump_chains(commands):
+    trampolines = _trampolines(commands)
+    if not trampolines:
+        return commands, 0
+
+    def final_target(label):
+        seen = {label}
+        while label in trampolines and trampolines[label] not in seen:
+            label = trampolines[label]
+            seen.add(label)
+        return label
+
+    result = list(commands)
+    count = 0
+    for i in range(len(commands) - 1):
+        command = commands[i][0]
+        if not _is_a(command) or command[1:] not in trampolines:
+            continue
+
+        jump = commands[i + 1][0]
+        if not _is_jump(jump):
+            continue
+
+        # the jump must not use A or M, which still hold the old label
+        dest, comp, _ = _split_c(jump)
+        if dest not in ("null", "D") or "A" in comp or "M" in comp:
+            continue
+
+        # a conditional jump falls through with A still set, so only retarget
+        # it if A is reloaded straight away
+        if not _is_unconditional_jump(jump) and not _is_a(_command_at(commands, i + 2)):
+            continue
+
+        target = final_target(command[1:])
+        if target != command[1:]:
+            result[i] = ("@" + target, commands[i][1])
+            count += 1
+
+    return result, count
+
+
+_REWRITES = (
+    ("unreachable", _remove_unreachable),
+    ("jump_chain", _shorten_jump_chains),
+    ("jump_to_next", _remove_jumps_to_next),
+    ("redundant_a_load", _remove_redundant_a_loads),
+)
@@ -0,0 +1,193 @@
+"""Assemble one large Hack-assembly source on several processes.
+
+The source is split into chunks at line boundaries. Both passes of the
+assembler run on the chunks in parallel:
+
+  1. each worker scans its chunk for labels (with chunk-relative ROM
+     addresses), its instruction count, and the symbols it references in
+     order of first use
+  2. the coordinator turns instruction counts into chunk ROM offsets with a
+     prefix sum, builds the global label table, and gives variables their
+     addresses by walking the chunks' first-use lists in order
+  3. each worker encodes its chunk with the symbols it references
+
+Variables are allocated in the same order as the serial assembler, so the
+output is identical to assemble().
+"""
+import concurrent.futures
+import os
+
+from assembler.assembler import encode
+from assembler.parser import AsmParser, Command
+from assembler.symboltable import SymbolTable, _PREDEFINED_SYMBOLS
+
+_FIRST_VARIABLE_ADDRESS = 16
+
+# chunks per worker, so that uneven chunks still balance across workers
+_CHUNKS_PER_WORKER = 4
+
+_READ_BLOCK_SIZE = 2**20
+
+
+def assemble_parallel(asm_string, workers=None, chunks=None):
+    """Assemble a Hack-assembly string on worker processes, return
+    Hack-machine code identical to assemble(asm_string)"""
+    workers = workers or os.cpu_count() or 1
+    chunks = chunks or workers*_CHUNKS_PER_WORKER
+
+    sources = []
+    first_line = 0
+    for start, end in _split_string(asm_string, chunks):
+        text = asm_string[start:end]
+        sources.append((text, first_line))
+        first_line += text.count("\n")
+
+    return _assemble_chunks(sources, workers)
+
+
+def assemble_file_parallel(input_file, output_file, workers=None, chunks=None):
+    """Assemble a Hack-assembly file on worker processes. Workers read their
+    own chunk of the file, so the source is never sent between processes."""
+    workers = workers or os.cpu_count() or 1
+    chunks = chunks or workers*_CHUNKS_PER_WORKER
+
+    sources = []
+    first_line = 0
+    for start, end in _split_file(input_file, chunks):
+        sources.append(((input_file, start, end), first_line))
+        first_line += _count_newlines(input_file, start, end)
+
+    out_string = _assemble_chunks(sources, workers)
+    with open(output_file, "w") as f:
+        f.write(out_string)
+
+
+def _assemble_chunks(sources, workers):
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        scans = list(executor.map(_scan_chunk, sources))
+
+        symbol_table = {}
+        for base, (labels, _, _) in zip(_chunk_bases(scans), scans):
+            for name, (address, line) in labels.items():
+                if name in symbol_table:
+                    raise Exception(
+                        f"Duplicate Label: ({name}) on line {line} has already been defined.")
+                symbol_table[name] = base + address
+
+        next_symbol_address = _FIRST_VARIABLE_ADDRESS
+        chunk_symbols = []
+        for _, _, symbols in scans:
+            for symbol in symbols:
+                if symbol not in symbol_table:
+                    symbol_table[symbol] = next_symbol_address
+                    next_symbol_address += 1
+            chunk_symbols.append({symbol: symbol_table[symbol] for symbol in symbols})
+
+        return "".join(executor.map(_encode_chunk, sources, chunk_symbols))
+
+
+def _chunk_bases(scans):
+    """ROM address of the first instruction of each chunk"""
+    bases = []
+    base = 0
+    for _, instruction_count, _ in scans:
+        bases.append(base)
+        base += instruction_count
+    return bases
+
+
+def _read_source(source):
+    text, first_line = source
+    if isinstance(text, tuple):
+        path, start, end = text
+        with open(path, "rb") as f:
+            f.seek(start)
+            text = f.read(end - start).decode()
+    return text, first_line
+
+
+def _scan_chunk(source):
+    """Pass 1 over one chunk.
+    :returns (labels, instruction count, symbols) where labels maps name to
+        (chunk-relative ROM address, line) and symbols lists the non-constant,
+        non-predefined A-command symbols in order of first use
+    """
+    p = AsmParser(*_read_source(source))
+    labels = {}
+    symbols = []
+    seen = set()
+    rom_address = 0
+    while p.has_more():
+        p.advance()
+        t = p.command_type()
+        if t is Command.L_COMMAND:
+            name = p.get_symbol()
+            if name in labels or name in _PREDEFINED_SYMBOLS:
+                line = p.get_line_number()
+                raise Exception(
+                    f"Duplicate Label: ({name}) on line {line} has already been defined.")
+            labels[name] = (rom_address, p.get_line_number())
+        else:
+            if t is Command.A_COMMAND:
+                symbol = p.get_symbol()
+                if symbol not in seen and not symbol.isdigit() and symbol not in _PREDEFINED_SYMBOLS:
+                    seen.add(symbol)
+                    symbols.append(symbol)
+            rom_address += 1
+
+    return labels, rom_address, symbols
+
+
+def _encode_chunk(source, symbols):
+    """Pass 2 over one chunk, with the global address of every symbol it uses"""
+    p = AsmParser(*_read_source(source))
+    symbol_table = SymbolTable()
+    for name, address in symbols.items():
+        symbol_table.add_symbol(name, address)
+    return encode(p, symbol_table)
+
+
+def _split_string(s, chunks):
+    """(start, end) offsets of up to chunks pieces of s, cut after newlines"""
+    bounds = [0]
+    for i in range(1, chunks):
+        cut = s.find("\n", max(len(s)*i//chunks, bounds[-1]))
+        if cut == -1:
+            break
+        if cut + 1 > bounds[-1]:
+            bounds.append(cut + 1)
+    if bounds[-1] < len(s) or len(bounds) == 1:
+        bounds.append(len(s))
+    return list(zip(bounds, bounds[1:]))
+
+
+def _split_file(path, chunks):
+    """(start, end) byte offsets of up to chunks pieces of a file, cut after newlines"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, chunks):
+            offset = max(size*i//chunks, bounds[-1])
+            f.seek(offset)
+            f.readline()
+            cut = f.tell()
+            if cut >= size:
+                break
+            if cut > bounds[-1]:
+                bounds.append(cut)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _count_newlines(path, start, end):
+    count = 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(_READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            count += block.count(b"\n")
+            remaining -= len(block)
+    return count
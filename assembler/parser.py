@@ -2,9 +2,8 @@
 
 Parse assembly into commands. First step of assembler (parse->code->symbol)
 """
-import re
+import array
 import enum
-import string
 
 
 class Command(enum.Enum):
@@ -92,10 +91,13 @@ C_COMMAND_JUMP = {
 
 
 class AsmParser:
-    def __init__(self, asm_string):
+    def __init__(self, asm_string, first_line=0):
+        """:param first_line: line number of the first line of asm_string, for
+        parsing part of a larger file"""
         self._cursor = 0
         self._current_command = None
-        self._rawlines = asm_string.splitlines()
+        self._rawlines = _split_lines(asm_string)
+        self._first_line = first_line
 
         # list of (command, linenumber) once comments/blanklines removed.
         self._commands = []
@@ -115,12 +117,12 @@ class AsmParser:
                 command = command[:comment]
 
             # removal of whitespace must come after comment removal to support inline comments
-            command = command.strip()
+            command = command.strip(_WHITESPACE)
             if command == "":
                 # Blank line or comment, ignore
                 pass
             else:
-                self._commands.append({"command": command, "line": i})
+                self._commands.append({"command": command, "line": i + self._first_line})
 
     def has_more(self):
         return self._cursor < len(self._commands)
@@ -248,30 +250,236 @@ class AsmParser:
                 f"Unrecognized jump mnemonic on line {line}: {jump}"
             )
 
+    def get_c_bits(self):
+        """16 bits of the current C-command, as a string of 0s and 1s"""
+        if self.command_type() is not Command.C_COMMAND:
+            raise Exception(
+                "get_c_bits() may only be called when command_type() is C_COMMAND"
+            )
+        return _VALID_C_COMMANDS[self._current_command["command"]]
+
     def reset(self):
         self._cursor = 0
 
+    def get_commands(self):
+        """All commands as a list of (command, line number), comments and
+        whitespace removed"""
+        return [(c["command"], c["line"]) for c in self._commands]
+
+    def set_commands(self, commands):
+        """Replace the commands to parse, e.g. with an optimized version of
+        get_commands(). Resets the parser."""
+        self._commands = [{"command": command, "line": line} for command, line in commands]
+        self.reset()
+
+
+class AsmBytesParser:
+    """AsmParser over the bytes of an ASCII .asm file, as bytes or an mmap.
+
+    The source is never decoded or split into lines. One scan with find()
+    locates every command and classifies it by its first byte. Per command
+    only its line number, its type and a reference to its value are kept: the
+    shared bit string of a C-command, or the symbol of an A- or L-command,
+    decoded once per distinct symbol.
+    """
+
+    def __init__(self, data, first_line=0):
+        """:param first_line: line number of the first line of data"""
+        self._data = data
+        self._first_line = first_line
+        self._lines, self._types, self._values = self._scan()
+        self.reset()
+
+    def reset(self):
+        self._cursor = 0
+        self._current = -1
+
+    def has_more(self):
+        return self._cursor < len(self._types)
+
+    def advance(self):
+        self._current = self._cursor
+        self._cursor += 1
+
+    def get_line_number(self):
+        return self._lines[self._current]
+
+    def command_type(self):
+        return _COMMAND_TYPES[self._types[self._current]]
+
+    def get_symbol(self):
+        if self._types[self._current] == Command.C_COMMAND.value:
+            raise Exception(
+                "get_symbol() may only be called when command_type() is A_COMMAND or L_COMMAND"
+            )
+        return self._values[self._current]
+
+    def get_c_bits(self):
+        """16 bits of the current C-command, as a string of 0s and 1s"""
+        if self._types[self._current] != Command.C_COMMAND.value:
+            raise Exception(
+                "get_c_bits() may only be called when command_type() is C_COMMAND"
+            )
+        return self._values[self._current]
+
+    def get_dest(self):
+        return _DEST_MNEMONICS[self.get_c_bits()[10:13]]
+
+    def get_comp(self):
+        return _COMP_MNEMONICS[self.get_c_bits()[3:10]]
+
+    def get_jump(self):
+        return _JUMP_MNEMONICS[self.get_c_bits()[13:16]]
+
+    def _scan(self):
+        """Find and classify every command, comments and surrounding
+        whitespace removed
+        :returns (lines, types, values): line number, Command value and
+            bit string or symbol of each command
+        """
+        data = self._data
+        lines = array.array("L")
+        types = bytearray()
+        values = []
+        # raw symbol -> symbol, so that each distinct symbol is decoded once
+        symbols = {}
+        find = data.find
+        whitespace = _WHITESPACE_BYTES
+        valid_c_commands = _VALID_C_COMMAND_BYTES
+        a_command = Command.A_COMMAND.value
+        c_command = Command.C_COMMAND.value
+        l_command = Command.L_COMMAND.value
+        size = len(data)
+        # a lone carriage return also ends a line, as in _split_lines()
+        carriage_returns = find(b"\r") != -1
+        pos = 0
+        line = self._first_line - 1
+        while pos < size:
+            line += 1
+            newline = find(b"\n", pos)
+            if newline == -1:
+                newline = size
+            if carriage_returns:
+                carriage_return = find(b"\r", pos, newline)
+                if carriage_return != -1 and carriage_return + 1 != newline:
+                    newline = carriage_return
+
+            start = pos
+            end = find(b"//", start, newline)
+            if end == -1:
+                end = newline
+            while start < end and data[start] in whitespace:
+                start += 1
+            while end > start and data[end - 1] in whitespace:
+                end -= 1
+            pos = newline + 1
+            if start == end:
+                # Blank line or comment, ignore
+                continue
+
+            first = data[start]
+            if first == _AT:
+                t = a_command
+                raw = data[start + 1:end]
+            elif first == _OPEN_PAREN and data[end - 1] == _CLOSE_PAREN:
+                t = l_command
+                raw = data[start + 1:end - 1]
+            else:
+                t = c_command
+                try:
+                    value = valid_c_commands[data[start:end]]
+                except KeyError:
+                    value = None
+
+            if t != c_command:
+                value = symbols.get(raw)
+                if value is None:
+                    if _is_symbol_bytes(raw):
+                        value = symbols[raw] = raw.decode("ascii")
+                    elif t == a_command and raw.isdigit():
+                        value = raw.decode("ascii")
+
+            if value is None:
+                command = data[start:end].decode(errors="replace")
+                raise SyntaxError(f"Unrecognized command on line {line}: {command}")
+
+            lines.append(line)
+            types.append(t)
+            values.append(value)
+
+        return lines, types, values
+
+
+class _CCommandTable(dict):
+    """Bit string of each valid C-command, e.g. "D=M+1;JGT" -> "1111110111000001".
 
-_whitespace_regex = re.compile(r"\s+", flags=re.UNICODE)
+    Of the 1,792 valid commands a program uses only a few dozen, so each is
+    encoded on its first lookup instead of building all of them at import.
+    Looking up an invalid command raises KeyError.
+    """
 
-# Generate list of all possible c-commands (8d*28c*8j = 1762) plus their bit string
-_VALID_C_COMMANDS = {}
-for d in C_COMMAND_DEST.keys():
-    for c in C_COMMAND_COMP.keys():
-        for j in C_COMMAND_JUMP.keys():
-            key = ""
-            if d != "null":
-                key += d + "="
+    def __init__(self, encode):
+        super().__init__()
+        self._encode = encode
 
-            key += c
-            if j != "null":
-                key += ";" + j
+    def __missing__(self, key):
+        bits = self._encode(key)
+        self[key] = bits
+        return bits
 
-            bits = "111" + C_COMMAND_COMP[c] + C_COMMAND_DEST[d] + C_COMMAND_JUMP[j]
-            _VALID_C_COMMANDS[key] = bits
 
-_VALID_SYMBOL_CHARS = string.ascii_letters + string.digits + "_.$:"
-_VALID_SYMBOL_FIRST_CHAR = string.ascii_letters + "_.$:"
+def _encode_c_command(command):
+    """:raises KeyError if command is not a valid C-command"""
+    dest, eq, rest = command.rpartition("=")
+    comp, semicolon, jump = rest.partition(";")
+    # "null" is the absence of dest or jump, so it may not be written out
+    if (eq and dest == "null") or (semicolon and jump == "null"):
+        raise KeyError(command)
+
+    return ("111" + C_COMMAND_COMP[comp]
+            + C_COMMAND_DEST[dest if eq else "null"]
+            + C_COMMAND_JUMP[jump if semicolon else "null"])
+
+
+def _encode_c_command_bytes(command):
+    try:
+        return _VALID_C_COMMANDS[command.decode("ascii")]
+    except UnicodeDecodeError:
+        raise KeyError(command)
+
+
+_VALID_C_COMMANDS = _CCommandTable(_encode_c_command)
+_VALID_C_COMMAND_BYTES = _CCommandTable(_encode_c_command_bytes)
+
+# bits of each part of a C-command -> mnemonic
+_COMP_MNEMONICS = {bits: mnemonic for mnemonic, bits in C_COMMAND_COMP.items()}
+_DEST_MNEMONICS = {bits: mnemonic for mnemonic, bits in C_COMMAND_DEST.items()}
+_JUMP_MNEMONICS = {bits: mnemonic for mnemonic, bits in C_COMMAND_JUMP.items()}
+
+# string.ascii_letters, without importing string and re through it
+_ASCII_LETTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_VALID_SYMBOL_CHARS = _ASCII_LETTERS + "0123456789" + "_.$:"
+_VALID_SYMBOL_FIRST_CHAR = _ASCII_LETTERS + "_.$:"
+
+# whitespace around commands; other characters, even Unicode spaces, are
+# part of the command
+_WHITESPACE = " \t\r\x0b\x0c"
+
+# Tables for AsmBytesParser
+_VALID_SYMBOL_BYTES = _VALID_SYMBOL_CHARS.encode("ascii")
+_VALID_SYMBOL_FIRST_BYTES = _VALID_SYMBOL_FIRST_CHAR.encode("ascii")
+_WHITESPACE_BYTES = _WHITESPACE.encode("ascii")
+_AT = ord("@")
+_OPEN_PAREN = ord("(")
+_CLOSE_PAREN = ord(")")
+# Command indexed by its value
+_COMMAND_TYPES = (None, Command.A_COMMAND, Command.C_COMMAND, Command.L_COMMAND)
+
+
+def _split_lines(s):
+    """Lines of s, ended by LF, CR LF or a lone CR as in bytes.splitlines(),
+    so that AsmParser and AsmBytesParser split and number lines alike"""
+    return s.replace("\r\n", "\n").replace("\r", "\n").split("\n")
 
 
 def _is_a_type(s):
@@ -293,7 +501,11 @@ def _is_a_type(s):
 
 def _is_c_type(s):
     """Check if this is a C-Command, e.g. D=M+1;JMP"""
-    return s in _VALID_C_COMMANDS
+    try:
+        _VALID_C_COMMANDS[s]
+    except KeyError:
+        return False
+    return True
 
 
 def _is_l_type(s):
@@ -301,8 +513,13 @@ def _is_l_type(s):
     if len(s) < 3 or s[0] != "(" or s[-1] != ")" or s[1] not in _VALID_SYMBOL_FIRST_CHAR:
         return False
 
-    for item in s[2:-2]:
+    for item in s[2:-1]:
         if item not in _VALID_SYMBOL_CHARS:
             return False
 
     return True
+
+
+def _is_symbol_bytes(b):
+    """Check if b is a valid symbol, e.g. b"LOOP" or b"Func:A_1" """
+    return len(b) > 0 and b[0] in _VALID_SYMBOL_FIRST_BYTES and not b.translate(None, _VALID_SYMBOL_BYTES)
@@ -0,0 +1,70 @@
+"""Map ROM addresses of assembled code back to the assembly source.
+
+Filled in by assemble() when a SourceMap is passed to it. Lines are
+1-based, as shown by editors.
+"""
+
+import bisect
+import json
+
+
+class SourceMap:
+    def __init__(self):
+        # lines[rom_address] is the source line of that instruction
+        self.lines = []
+
+        # label name -> rom address, in source order
+        self.labels = {}
+
+        self._label_addresses = None
+        self._label_names = None
+
+    def add_instruction(self, line):
+        """Record the source line of the next ROM address"""
+        self.lines.append(line)
+
+    def add_label(self, name, address):
+        self.labels[name] = address
+        self._label_addresses = None
+
+    def line_at(self, address):
+        """Source line of the instruction at ROM address, or None"""
+        if 0 <= address < len(self.lines):
+            return self.lines[address]
+        return None
+
+    def label_at(self, address):
+        """Name of the closest label at or before ROM address, or None if the
+        address precedes every label. When several labels share an address,
+        the last one in the source wins."""
+        if self._label_addresses is None:
+            ordered = sorted(self.labels.items(), key=lambda item: item[1])
+            self._label_names = [name for name, _ in ordered]
+            self._label_addresses = [address for _, address in ordered]
+
+        i = bisect.bisect_right(self._label_addresses, address)
+        if i == 0:
+            return None
+        return self._label_names[i - 1]
+
+    def dumps(self):
+        return json.dumps({"lines": self.lines, "labels": self.labels})
+
+    def save(self, filename):
+        with open(filename, "w") as f:
+            f.write(self.dumps())
+
+
+def loads(source_map_string):
+    data = json.loads(source_map_string)
+    source_map = SourceMap()
+    source_map.lines = list(data["lines"])
+    for name, address in data["labels"].items():
+        source_map.add_label(name, address)
+
+    return source_map
+
+
+def load(filename):
+    with open(filename, "r") as f:
+        return loads(f.read())
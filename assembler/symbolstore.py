@@ -0,0 +1,213 @@
+"""Mappings of symbol name to address for very large symbol tables.
+
+A dict of a million symbols holds a str and an int object and a hash table
+entry for each, over 100 bytes a symbol besides the name. Both mappings
+here support what SymbolTable uses of a dict, get, setdefault, [] and in,
+plus len and items, and can be passed to SymbolTable or assemble():
+
+CompactSymbols packs the names, as UTF-8, into one bytearray and addresses
+and hashes into arrays, found through an open addressing index: about 20
+bytes a symbol besides the name, at the cost of slower lookups.
+
+SpilledSymbols keeps the symbols in an SQLite database on disk, buffering
+recent additions in memory, so memory stays bounded however many symbols
+there are. It suits the label pass over huge inputs; every lookup of a
+symbol not in the buffer is a query.
+"""
+import array
+
+# fraction of the index of CompactSymbols in use before it grows
+_MAX_LOAD = 2/3
+
+
+class CompactSymbols:
+    def __init__(self):
+        self._names = bytearray()
+        # end of each name in _names; it starts at the end of the one before
+        self._ends = array.array("I")
+        self._addresses = array.array("i")
+        # low 32 bits of the hash of each name
+        self._hashes = array.array("I")
+        # open addressing index: entry number + 1 of each slot, or 0 if empty
+        self._slots = array.array("I", bytes(4*8))
+
+    def __len__(self):
+        return len(self._addresses)
+
+    def _name(self, entry):
+        start = self._ends[entry - 1] if entry else 0
+        return self._names[start:self._ends[entry]]
+
+    def _find(self, name):
+        """(slot of name, or the empty slot it would go in, hash of name)"""
+        h = hash(name) & 0xFFFFFFFF
+        slots = self._slots
+        hashes = self._hashes
+        mask = len(slots) - 1
+        i = h & mask
+        encoded = None
+        while True:
+            entry = slots[i]
+            if not entry:
+                return i, h
+            if hashes[entry - 1] == h:
+                if encoded is None:
+                    encoded = name.encode()
+                if self._name(entry - 1) == encoded:
+                    return i, h
+            i = (i + 1) & mask
+
+    def _grow(self):
+        slots = array.array("I", bytes(8*len(self._slots)))
+        mask = len(slots) - 1
+        for entry, h in enumerate(self._hashes, 1):
+            i = h & mask
+            while slots[i]:
+                i = (i + 1) & mask
+            slots[i] = entry
+        self._slots = slots
+
+    def get(self, name, default=None):
+        i, _ = self._find(name)
+        entry = self._slots[i]
+        return self._addresses[entry - 1] if entry else default
+
+    def __getitem__(self, name):
+        i, _ = self._find(name)
+        entry = self._slots[i]
+        if not entry:
+            raise KeyError(name)
+        return self._addresses[entry - 1]
+
+    def __contains__(self, name):
+        i, _ = self._find(name)
+        return self._slots[i] != 0
+
+    def _insert(self, slot, h, name, address):
+        self._names += name.encode()
+        self._ends.append(len(self._names))
+        self._addresses.append(address)
+        self._hashes.append(h)
+        self._slots[slot] = len(self._addresses)
+        if len(self._addresses) > len(self._slots)*_MAX_LOAD:
+            self._grow()
+
+    def setdefault(self, name, address):
+        i, h = self._find(name)
+        entry = self._slots[i]
+        if entry:
+            return self._addresses[entry - 1]
+        self._insert(i, h, name, address)
+        return address
+
+    def __setitem__(self, name, address):
+        i, h = self._find(name)
+        entry = self._slots[i]
+        if entry:
+            self._addresses[entry - 1] = address
+        else:
+            self._insert(i, h, name, address)
+
+    def items(self):
+        """(name, address) of every symbol, in the order added"""
+        start = 0
+        for end, address in zip(self._ends, self._addresses):
+            yield self._names[start:end].decode(), address
+            start = end
+
+    def __iter__(self):
+        return (name for name, _ in self.items())
+
+
+class SpilledSymbols:
+    def __init__(self, filename=None, buffer_size=2**16):
+        """:param filename: SQLite database to keep the symbols in, or None for
+            a temporary file, deleted on close()
+        :param buffer_size: symbols added before they are written out together
+        """
+        import sqlite3
+        import tempfile
+
+        self._temporary = None
+        if filename is None:
+            self._temporary = tempfile.NamedTemporaryFile(suffix=".symbols")
+            filename = self._temporary.name
+
+        self._db = sqlite3.connect(filename)
+        # the symbols are rebuilt from source if lost, so need no journal
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS symbols (name TEXT PRIMARY KEY, address INTEGER NOT NULL) WITHOUT ROWID")
+        self._count = self._db.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+        self._buffer = {}
+        self._buffer_size = buffer_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._db is None:
+            return
+        self.flush()
+        self._db.close()
+        self._db = None
+        if self._temporary is not None:
+            self._temporary.close()
+
+    def flush(self):
+        """Write the buffered symbols to the database"""
+        if self._buffer:
+            self._db.executemany("INSERT OR REPLACE INTO symbols VALUES (?, ?)", self._buffer.items())
+            self._db.commit()
+            self._buffer.clear()
+
+    def __len__(self):
+        return self._count
+
+    def get(self, name, default=None):
+        address = self._buffer.get(name)
+        if address is None:
+            row = self._db.execute("SELECT address FROM symbols WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return default
+            address = row[0]
+        return address
+
+    def __getitem__(self, name):
+        address = self.get(name)
+        if address is None:
+            raise KeyError(name)
+        return address
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def _add(self, name, address):
+        self._buffer[name] = address
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+    def setdefault(self, name, address):
+        existing = self.get(name)
+        if existing is not None:
+            return existing
+        self._count += 1
+        self._add(name, address)
+        return address
+
+    def __setitem__(self, name, address):
+        if self.get(name) is None:
+            self._count += 1
+        self._add(name, address)
+
+    def items(self):
+        """(name, address) of every symbol, in name order"""
+        self.flush()
+        return self._db.execute("SELECT name, address FROM symbols ORDER BY name")
+
+    def __iter__(self):
+        return (name for name, _ in self.items())
@@ -1,7 +1,15 @@
+"""Symbol table of the assembler: labels and variables over the predefined
+symbols.
 
+Symbols are held in a mapping of name to address, a dict by default. For
+programs with millions of symbols, assembler.symbolstore has mappings that
+pack symbols into arrays or spill them to disk.
+"""
+import sys
+import types
 
-# Symbols always defined for hack asm
-_PREDEFINED_SYMBOLS = {
+# Symbols always defined for hack asm, shared read-only by every SymbolTable
+_PREDEFINED_SYMBOLS = types.MappingProxyType({
     "SP": 0,
     "LCL": 1,
     "ARG": 2,
@@ -25,23 +33,55 @@ _PREDEFINED_SYMBOLS = {
     "R15": 15,
     "SCREEN": 16384,
     "KBD": 24576
-}
+})
 
 
 class SymbolTable:
-    def __init__(self):
-        self.symbols = {}
-        for name, address in _PREDEFINED_SYMBOLS.items():
-            self.add_symbol(name, address)
+    def __init__(self, symbols=None, next_variable_address=16):
+        """:param symbols: optional empty mapping to hold the symbols, such as
+            a CompactSymbols or SpilledSymbols from assembler.symbolstore
+        :param next_variable_address: address of the first variable allocated
+            by get_or_allocate
+        """
+        # symbols added to this table, overlaying _PREDEFINED_SYMBOLS
+        self.symbols = {} if symbols is None else symbols
+        self.next_variable_address = next_variable_address
 
     def add_symbol(self, name, address):
-        if name in self.symbols:
+        if not self.try_add(name, address):
             raise Exception(f"Symbol '{name}' has already been defined.")
 
-        self.symbols[name] = address
+    def try_add(self, name, address):
+        """Add a symbol unless it is already defined
+        :returns True if added, False if name was already defined
+        """
+        if name in _PREDEFINED_SYMBOLS:
+            return False
+        symbols = self.symbols
+        count = len(symbols)
+        # one lookup both checks for the name and adds it
+        symbols.setdefault(sys.intern(name), address)
+        return len(symbols) != count
+
+    def get_or_allocate(self, name):
+        """Address of a symbol, first adding it as a new variable at
+        next_variable_address if it is not defined. A defined symbol takes a
+        single lookup."""
+        symbols = self.symbols
+        address = symbols.get(name)
+        if address is None:
+            address = _PREDEFINED_SYMBOLS.get(name)
+            if address is None:
+                address = self.next_variable_address
+                symbols[sys.intern(name)] = address
+                self.next_variable_address = address + 1
+        return address
 
     def contains(self, name):
-        return name in self.symbols
+        return name in self.symbols or name in _PREDEFINED_SYMBOLS
 
     def get_address(self, name):
-        return self.symbols[name]
\ No newline at end of file
+        address = self.symbols.get(name)
+        if address is None:
+            return _PREDEFINED_SYMBOLS[name]
+        return address
@@ -0,0 +1,85 @@
+"""Compare AsmParser on a decoded string with AsmBytesParser on bytes/mmap.
+
+Times assembling Pong both ways, then measures the peak memory allocated
+while parsing a large generated source, read into a string or mmap'd.
+
+usage: python -m benchmarks.bytes_parser [lines]
+"""
+import mmap
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from assembler.assembler import assemble
+from assembler.parser import AsmParser, AsmBytesParser
+from benchmarks.parallel_assembly import generate
+
+PONG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "data", "Pong.asm")
+
+_REPEAT = 10
+
+
+def best_time(function, *args):
+    best = None
+    for _ in range(_REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parse(parser):
+    """Walk every command once, as the first assembler pass does"""
+    while parser.has_more():
+        parser.advance()
+        parser.command_type()
+
+
+def peak_memory(function, *args):
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def parse_string_file(path):
+    with open(path, "r") as f:
+        parse(AsmParser(f.read()))
+
+
+def parse_mmap_file(path):
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            parse(AsmBytesParser(data))
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with open(PONG, "rb") as f:
+        pong = f.read()
+    pong_string = pong.decode()
+
+    print("Pong.asm")
+    print(f"  parse str:       {best_time(lambda: parse(AsmParser(pong_string)))*1000:7.1f} ms")
+    print(f"  parse bytes:     {best_time(lambda: parse(AsmBytesParser(pong)))*1000:7.1f} ms")
+    print(f"  assemble str:    {best_time(assemble, pong_string)*1000:7.1f} ms")
+    print(f"  assemble bytes:  {best_time(assemble, pong)*1000:7.1f} ms")
+
+    with tempfile.TemporaryDirectory() as d:
+        source = os.path.join(d, "big.asm")
+        with open(source, "w") as f:
+            f.write(generate(lines))
+        size = os.path.getsize(source)
+
+        print(f"{lines} lines, {size/2**20:.1f} MiB: peak memory allocated while parsing")
+        print(f"  str:   {peak_memory(parse_string_file, source)/2**20:7.1f} MiB")
+        print(f"  mmap:  {peak_memory(parse_mmap_file, source)/2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
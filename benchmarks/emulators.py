@@ -0,0 +1,220 @@
+"""Measure instructions per second of each emulator engine on a corpus of
+Hack programs, checking every run against the program's expected final RAM.
+
+Engines:
+  gate        cpu.computer.Computer, built from the gate-level chips
+  predecoded  emulator.emulator.Emulator
+  jit         emulator.jit.JitEmulator, running compiled basic blocks
+
+Idle loop skipping is turned off, so every cycle is executed. The gate
+engine is far too slow for whole programs; it runs the first GATE_CYCLES of
+each and is checked against the predecoded engine at that point.
+
+Results are compared with the baseline in emulators_baseline.json, and the
+exit status is 1 if any run is wrong or slower than the baseline by more
+than REGRESSION_TOLERANCE. --save writes the results as the new baseline.
+
+usage: python -m benchmarks.emulators [--save] [runs]
+"""
+import collections
+import hashlib
+import json
+import os
+import sys
+import time
+
+from assembler.assembler import assemble
+from assembler.disassembler import to_binary
+from cpu.computer import Computer
+from emulator import keyboard
+from emulator.emulator import Emulator, rom_from_hack
+from emulator.jit import JitEmulator
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "emulators_baseline.json")
+
+GATE_CYCLES = 2000
+REGRESSION_TOLERANCE = 0.25
+
+Program = collections.namedtuple("Program", ["name", "source", "ram", "keys", "cycles", "expected", "digest"])
+Program.__doc__ = """One benchmark program.
+source: path of the .asm file, relative to the repository
+ram: initial RAM as a dict of address: word
+keys: path of a keyboard trace (see emulator.keyboard) to replay, or None
+cycles: instructions to execute, enough to finish
+expected: dict of address: word the final RAM must hold
+digest: sha256 of the whole final RAM as big-endian words, or None
+"""
+
+
+def _pairs():
+    """Operands for muldiv: (a, b) with a < 32768 and 0 < b < 200"""
+    seed = 12345
+    pairs = []
+    for _ in range(16):
+        seed = (seed*1103515245 + 12345) % 2**31
+        a = seed % 30000
+        seed = (seed*1103515245 + 12345) % 2**31
+        pairs.append((a, seed % 199 + 1))
+    return pairs
+
+
+def _muldiv():
+    pairs = _pairs()
+    ram = {0: len(pairs)}
+    expected = {}
+    for i, (a, b) in enumerate(pairs):
+        ram[100 + i] = a
+        ram[200 + i] = b
+        expected[300 + i] = a*b & 0xFFFF
+        expected[400 + i] = a//b
+        expected[500 + i] = a % b
+    return Program("muldiv", "asm/muldiv.asm", ram, None, 300000, expected, None)
+
+
+def _bubblesort():
+    values = [(i*7919) % 10007 for i in range(100)]
+    ram = {0: 1000, 1: len(values)}
+    ram.update(enumerate(values, 1000))
+    expected = dict(enumerate(sorted(values), 1000))
+    return Program("bubblesort", "asm/bubblesort.asm", ram, None, 200000, expected, None)
+
+
+def _memcpy():
+    words = [(i*40503) & 0xFFFF for i in range(4096)]
+    ram = {0: 2048, 1: 8192, 2: len(words)}
+    ram.update(enumerate(words, 2048))
+    expected = dict(enumerate(words, 8192))
+    return Program("memcpy", "asm/memcpy.asm", ram, None, 80000, expected, None)
+
+
+def _screenfill():
+    expected = {16384 + row*32 + word: 0xAAAA if row % 2 else 0x5555 for row in range(256) for word in range(32)}
+    return Program("screenfill", "asm/screenfill.asm", {}, None, 100000, expected, None)
+
+
+PROGRAMS = [
+    Program("mult", "asm/mult.asm", {0: 1000, 1: 7}, None, 15000, {2: 7000}, None),
+    # a key held from the start: the first pass paints the screen black
+    Program("fill", "asm/fill.asm", {24576: 32}, None, 250000, {16384: 0xFFFF, 20000: 0xFFFF, 24575: 0xFFFF}, None),
+    _muldiv(),
+    _bubblesort(),
+    _memcpy(),
+    _screenfill(),
+    Program("pong", "tests/data/Pong.asm", {}, "tests/data/PongSession.keys", 8000000, {},
+            "4f3e297842072a6ba54a31f8b098d60de69220cb89991f720af2038f1bf317ba"),
+]
+
+
+def ram_digest(ram):
+    return hashlib.sha256(to_binary(ram)).hexdigest()
+
+
+def load_rom(program):
+    with open(os.path.join(REPO, program.source), "r") as f:
+        return rom_from_hack(assemble(f.read()))
+
+
+def new_emulator(engine, rom, program):
+    emu = engine(rom, program.ram)
+    emu.skip_idle = False
+    if program.keys:
+        emu.replay(keyboard.load(os.path.join(REPO, program.keys)))
+    return emu
+
+
+def check(program, ram):
+    """Differences of a final RAM from what program expects, as strings"""
+    errors = [f"RAM[{address}] = {ram[address]}, expected {value}"
+              for address, value in program.expected.items() if ram[address] != value]
+    if program.digest is not None and ram_digest(ram) != program.digest:
+        errors.append("RAM digest differs")
+    return errors
+
+
+def time_emulator(engine, rom, program, runs):
+    """Best instructions per second of runs, and errors in the final RAM"""
+    best = None
+    for _ in range(runs):
+        emu = new_emulator(engine, rom, program)
+        start = time.perf_counter()
+        emu.run(program.cycles)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return program.cycles/best, check(program, emu.ram)
+
+
+def time_gate(rom, program):
+    """Instructions per second of the gate engine over the first GATE_CYCLES,
+    and differences from the predecoded engine at that point"""
+    cycles = min(GATE_CYCLES, program.cycles)
+    computer = Computer(rom, program.ram)
+    start = time.perf_counter()
+    computer.run(cycles)
+    elapsed = time.perf_counter() - start
+
+    reference = new_emulator(Emulator, rom, program)
+    reference.run(cycles)
+    errors = [f"{name} = {getattr(computer, name)}, expected {getattr(reference, name)}"
+              for name in ("a", "d", "pc") if getattr(computer, name) != getattr(reference, name)]
+    touched = set(program.ram) | {address for address, value in enumerate(reference.ram) if value}
+    errors.extend(f"RAM[{address}] = {computer.read(address)}, expected {reference.ram[address]}"
+                  for address in sorted(touched) if computer.read(address) != reference.ram[address])
+    return cycles/elapsed, errors
+
+
+def main():
+    args = sys.argv[1:]
+    save = "--save" in args
+    if save:
+        args.remove("--save")
+    runs = int(args[0]) if args else 3
+
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, "r") as f:
+            baseline = json.load(f)
+
+    results = {"gate": {}, "predecoded": {}, "jit": {}}
+    failed = False
+    print(f"{'program':12}{'cycles':>10}{'gate':>16}{'predecoded':>16}{'jit':>16}  (million instructions/s)")
+    for program in PROGRAMS:
+        rom = load_rom(program)
+        measured = {
+            "gate": time_gate(rom, program),
+            "predecoded": time_emulator(Emulator, rom, program, runs),
+            "jit": time_emulator(JitEmulator, rom, program, runs),
+        }
+
+        columns = []
+        for engine, (ips, errors) in measured.items():
+            results[engine][program.name] = round(ips)
+            column = f"{ips/1e6:.4f}" if engine == "gate" else f"{ips/1e6:.2f}"
+            base = baseline.get(engine, {}).get(program.name)
+            if base:
+                change = ips/base - 1
+                column += f" {change:+4.0%}"
+                if change < -REGRESSION_TOLERANCE:
+                    column += "!"
+                    failed = True
+            if errors:
+                column += " WRONG"
+                failed = True
+            columns.append(f"{column:>16}")
+        print(f"{program.name:12}{program.cycles:>10}" + "".join(columns))
+
+        for engine, (_, errors) in measured.items():
+            for error in errors[:5]:
+                print(f"    {engine}: {error}")
+
+    if save:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"saved baseline to {BASELINE}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
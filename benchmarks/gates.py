@@ -0,0 +1,37 @@
+"""Count the gate-level work of the Hack CPU built from chips.
+
+Runs asm/mult.asm on cpu.computer.Computer under a GateCounter, and
+reports NANDs per call of each chip, what each chip calls, and how often
+the bits of A, D and PC toggle. Counts come from the NAND structure of the
+gates, also for gates that normally run as lookup tables.
+
+usage: python -m benchmarks.gates [cycles]
+"""
+import os
+import sys
+
+from assembler.assembler import assemble
+from cpu.computer import Computer
+from cpu.instrument import GateCounter
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with open(os.path.join(REPO, "asm", "mult.asm"), "r") as f:
+        rom = assemble(f.read())
+
+    with GateCounter() as counter:
+        computer = Computer(rom, {0: 1234, 1: 56})
+        counter.attach(computer.clock, computer.buses())
+        computer.run(cycles)
+
+    print(f"{cycles} cycles: {counter.nands_per_call('Computer.step'):.0f} NANDs per cycle, "
+          f"{counter.nands_per_call('alu16'):.0f} per alu16 call")
+    print()
+    print(counter.report())
+
+
+if __name__ == "__main__":
+    main()
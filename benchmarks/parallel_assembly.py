@@ -0,0 +1,56 @@
+"""Compare serial and sharded parallel assembly of one large source.
+
+Generates a synthetic source of the given number of lines (labels only in
+the first 32K instructions, so every label address is a valid constant).
+
+usage: python -m benchmarks.parallel_assembly [lines] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from assembler.assembler import assemble_file
+from assembler.parallel import assemble_file_parallel
+
+
+def generate(lines):
+    out = []
+    for i in range(lines//4):
+        if i < 4000 and i % 8 == 0:
+            out.append(f"(L{i})")
+        else:
+            out.append(f"@var{i % 5000}")
+        out.append("M=M+1")
+        out.append("D=M // running total")
+        out.append(f"@L{(i//8)*8 % 4000}")
+    return "\n".join(out) + "\n"
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as d:
+        source = os.path.join(d, "big.asm")
+        with open(source, "w") as f:
+            f.write(generate(lines))
+
+        start = time.perf_counter()
+        assemble_file(source, os.path.join(d, "serial.hack"))
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        assemble_file_parallel(source, os.path.join(d, "parallel.hack"), workers)
+        parallel = time.perf_counter() - start
+
+        with open(os.path.join(d, "serial.hack")) as f1, open(os.path.join(d, "parallel.hack")) as f2:
+            identical = f1.read() == f2.read()
+
+    print(f"{lines} lines, {workers} workers")
+    print(f"  serial:   {serial:7.2f} s")
+    print(f"  parallel: {parallel:7.2f} s  ({serial/parallel:.1f}x, identical={identical})")
+
+
+if __name__ == "__main__":
+    main()
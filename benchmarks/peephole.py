@@ -0,0 +1,74 @@
+"""Measure the peephole optimizer on Pong.
+
+Reports ROM words saved, and cycles saved to reach the same point of the
+program: the N-th RAM write. Both versions must perform the same writes,
+except that values which are label addresses (such as return addresses
+pushed on the stack) move with the code.
+
+usage: python -m benchmarks.peephole [writes]
+"""
+import os
+import sys
+
+from assembler.assembler import assemble
+from assembler.optimizer import OptimizationReport
+from assembler.sourcemap import SourceMap
+from emulator.emulator import Emulator
+
+PONG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "data", "Pong.asm")
+
+
+def cycles_to_write(hack, writes, chunk=100):
+    """Cycles a program needs to make its first writes RAM writes, to within chunk
+    :returns (cycles, list of (address, value) writes)
+    """
+    log = []
+    emu = Emulator(hack)
+    emu.add_write_hook(lambda pc, address, value: log.append((address, value)))
+    while len(log) < writes:
+        emu.run(chunk)
+
+    return emu.cycle, log[:writes]
+
+
+def same_writes(original_log, original_map, optimized_log, optimized_map):
+    """True if both write logs match, allowing label addresses to be relocated"""
+    relocated = {}
+    for name, address in original_map.labels.items():
+        if name in optimized_map.labels:
+            relocated[address] = optimized_map.labels[name]
+
+    for (address, value), (new_address, new_value) in zip(original_log, optimized_log):
+        if address != new_address:
+            return False
+        if value != new_value and relocated.get(value) != new_value:
+            return False
+
+    return len(original_log) == len(optimized_log)
+
+
+def main():
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with open(PONG, "r") as f:
+        asm = f.read()
+
+    report = OptimizationReport()
+    original_map = SourceMap()
+    optimized_map = SourceMap()
+    original = assemble(asm, original_map)
+    optimized = assemble(asm, optimized_map, optimize=True, optimization_report=report)
+    print(f"ROM: {report}")
+
+    original_cycles, original_log = cycles_to_write(original, writes)
+    optimized_cycles, optimized_log = cycles_to_write(optimized, writes)
+    if not same_writes(original_log, original_map, optimized_log, optimized_map):
+        print("ERROR: optimized program writes different values")
+        sys.exit(1)
+
+    saved = original_cycles - optimized_cycles
+    print(f"cycles to RAM write {writes}: {original_cycles} -> {optimized_cycles} "
+          f"({saved} saved, {100*saved/original_cycles:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
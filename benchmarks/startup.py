@@ -0,0 +1,111 @@
+"""Measure import and startup time against a budget.
+
+Each module is imported in a fresh interpreter under `python -X importtime`,
+and hack-assemble.py is run end to end on tests/data/Add.asm. Bytecode is
+cached in a temporary directory and warmed before measuring, and the best
+of several runs is kept. Exits with status 1 if anything is over budget.
+
+usage: python -m benchmarks.startup [runs]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cumulative import time budget in milliseconds, per module
+IMPORT_BUDGETS = {
+    "assembler.assembler": 12,
+    "cpu.alu": 3,
+    "cpu.memory": 3,
+}
+
+# budget in milliseconds for `python hack-assemble.py tests/data/Add.asm`,
+# beyond the startup of an interpreter that imports nothing
+ASSEMBLE_ADD_BUDGET = 20
+
+# how many of the slowest modules to list for each measured module
+_TOP = 5
+
+
+def _environment(pycache):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPYCACHEPREFIX"] = pycache
+    return env
+
+
+def import_times(module, env, runs):
+    """Best self and cumulative import time of module and everything it
+    imports, in microseconds
+    :returns dict of name -> (self, cumulative)
+    """
+    best = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO, env=env, capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            times = (int(self_us), int(cumulative_us))
+            name = name.strip()
+            best[name] = min(best[name], times) if name in best else times
+    return best
+
+
+def run_time(args, env, runs):
+    """Best wall time of running a command, in seconds"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=REPO, env=env, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    over_budget = []
+
+    with tempfile.TemporaryDirectory() as d:
+        env = _environment(os.path.join(d, "pycache"))
+        output = os.path.join(d, "Add.hack")
+        assemble_add = [sys.executable, "hack-assemble.py", os.path.join("tests", "data", "Add.asm"), output]
+        # write bytecode before measuring
+        run_time(assemble_add, env, 1)
+        # modules any interpreter imports at startup
+        startup = import_times("sys", env, 1)
+
+        for module, budget in IMPORT_BUDGETS.items():
+            times = import_times(module, env, runs)
+            total = times[module][1]/1000
+            status = "ok" if total <= budget else "OVER BUDGET"
+            print(f"import {module}: {total:.1f} ms (budget {budget} ms) {status}")
+            if total > budget:
+                over_budget.append(module)
+
+            imported = sorted(
+                ((name, t) for name, t in times.items() if name not in startup),
+                key=lambda item: item[1][0], reverse=True)
+            for name, (self_us, _) in imported[:_TOP]:
+                print(f"    {self_us/1000:6.2f} ms  {name}")
+
+        python = run_time([sys.executable, "-c", "pass"], env, runs)
+        assemble = run_time(assemble_add, env, runs)
+        total = (assemble - python)*1000
+        status = "ok" if total <= ASSEMBLE_ADD_BUDGET else "OVER BUDGET"
+        print(f"hack-assemble.py Add.asm: {assemble*1000:.1f} ms, {total:.1f} ms beyond bare interpreter startup "
+              f"(budget {ASSEMBLE_ADD_BUDGET} ms) {status}")
+        if total > ASSEMBLE_ADD_BUDGET:
+            over_budget.append("hack-assemble.py")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measure SymbolTable time and memory with millions of symbols, for each
+mapping the symbols can be held in.
+
+Half the symbols are added as labels, as the first assembler pass does,
+then every label is looked up and as many new variables are allocated, as
+the second pass does. Time is measured on one run and memory, as the
+Python allocations still held after the run, on another under tracemalloc.
+SQLite's own memory is not traced: it is bounded by its page cache.
+
+usage: python -m benchmarks.symboltable [symbols] [dict|compact|spilled ...]
+"""
+import sys
+import time
+import tracemalloc
+
+from assembler.symbolstore import CompactSymbols, SpilledSymbols
+from assembler.symboltable import SymbolTable
+
+BACKENDS = {
+    "dict": dict,
+    "compact": CompactSymbols,
+    "spilled": SpilledSymbols,
+}
+
+
+def fill(table, symbols):
+    labels = symbols//2
+    for i in range(labels):
+        table.try_add(f"L{i}", i)
+    for i in range(labels):
+        table.get_or_allocate(f"L{i}")
+        table.get_or_allocate(f"v{i}")
+
+
+def run(backend, symbols, traced):
+    """Seconds to fill a table, and bytes it holds afterwards if traced"""
+    if traced:
+        tracemalloc.start()
+    start = time.perf_counter()
+    mapping = backend()
+    table = SymbolTable(mapping)
+    fill(table, symbols)
+    elapsed = time.perf_counter() - start
+
+    held = None
+    if traced:
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    if len(table.symbols) != symbols:
+        raise Exception(f"{len(table.symbols)} symbols in the table, expected {symbols}")
+    if hasattr(mapping, "close"):
+        mapping.close()
+    return elapsed, held
+
+
+def main():
+    args = sys.argv[1:]
+    symbols = int(float(args.pop(0))) if args else 10**6
+    names = args or list(BACKENDS)
+
+    print(f"{symbols} symbols")
+    print(f"{'backend':10}{'seconds':>10}{'us/symbol':>12}{'MB held':>10}{'bytes/symbol':>14}")
+    for name in names:
+        elapsed, _ = run(BACKENDS[name], symbols, False)
+        _, held = run(BACKENDS[name], symbols, True)
+        print(f"{name:10}{elapsed:>10.2f}{elapsed/symbols*1e6:>12.2f}{held/2**20:>10.1f}{held/symbols:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Compare the VM translator's speed and size modes.
+
+Translates the recursive Fibonacci program in tests/data/Fib both ways and
+reports ROM words and cycles until Sys.init reaches its END loop.
+
+usage: python -m benchmarks.vmtranslator [n]
+"""
+import os
+import sys
+
+from assembler.assembler import assemble
+from assembler.sourcemap import SourceMap
+from emulator.emulator import Emulator
+from vmtranslator.codewriter import SPEED, SIZE
+from vmtranslator.translator import translate
+
+FIB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "data", "Fib")
+
+
+def cycles_to_halt(hack, end_address, n, chunk=10):
+    """Cycles until the program reaches end_address, to within chunk"""
+    emu = Emulator(hack, {5: n})
+    while emu.pc not in (end_address, end_address + 1):
+        emu.run(chunk)
+
+    return emu.cycle, emu.ram[6]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    sources = []
+    for name in ("Main", "Sys"):
+        with open(os.path.join(FIB, name + ".vm"), "r") as f:
+            sources.append((name, f.read()))
+
+    print(f"fibonacci({n})")
+    for mode in (SPEED, SIZE):
+        source_map = SourceMap()
+        hack = assemble(translate(sources, mode), source_map)
+        cycles, result = cycles_to_halt(hack, source_map.labels["Sys.init$END"], n)
+        print(f"{mode:>6}: {len(hack.split()):6d} words {cycles:10d} cycles  result={result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,11 @@
 Modules for performing simple 2s-complement arithmetic, using
 logic gates from gates.py
 """
-from cpu.gate import *
+from cpu.lut import BIT, lookup_table
+from cpu.gate import and_gate, or_gate, xor_gate, not16_gate, and16_gate, mux16_gate
 
 
+@lookup_table(BIT, BIT)
 def half_adder(a, b):
     """Add a and b, returning sum and carry bit
     :return (carry, sum)
@@ -21,6 +23,7 @@ def half_adder(a, b):
     return and_gate(a, b), xor_gate(a, b)
 
 
+@lookup_table(BIT, BIT, BIT)
 def full_adder(a, b, c):
     """Add a, b, and c, returning sum and carry bit.
     :return (carry, sum)
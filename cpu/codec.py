@@ -0,0 +1,79 @@
+"""Conversion between ints and the bit buses the chips work on.
+
+A bus is a sequence of 0/1 ints, most significant bit first, as in the
+chips' inputs and outputs. The 16-bit conversions are table lookups:
+WORD_BITS holds the bus of every word, and a dict maps each of those buses
+back to its word. Both tables are built on first use, keeping them out of
+the import time of the chips.
+"""
+import itertools
+
+WORD_SIZE = 16
+WORD_MASK = 0xFFFF
+
+# bus of every 16-bit word, and its inverse, once built
+_word_bits = None
+_words = None
+
+# leading zeros widening an n-bit bus to 16 bits
+_PADDING = [(0,)*(WORD_SIZE - n) for n in range(WORD_SIZE + 1)]
+
+
+def _build_tables():
+    global _word_bits, _words
+    # tuples shared by all callers: product() yields them in counting
+    # order, so _word_bits[word] is the bus of word
+    _word_bits = tuple(itertools.product((0, 1), repeat=WORD_SIZE))
+    _words = {bits: word for word, bits in enumerate(_word_bits)}
+
+
+def __getattr__(name):
+    # WORD_BITS, the bus of every word, built when first asked for
+    if name == "WORD_BITS":
+        if _word_bits is None:
+            _build_tables()
+        return _word_bits
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def word_to_bits(word):
+    """16-bit bus of an int, keeping its low 16 bits, so a negative int
+    gives its 2's complement. The bus is a shared tuple: copy it with list()
+    before writing to it.
+    """
+    if _word_bits is None:
+        _build_tables()
+    return _word_bits[word & WORD_MASK]
+
+
+def bits_to_word(bits):
+    """Unsigned word of a 16-bit bus"""
+    if _words is None:
+        _build_tables()
+    return _words[tuple(bits)]
+
+
+def int_to_bits(integer, n):
+    """n-bit bus of the low n bits of an int
+    int_to_bits(9, 4) returns (1, 0, 0, 1)
+    """
+    if n <= WORD_SIZE:
+        if _word_bits is None:
+            _build_tables()
+        return _word_bits[integer & ((1 << n) - 1)][WORD_SIZE - n:]
+    return tuple((integer >> shift) & 1 for shift in range(n - 1, -1, -1))
+
+
+def bits_to_int(bits):
+    """Unsigned int of a bus of any width"""
+    n = len(bits)
+    if n <= WORD_SIZE:
+        if _words is None:
+            _build_tables()
+        return _words[_PADDING[n] + tuple(bits)]
+
+    integer = 0
+    for bit in bits:
+        integer = (integer << 1) | bit
+    return integer
+
@@ -0,0 +1,155 @@
+"""Hack computer built from the chips in this package.
+
+The CPU is wired as in The Elements of Computing Systems: A, D and PC are
+Register16 chips, the ALU is alu16, and data memory is an NRAM covering the
+whole 32K address space (RAM, screen and keyboard). Every cycle drives each
+chip's inputs through gates, then ticks the clock so all of them latch
+together. It is orders of magnitude slower than emulator.Emulator, and
+serves as the reference it is checked against.
+"""
+from cpu.alu import alu16, inc16
+from cpu.codec import bits_to_int, bits_to_word, word_to_bits
+from cpu.gate import and_gate, mux16_gate, not_gate, or8way_gate, or_gate
+from cpu.memory import ChipClock, NRAM, Register16
+
+RAM_SIZE = 2**15
+ROM_SIZE = 2**15
+
+# bit positions of an instruction, most significant first
+_I = 0
+_A = 3
+_COMP = slice(4, 10)
+_D1, _D2, _D3 = 10, 11, 12
+_J1, _J2, _J3 = 13, 14, 15
+
+
+class Computer:
+    """Hack CPU, 32K ROM and 32K data memory, executing one instruction per
+    clock cycle.
+
+    :param rom: list of instruction words or Hack-machine code text
+    :param ram: optional initial RAM as a dict of address: word
+    """
+
+    def __init__(self, rom, ram=None):
+        if isinstance(rom, str):
+            rom = [int(line, 2) for line in rom.split()]
+
+        if len(rom) > ROM_SIZE:
+            raise ValueError(f"ROM image of {len(rom)} words exceeds {ROM_SIZE} words")
+
+        self._rom = [word_to_bits(word) for word in rom]
+        self._empty = word_to_bits(0)
+        self.clock = ChipClock()
+        self._a = Register16(self.clock)
+        self._d = Register16(self.clock)
+        self._pc = Register16(self.clock)
+        self._memory = NRAM(RAM_SIZE, self.clock)
+        self.cycle = 0
+
+        for address, value in (ram or {}).items():
+            self.write(address, value)
+
+    @property
+    def a(self):
+        return bits_to_word(self._a.get_out())
+
+    @property
+    def d(self):
+        return bits_to_word(self._d.get_out())
+
+    @property
+    def pc(self):
+        return bits_to_word(self._pc.get_out())
+
+    def buses(self):
+        """Functions reading the outputs of the A, D and PC registers, by name"""
+        return {"A": self._a.get_out, "D": self._d.get_out, "PC": self._pc.get_out}
+
+    @property
+    def memory_stats(self):
+        """emulator.memstats.MemoryStats counting data memory reads and
+        writes, or None"""
+        return self._memory.stats
+
+    @memory_stats.setter
+    def memory_stats(self, stats):
+        self._memory.stats = stats
+
+    def read(self, address):
+        return self._memory.view(address, address + 1)[0]
+
+    def write(self, address, value):
+        """Write a word to data memory outside of program execution, without
+        ticking the clock"""
+        self._memory.load((value,), address)
+
+    def load(self, data, offset=0):
+        """Write words to data memory from offset, outside of program
+        execution, without ticking the clock (see NRAM.load)"""
+        return self._memory.load(data, offset)
+
+    def memory(self, start=0, end=RAM_SIZE):
+        """memoryview of data memory words start up to end (see NRAM.view)"""
+        return self._memory.view(start, end)
+
+    def set_registers(self, a, d, pc):
+        """Load words into the A, D and PC registers through their inputs,
+        ticking the clock once without loading data memory or running an
+        instruction"""
+        for register, word in ((self._a, a), (self._d, d), (self._pc, pc & 0x7FFF)):
+            register.set_input(word_to_bits(word))
+            register.set_load(1)
+        self._memory.set_load(0)
+        self.clock.tick()
+
+    def run(self, cycles):
+        for _ in range(cycles):
+            self.step()
+        return cycles
+
+    def step(self):
+        """Execute one instruction: one clock cycle"""
+        a_out = self._a.get_out()
+        d_out = self._d.get_out()
+        pc_out = self._pc.get_out()
+        address = bits_to_int(pc_out[1:])
+        instruction = self._rom[address] if address < len(self._rom) else self._empty
+
+        is_c = instruction[_I]
+        self._memory.set_address_bus(a_out[1:])
+        y = [None]*16
+        mux16_gate(a_out, self._memory.get_output_bus(), y, instruction[_A])
+
+        out = [None]*16
+        alu16(d_out, y, *instruction[_COMP], out)
+        zero = not_gate(or_gate(or8way_gate(out[:8]), or8way_gate(out[8:])))
+        negative = out[0]
+        positive = and_gate(not_gate(zero), not_gate(negative))
+
+        # data memory is written at the address A held before this cycle
+        self._memory.set_input_bus(out)
+        self._memory.set_load(and_gate(is_c, instruction[_D3]))
+
+        self._d.set_input(out)
+        self._d.set_load(and_gate(is_c, instruction[_D2]))
+
+        a_in = [None]*16
+        mux16_gate(instruction, out, a_in, is_c)
+        self._a.set_input(a_in)
+        self._a.set_load(or_gate(not_gate(is_c), and_gate(is_c, instruction[_D1])))
+
+        jump = and_gate(is_c, or_gate(
+            or_gate(and_gate(instruction[_J1], negative), and_gate(instruction[_J2], zero)),
+            and_gate(instruction[_J3], positive)))
+        next_pc = [None]*16
+        incremented = [None]*16
+        inc16(pc_out, incremented)
+        mux16_gate(incremented, a_out, next_pc, jump)
+        # PC wraps at the 15-bit ROM address space
+        next_pc[0] = 0
+        self._pc.set_input(next_pc)
+        self._pc.set_load(1)
+
+        self.clock.tick()
+        self.cycle += 1
@@ -1,7 +1,9 @@
 """ Logic Gates
 
-    All gates implemented using NAND gates.
+    All gates implemented using NAND gates. Composite gates with few inputs
+    are replaced by lookup tables built from that structure (see cpu.lut).
 """
+from cpu.lut import BIT, lookup_table
 
 _NAND_PRIMITIVE = [[1, 1], [1, 0]]
 
@@ -24,10 +26,12 @@ def or_gate(a, b):
     return nand_gate(not_gate(a), not_gate(b))
 
 
+@lookup_table(BIT, BIT)
 def xor_gate(a, b):
     return and_gate(or_gate(a, b), nand_gate(a, b))
 
 
+@lookup_table(BIT, BIT, BIT)
 def mux_gate(a, b, sel):
     """ if sel=0, return a. if sel=1, return b"""
 
@@ -35,11 +39,13 @@ def mux_gate(a, b, sel):
     return or_gate(and_gate(not_gate(sel), a), and_gate(sel, b))
 
 
+@lookup_table(BIT, BIT)
 def dmux_gate(input, sel):
     """ if sel=0, return (input, 0). if sel=1, return (0, input)"""
     return (and_gate(not_gate(sel), input), and_gate(sel, input))
 
 
+@lookup_table(BIT, 2)
 def dmux4way_gate(input, sel2):
     sel_a = and_gate(not_gate(sel2[0]), not_gate(sel2[1]))
     sel_b = and_gate(not_gate(sel2[0]), sel2[1])
@@ -76,6 +82,7 @@ def mux16_gate(a, b, out, sel):
         out[i] = mux_gate(a[i], b[i], sel)
 
 
+@lookup_table(8)
 def or8way_gate(arr):
     """ OR every bit of array. return 1 if any bit is 1 """
     return or_gate(
@@ -90,6 +97,7 @@ def or8way_gate(arr):
     )
 
 
+@lookup_table(8)
 def and8way_gate(arr):
     """ AND every bit of array. return 1 if all bits are 1 """
     return and_gate(
@@ -104,6 +112,7 @@ def and8way_gate(arr):
     )
 
 
+@lookup_table(4, 2)
 def mux4way_gate(input4, sel2):
     """
     MUX with 4 inputs, 2-bit selector.
@@ -120,6 +129,7 @@ def mux4way_gate(input4, sel2):
     return mux_gate(top, bottom, sel2[1])
 
 
+@lookup_table(8, 3)
 def mux8way_gate(input8, sel3):
     """
     MUX with 8 inputs, 3-bit selector
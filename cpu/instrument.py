@@ -0,0 +1,218 @@
+"""Gate-level instrumentation: how much work the chips do.
+
+While a GateCounter is active, nand_gate, every gate and chip function in
+cpu.gate and cpu.alu, and the chip methods that evaluate gates, are
+replaced by counting versions, in every module that refers to them. Gates
+running as lookup tables (see cpu.lut) are counted through their NAND
+structure. On exit the originals are put back, so code run without a
+GateCounter pays nothing:
+
+    with GateCounter() as counter:
+        computer = Computer(rom)
+        counter.attach(computer.clock, computer.buses())
+        computer.run(100)
+    print(counter.report())
+
+Counted for each gate or chip: calls, the NANDs evaluated within them, and
+the calls each made to the others. Named buses are sampled after every
+clock tick to count how often each of their bits toggles.
+"""
+import collections
+import sys
+
+# name of the enclosing chip for calls made outside any counted chip
+TOP = "(top)"
+
+# chip methods counted, beside the functions of _GATE_MODULES
+_CHIP_METHODS = [
+    ("cpu.memory", "BitRegister", ["set_in", "set_load"]),
+    ("cpu.memory", "Register16", ["set_input", "set_load"]),
+    ("cpu.computer", "Computer", ["step"]),
+]
+_GATE_MODULES = ["cpu.gate", "cpu.alu"]
+
+_active = None
+
+
+class GateCounter:
+    def __init__(self):
+        # gate or chip -> calls
+        self.calls = collections.Counter()
+        # gate or chip -> NANDs evaluated within its calls
+        self.nands = collections.Counter()
+        # enclosing chip -> Counter of gate or chip -> calls it made
+        self.callers = collections.defaultdict(collections.Counter)
+        # bus name -> samples, and toggles of each bit
+        self.samples = collections.Counter()
+        self.toggles = {}
+
+        self._stack = [TOP]
+        self._nand_total = [0]
+        self._buses = {}
+        self._previous = {}
+        self._clocks = []
+        self._patched = []
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise Exception("A GateCounter is already active")
+        _active = self
+        self._install()
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self._uninstall()
+        for clock in self._clocks:
+            clock.disconnect(self.sample)
+        self._clocks = []
+        _active = None
+        # NANDs are counted apart from other calls, to keep their wrapper short
+        self.calls["nand_gate"] = self._nand_total[0]
+        self.nands["nand_gate"] = self._nand_total[0]
+
+    def _install(self):
+        import cpu.computer
+        import cpu.gate
+
+        # original object -> counting replacement
+        replacements = {id(cpu.gate.nand_gate): self._counting_nand(cpu.gate.nand_gate)}
+        for module_name in _GATE_MODULES:
+            module = sys.modules[module_name]
+            for name, value in vars(module).items():
+                if (callable(value) and not name.startswith("_") and not isinstance(value, type)
+                        and getattr(value, "__module__", None) == module_name and name != "nand_gate"):
+                    # a lookup table gate is replaced by its structure
+                    structural = getattr(value, "__wrapped__", value)
+                    replacements[id(value)] = self._counting(name, structural)
+
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, "__dict__", None)
+            if namespace is None:
+                continue
+            for name, value in list(namespace.items()):
+                replacement = replacements.get(id(value))
+                if replacement is not None:
+                    self._patched.append((namespace, name, value))
+                    namespace[name] = replacement
+
+        for module_name, class_name, methods in _CHIP_METHODS:
+            cls = getattr(sys.modules[module_name], class_name)
+            for method in methods:
+                original = cls.__dict__[method]
+                self._patched.append((cls, method, original))
+                setattr(cls, method, self._counting(f"{class_name}.{method}", original))
+
+    def _uninstall(self):
+        for target, name, original in reversed(self._patched):
+            if isinstance(target, dict):
+                target[name] = original
+            else:
+                setattr(target, name, original)
+        self._patched = []
+
+    def _counting(self, name, function):
+        calls = self.calls
+        nands = self.nands
+        callers = self.callers
+        stack = self._stack
+        nand_total = self._nand_total
+
+        def counted(*args, **kwargs):
+            calls[name] += 1
+            callers[stack[-1]][name] += 1
+            stack.append(name)
+            before = nand_total[0]
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stack.pop()
+                nands[name] += nand_total[0] - before
+
+        counted.__name__ = name
+        counted.__wrapped__ = function
+        return counted
+
+    def _counting_nand(self, nand_gate):
+        callers = self.callers
+        stack = self._stack
+        nand_total = self._nand_total
+
+        def counted_nand(a, b):
+            nand_total[0] += 1
+            callers[stack[-1]]["nand_gate"] += 1
+            return nand_gate(a, b)
+
+        counted_nand.__wrapped__ = nand_gate
+        return counted_nand
+
+    def watch(self, name, read):
+        """Count toggles of a bus each time it is sampled, from its value now
+        :param read: no-arg function returning the bus, a sequence of bits
+        """
+        self._buses[name] = read
+        self._previous[name] = list(read())
+        self.toggles[name] = [0]*len(self._previous[name])
+
+    def attach(self, clock, buses=None):
+        """Sample the watched buses after every tick of a ChipClock, until
+        the counter exits
+        :param buses: optional dict of name: read function to watch
+        """
+        for name, read in (buses or {}).items():
+            self.watch(name, read)
+        clock.connect(self.sample)
+        self._clocks.append(clock)
+
+    def sample(self):
+        """Read each watched bus, counting the bits changed since last read"""
+        for name, read in self._buses.items():
+            bus = list(read())
+            previous = self._previous[name]
+            self._previous[name] = bus
+            self.samples[name] += 1
+            toggles = self.toggles[name]
+            for i, (old, new) in enumerate(zip(previous, bus)):
+                if old != new:
+                    toggles[i] += 1
+
+    def nands_per_call(self, name):
+        calls = self.calls[name]
+        return self.nands[name]/calls if calls else 0
+
+    def toggle_rates(self, name):
+        """Toggles per sample of each bit of a watched bus"""
+        samples = self.samples[name]
+        return [toggles/samples if samples else 0 for toggles in self.toggles.get(name, [])]
+
+    def report(self, top=20):
+        """Text report of the chips doing most NANDs, what each called, and
+        the activity of the watched buses"""
+        nands = dict(self.nands)
+        nands["nand_gate"] = self._nand_total[0]
+        calls = dict(self.calls)
+        calls["nand_gate"] = self._nand_total[0]
+        chips = sorted(calls, key=lambda chip: (-nands.get(chip, 0), chip))[:top]
+
+        lines = [f"{'chip':24}{'calls':>12}{'NANDs':>14}{'NANDs/call':>12}"]
+        for chip in chips:
+            lines.append(f"{chip:24}{calls[chip]:>12}{nands.get(chip, 0):>14}{nands.get(chip, 0)/calls[chip]:>12.1f}")
+
+        lines.append("")
+        lines.append("calls per call of the enclosing chip")
+        for chip in chips:
+            within = self.callers.get(chip)
+            if within:
+                called = ", ".join(f"{name} {count/calls[chip]:g}" for name, count in within.most_common())
+                lines.append(f"  {chip}: {called}")
+
+        if self._buses:
+            lines.append("")
+            lines.append(f"{'bus':24}{'samples':>12}{'toggles/sample':>16}  busiest bits")
+            for name in self._buses:
+                rates = self.toggle_rates(name)
+                busiest = sorted(range(len(rates)), key=lambda i: -rates[i])[:4]
+                bits = ", ".join(f"{i}: {rates[i]:.2f}" for i in busiest)
+                lines.append(f"{name:24}{self.samples[name]:>12}{sum(rates):>16.2f}  {bits}")
+        return "\n".join(lines)
@@ -0,0 +1,258 @@
+"""Lookup tables replacing small gates.
+
+A gate with few enough input bits can be evaluated once for every input
+from its NAND structure, and then answered by indexing a table:
+
+    @lookup_table(4, 2)
+    def mux4way_gate(input4, sel2):
+        ...
+
+The arguments of lookup_table give the width of each argument of the gate,
+BIT for a single bit. The gate's input bits, in argument order, form the
+table index, most significant first. The decorated gate returns the same
+values as the structural one, which stays available as its __wrapped__.
+
+A table is loaded or built, and its lookup compiled, on the first call of
+its gate, so importing the gates stays cheap. Tables are cached on disk,
+keyed by a hash of the source of the gate and every function it calls, so
+a changed gate is tabulated again. Set the
+environment variable HACK_GATE_TABLES=0 to run the structural gates
+instead; HACK_GATE_TABLE_CACHE sets the cache directory.
+"""
+import itertools
+import os
+
+BIT = 0
+
+# gates with more input bits are left structural
+MAX_INPUT_BITS = 16
+
+ENABLED = os.environ.get("HACK_GATE_TABLES", "1") != "0"
+CACHE_DIR = os.environ.get("HACK_GATE_TABLE_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "hack-gate-tables")
+
+# header of a cached table: magic, then a byte each of output width (BIT
+# for a single bit) and input bits
+_MAGIC = b"HLUT"
+_HEADER_SIZE = len(_MAGIC) + 2
+
+
+def lookup_table(*widths):
+    """Decorator replacing a gate with a lookup into its table
+    :param widths: width of each argument of the gate, BIT for a single bit
+    """
+    def decorate(gate):
+        if not ENABLED:
+            return gate
+        _input_count(gate, widths)
+
+        # until its first call, the gate runs _deferred with globals of its
+        # own, which then become those of the lookup code put in its place
+        namespace = {}
+        function = _describe(_FUNCTION_TYPE(_deferred.__code__, namespace, gate.__name__), gate)
+
+        def compile_lookup():
+            namespace["_table"] = _table(gate, widths)
+            function.__code__ = _lookup_code(gate, widths)
+            return function
+
+        namespace["_compile_lookup"] = compile_lookup
+        return function
+    return decorate
+
+
+def tabulate(gate, widths, cache_dir=None):
+    """Lookup-table version of gate, with its table read now from the cache
+    in cache_dir (CACHE_DIR by default) or built and cached
+    :param widths: width of each argument of gate, BIT for a single bit
+    """
+    namespace = {"_table": _table(gate, widths, cache_dir)}
+    return _describe(_FUNCTION_TYPE(_lookup_code(gate, widths), namespace, gate.__name__), gate)
+
+
+def _deferred(*args):
+    # runs with the globals of a gate not yet called, see lookup_table
+    return _compile_lookup()(*args)
+
+
+_FUNCTION_TYPE = type(_deferred)
+
+
+def _input_count(gate, widths):
+    """Number of input bits of gate
+    :raises ValueError if there are too many to tabulate
+    """
+    input_bits = sum(max(width, 1) for width in widths)
+    if input_bits > MAX_INPUT_BITS:
+        raise ValueError(f"{gate.__name__} has {input_bits} input bits, more than {MAX_INPUT_BITS} to tabulate")
+    return input_bits
+
+
+def _table(gate, widths, cache_dir=None):
+    """Result of gate for every input, read from the cache in cache_dir
+    (CACHE_DIR by default) or built"""
+    input_bits = _input_count(gate, widths)
+    path = _cache_path(gate, widths, cache_dir or CACHE_DIR)
+    loaded = _load(path, input_bits) if path else None
+    if loaded is None:
+        output_width, codes = _build(gate, widths, input_bits)
+        if path:
+            _save(path, output_width, input_bits, codes)
+    else:
+        output_width, codes = loaded
+
+    # decoded result of each output code, shared by every table entry
+    if output_width == BIT:
+        results = (0, 1)
+    else:
+        results = list(itertools.product((0, 1), repeat=output_width))
+    return tuple(results[code] for code in codes)
+
+
+def _input_bits(widths, index):
+    """Arguments of a gate for a table index"""
+    arguments = []
+    shift = sum(max(width, 1) for width in widths)
+    for width in widths:
+        if width == BIT:
+            shift -= 1
+            arguments.append((index >> shift) & 1)
+        else:
+            shift -= width
+            arguments.append([(index >> (shift + i)) & 1 for i in range(width - 1, -1, -1)])
+    return arguments
+
+
+def _build(gate, widths, input_bits):
+    """Evaluate gate on every input
+    :returns (output width, output code of each input, packed as bytes)
+    """
+    output_width = None
+    codes = bytearray(2**input_bits)
+    for index in range(2**input_bits):
+        result = gate(*_input_bits(widths, index))
+        if not isinstance(result, (int, tuple)):
+            # table entries are shared, so must not be mutable
+            raise ValueError(f"{gate.__name__} returns {type(result).__name__}, not a bit or tuple of bits")
+        width = BIT if isinstance(result, int) else len(result)
+        if output_width is None:
+            if width > 8:
+                raise ValueError(f"{gate.__name__} has {width} output bits, more than 8 to tabulate")
+            output_width = width
+        elif width != output_width:
+            raise ValueError(f"{gate.__name__} returns outputs of different widths")
+
+        if width == BIT:
+            codes[index] = result
+        else:
+            code = 0
+            for bit in result:
+                code = (code << 1) | bit
+            codes[index] = code
+    return output_width, bytes(codes)
+
+
+def _lookup_code(gate, widths):
+    """Code of a function with the gate's arguments, returning
+    _table[index of its inputs]"""
+    names = gate.__code__.co_varnames[:gate.__code__.co_argcount]
+    terms = []
+    shift = sum(max(width, 1) for width in widths)
+    for name, width in zip(names, widths):
+        if width == BIT:
+            shift -= 1
+            terms.append(f"{name} << {shift}")
+        else:
+            for i in range(width):
+                shift -= 1
+                terms.append(f"{name}[{i}] << {shift}")
+
+    source = f"def {gate.__name__}({', '.join(names)}):\n    return _table[{' | '.join(terms)}]\n"
+    namespace = {}
+    exec(source, namespace)
+    return namespace[gate.__name__].__code__
+
+
+def _describe(function, gate):
+    """Give function the name, documentation and signature of gate"""
+    function.__module__ = gate.__module__
+    function.__qualname__ = gate.__qualname__
+    function.__doc__ = gate.__doc__
+    function.__wrapped__ = gate
+    return function
+
+
+def _dependencies(code, namespace, functions, constants):
+    """Collect the functions and constant globals that code refers to,
+    following each function's own references"""
+    import types
+
+    for name in code.co_names:
+        value = namespace.get(name)
+        while hasattr(value, "__wrapped__"):
+            value = value.__wrapped__
+        if isinstance(value, types.FunctionType):
+            if value not in functions:
+                functions.append(value)
+                _dependencies(value.__code__, value.__globals__, functions, constants)
+        elif isinstance(value, (int, tuple, list)):
+            constants[f"{namespace.get('__name__')}.{name}"] = repr(value)
+    for constant in code.co_consts:
+        # nested code: comprehensions and lambdas
+        if isinstance(constant, types.CodeType):
+            _dependencies(constant, namespace, functions, constants)
+
+
+def _source_hash(gate, widths):
+    """Hash of the source of gate, every function it calls and the
+    constants they use, or None if the source is not available"""
+    import hashlib
+    import inspect
+
+    functions = [gate]
+    constants = {}
+    _dependencies(gate.__code__, gate.__globals__, functions, constants)
+    digest = hashlib.sha256(repr((widths, sorted(constants.items()))).encode())
+    try:
+        for function in functions:
+            digest.update(inspect.getsource(function).encode())
+    except (OSError, TypeError):
+        return None
+    return digest.hexdigest()[:16]
+
+
+def _cache_path(gate, widths, cache_dir):
+    source_hash = _source_hash(gate, widths)
+    if source_hash is None:
+        return None
+    return os.path.join(cache_dir, f"{gate.__module__}.{gate.__name__}-{source_hash}.lut")
+
+
+def _load(path, input_bits):
+    """(output width, codes) cached in path, or None if missing or damaged"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) != _HEADER_SIZE + 2**input_bits:
+        return None
+    output_width, cached_bits = data[len(_MAGIC):_HEADER_SIZE]
+    if not data.startswith(_MAGIC) or cached_bits != input_bits:
+        return None
+    return output_width, data[_HEADER_SIZE:]
+
+
+def _save(path, output_width, input_bits, codes):
+    """Cache a table, ignoring failure: the cache only saves rebuilding"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written under a unique name and renamed, so readers never see part of it
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(_MAGIC + bytes((output_width, input_bits)))
+            f.write(codes)
+        os.replace(temporary, path)
+    except OSError:
+        pass
@@ -1,6 +1,8 @@
 """Memory chips, including registers & RAM"""
-from cpu.gate import *
+from cpu.codec import bits_to_int, bits_to_word, word_to_bits
+from cpu.gate import mux_gate
 import math
+import sys
 
 class ChipClock:
     """Clock for synchronizing chip logic"""
@@ -13,6 +15,10 @@ class ChipClock:
         """Add a no-arg callback that will be invoked on every clock tick"""
         self.callbacks.append(tick_function)
 
+    def disconnect(self, tick_function):
+        """Remove a callback added with connect"""
+        self.callbacks.remove(tick_function)
+
     def tick(self):
         """Advance the clock one-cycle and notify all connected chips """
         for f in self.callbacks:
@@ -99,21 +105,29 @@ class NRAM:
     Unlike RAM8, which is written to be composed of more primitive
     gates to emulate actual hardware, NRAM is backed by traditional python
     data structures to speed things up & is useful for testing.
-    Both expose the same interfaces.
+    Both expose the same interfaces. Each register is held as a word of an
+    array, converted from and to buses through cpu.codec.
+
+    Beside the buses, whole ranges of registers can be loaded, viewed and
+    filled directly, without ticking the clock, to set up and inspect large
+    data sets.
     """
 
     def __init__(self, size, clock):
         if not _is_power_2(size):
             raise ValueError("NRAM size must be power of 2")
 
+        # imported here, as array costs more than the rest of the module to import
+        import array
+
         self._size = size
         self._address_bits = int(math.log(size, 2))
-        self._registers = []
-        for _ in range(size):
-            self._registers.append([0]*16)
+        self._registers = array.array("H", bytes(2*size))
         self._input_bus = [0]*16
         self._address_bus = [0]*self._address_bits
         self._load_bit = 0
+        # set to an emulator.memstats.MemoryStats to count reads and writes per register
+        self.stats = None
         clock.connect(self._on_tick)
 
     def set_load(self, v):
@@ -134,28 +148,96 @@ class NRAM:
 
     def _on_tick(self):
         # load new input into memory
+        if self.stats is not None:
+            self.stats.cycles += 1
         if self._load_bit == 1:
-            address = self._address_to_index()
-            for i in range(16):
-                self._registers[address][i] = self._input_bus[i]
+            index = self._address_to_index()
+            self._registers[index] = bits_to_word(self._input_bus)
+            if self.stats is not None:
+                self.stats.writes[index] += 1
 
     def get_output_bus(self):
         """get output register based on address input"""
-        address = self._address_to_index()
-        output_bus = [0]*16
-        for i in range(16):
-            output_bus[i] = self._registers[address][i]
-
-        return output_bus
+        index = self._address_to_index()
+        if self.stats is not None:
+            self.stats.reads[index] += 1
+        return list(word_to_bits(self._registers[index]))
 
     def _address_to_index(self):
-        multiplier = 1
-        index = 0
-        for address_bit in range(self._address_bits - 1, -1, -1):
-            index += multiplier*self._address_bus[address_bit]
-            multiplier *= 2
+        return bits_to_int(self._address_bus)
+
+    def _range(self, start, end):
+        end = self._size if end is None else end
+        if not 0 <= start <= end <= self._size:
+            raise ValueError(f"Range {start}:{end} is outside NRAM of {self._size} words")
+        return start, end
+
+    def load(self, data, offset=0):
+        """Write words into consecutive registers from offset, without
+        ticking the clock
+        :param data: bytes or bytearray of 16-bit big-endian words, as in a
+            binary ROM; an array, NumPy array or other buffer of 16-bit
+            words; or an iterable of ints, of which the low 16 bits are kept
+        :returns number of words written
+        """
+        import array
+
+        if isinstance(data, (bytes, bytearray)):
+            if len(data) % 2:
+                raise ValueError("Data of an odd number of bytes is not a sequence of 16-bit words")
+            words = array.array("H")
+            words.frombytes(data)
+            if sys.byteorder == "little":
+                words.byteswap()
+        elif isinstance(data, array.array) and data.typecode == "H":
+            words = data
+        else:
+            try:
+                view = memoryview(data)
+            except TypeError:
+                view = None
+            if view is not None and view.contiguous and view.format in ("H", "h", "<H", "<h", "=H", "=h"):
+                words = array.array("H")
+                words.frombytes(view.cast("B"))
+            else:
+                words = array.array("H", (int(word) & 0xFFFF for word in data))
+
+        start, end = self._range(offset, offset + len(words))
+        self._registers[start:end] = words
+        return len(words)
+
+    def view(self, start=0, end=None):
+        """memoryview of 16-bit words onto registers start up to end,
+        sharing their memory: writes through it change the registers.
+        numpy.asarray(view) wraps it without copying.
+        """
+        start, end = self._range(start, end)
+        return memoryview(self._registers)[start:end]
+
+    def dump(self, start=0, end=None):
+        """Registers start up to end as bytes of 16-bit big-endian words,
+        the format load() takes"""
+        start, end = self._range(start, end)
+        words = self._registers[start:end]
+        if sys.byteorder == "little":
+            words.byteswap()
+        return words.tobytes()
+
+    def to_numpy(self, start=0, end=None):
+        """Registers start up to end as a uint16 NumPy array sharing their
+        memory, without copying
+        :raises ImportError if NumPy is not installed
+        """
+        import numpy as np
+
+        return np.frombuffer(self.view(start, end), dtype=np.uint16)
+
+    def fill(self, value, start=0, end=None):
+        """Set registers start up to end to a word, without ticking the clock"""
+        import array
 
-        return index
+        start, end = self._range(start, end)
+        self._registers[start:end] = array.array("H", [value & 0xFFFF])*(end - start)
 
 
 def _is_power_2(n):
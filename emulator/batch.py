@@ -0,0 +1,165 @@
+"""Lockstep emulation of many Hack machines running the same ROM.
+
+Each machine is a lane: A, D and PC are uint16 arrays with one entry per
+lane and RAM is a (lanes, 32K) uint16 array. A step executes one
+instruction on every lane. Lanes are grouped by PC, so each distinct
+instruction in flight costs one vectorized NumPy operation no matter how
+many lanes execute it. Lanes running the same program on different data
+tend to stay in a few groups, even after diverging at branches.
+
+Requires NumPy.
+"""
+
+import numpy as np
+
+from emulator.emulator import RAM_SIZE, ROM_SIZE, DEST_A, DEST_D, DEST_M, JUMP_TAKEN, rom_from_hack
+
+_ADDRESS_MASK = 0x7FFF
+
+
+def _alu_lanes(x, y, code):
+    """Vectorized ALU on uint16 arrays for a 6-bit control code (zx nx zy ny f no)"""
+    if code & 0x20:
+        x = np.zeros_like(x)
+    if code & 0x10:
+        x = ~x
+    if code & 0x08:
+        y = np.zeros_like(y)
+    if code & 0x04:
+        y = ~y
+    out = x + y if code & 0x02 else x & y
+    if code & 0x01:
+        out = ~out
+    return out
+
+
+class BatchEmulator:
+    """lanes copies of the Hack computer executing one ROM in lockstep.
+
+    :param rom: list of instruction words or Hack-machine code text
+    :param lanes: number of machines
+    :param ram: optional dict of address: value, where value is a scalar for
+        every lane or an array with one entry per lane
+    """
+
+    def __init__(self, rom, lanes, ram=None):
+        if isinstance(rom, str):
+            rom = rom_from_hack(rom)
+        if len(rom) > ROM_SIZE:
+            raise ValueError(f"ROM image of {len(rom)} words exceeds {ROM_SIZE} words")
+
+        if lanes < 1:
+            raise ValueError("BatchEmulator needs at least one lane")
+
+        self.lanes = lanes
+        self._lane_index = np.arange(lanes)
+        self.rom = list(rom)
+        self.a = np.zeros(lanes, dtype=np.uint16)
+        self.d = np.zeros(lanes, dtype=np.uint16)
+        self.pc = np.zeros(lanes, dtype=np.uint16)
+        self.ram = np.zeros((lanes, RAM_SIZE), dtype=np.uint16)
+        self.cycle = 0
+
+        # decoded on first use, keyed by ROM address
+        self._decoded = {}
+
+        if ram is not None:
+            for address, value in ram.items():
+                self.set_ram(address, value)
+
+    def set_ram(self, address, value):
+        """Set RAM[address] on every lane to a scalar, or per lane to an array"""
+        self.ram[:, address & _ADDRESS_MASK] = value
+
+    def get_ram(self, address):
+        """RAM[address] of every lane, as an array"""
+        return self.ram[:, address & _ADDRESS_MASK]
+
+    def run(self, cycles):
+        """Execute cycles instructions on every lane
+        :returns number of cycles executed
+        """
+        for _ in range(cycles):
+            self.step()
+
+        return cycles
+
+    def step(self):
+        """Execute one instruction on every lane"""
+        pc = self.pc
+        first = int(pc[0])
+        if (pc == first).all():
+            # all lanes in lockstep
+            self._execute(first, slice(None))
+        else:
+            # regroup lanes by PC
+            order = np.argsort(pc, kind="stable")
+            sorted_pc = pc[order]
+            bounds = [0, *(np.flatnonzero(np.diff(sorted_pc)) + 1), self.lanes]
+            for start, end in zip(bounds, bounds[1:]):
+                self._execute(int(sorted_pc[start]), order[start:end])
+
+        self.cycle += 1
+
+    def group_count(self):
+        """Number of distinct PCs among the lanes, i.e. the number of vector
+        operations the next step needs"""
+        return len(np.unique(self.pc))
+
+    def _decode(self, address):
+        decoded = self._decoded.get(address)
+        if decoded is None:
+            word = self.rom[address] if address < len(self.rom) else 0
+            if not word & 0x8000:
+                decoded = (False, word, 0, 0)
+            else:
+                decoded = (True, (word >> 6) & 0x7F, (word >> 3) & 7, word & 7)
+            self._decoded[address] = decoded
+
+        return decoded
+
+    def _execute(self, address, lanes):
+        """Execute the instruction at ROM address on the selected lanes"""
+        is_c, code, dest, jump = self._decode(address)
+        next_pc = (address + 1) & _ADDRESS_MASK
+        if not is_c:
+            self.a[lanes] = code
+            self.pc[lanes] = next_pc
+            return
+
+        # copy, since A may be overwritten before it is used as the jump target
+        a = self.a[lanes].copy()
+        d = self.d[lanes]
+        uses_m = code & 0x40 or dest & DEST_M
+        if uses_m:
+            rows = self._lane_index[lanes]
+            m_address = a & _ADDRESS_MASK
+            y = self.ram[rows, m_address] if code & 0x40 else a
+        else:
+            y = a
+
+        out = _alu_lanes(d, y, code & 0x3F)
+
+        if dest & DEST_M:
+            self.ram[rows, m_address] = out
+        if dest & DEST_D:
+            self.d[lanes] = out
+        if dest & DEST_A:
+            self.a[lanes] = out
+
+        if jump == 0:
+            self.pc[lanes] = next_pc
+        elif jump == 7:
+            self.pc[lanes] = a & _ADDRESS_MASK
+        else:
+            if_zero, if_positive, if_negative = JUMP_TAKEN[jump]
+            negative = out >= 0x8000
+            zero = out == 0
+            taken = np.zeros(out.shape, dtype=bool)
+            if if_zero:
+                taken |= zero
+            if if_negative:
+                taken |= negative
+            if if_positive:
+                taken |= ~(zero | negative)
+            self.pc[lanes] = np.where(taken, a & _ADDRESS_MASK, next_pc)
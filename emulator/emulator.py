@@ -0,0 +1,857 @@
+"""Word-level emulator for the Hack computer.
+
+Executes Hack-machine code (.hack) directly on python ints rather than
+simulating every gate in cpu/. Each ROM word is decoded once into a tuple
+so the run loop only has to dispatch on pre-computed fields.
+"""
+
+import collections
+
+from assembler.parser import C_COMMAND_COMP
+
+RAM_SIZE = 2**15
+ROM_SIZE = 2**15
+
+# Memory map, matching the predefined SCREEN and KBD symbols
+SCREEN_ADDRESS = 16384
+KBD_ADDRESS = 24576
+SCREEN_WORDS_PER_ROW = 32
+SCREEN_ROWS = 256
+
+_WORD_MASK = 0xFFFF
+_ADDRESS_MASK = 0x7FFF
+
+# Idle loops are looked for every _IDLE_CHECK_CYCLES, by following the
+# program for up to _IDLE_PROBE_CYCLES without running it. Runs shorter than
+# _IDLE_MIN_CYCLES are not worth the look.
+_IDLE_CHECK_CYCLES = 2**16
+_IDLE_PROBE_CYCLES = 64
+_IDLE_MIN_CYCLES = 1024
+
+# dest bits (d1 d2 d3) of a C-instruction
+DEST_A = 4
+DEST_D = 2
+DEST_M = 1
+
+# Word-level equivalent of each comp mnemonic. Arguments are the D, A and M
+# registers as unsigned 16-bit ints.
+_COMP_MNEMONIC_FUNCTIONS = {
+    "0": lambda d, a, m: 0,
+    "1": lambda d, a, m: 1,
+    "-1": lambda d, a, m: 0xFFFF,
+    "D": lambda d, a, m: d,
+    "A": lambda d, a, m: a,
+    "!D": lambda d, a, m: d ^ 0xFFFF,
+    "!A": lambda d, a, m: a ^ 0xFFFF,
+    "-D": lambda d, a, m: -d & 0xFFFF,
+    "-A": lambda d, a, m: -a & 0xFFFF,
+    "D+1": lambda d, a, m: (d + 1) & 0xFFFF,
+    "A+1": lambda d, a, m: (a + 1) & 0xFFFF,
+    "D-1": lambda d, a, m: (d - 1) & 0xFFFF,
+    "A-1": lambda d, a, m: (a - 1) & 0xFFFF,
+    "D+A": lambda d, a, m: (d + a) & 0xFFFF,
+    "D-A": lambda d, a, m: (d - a) & 0xFFFF,
+    "A-D": lambda d, a, m: (a - d) & 0xFFFF,
+    "D&A": lambda d, a, m: d & a,
+    "D|A": lambda d, a, m: d | a,
+    "M": lambda d, a, m: m,
+    "!M": lambda d, a, m: m ^ 0xFFFF,
+    "-M": lambda d, a, m: -m & 0xFFFF,
+    "M+1": lambda d, a, m: (m + 1) & 0xFFFF,
+    "M-1": lambda d, a, m: (m - 1) & 0xFFFF,
+    "D+M": lambda d, a, m: (d + m) & 0xFFFF,
+    "D-M": lambda d, a, m: (d - m) & 0xFFFF,
+    "M-D": lambda d, a, m: (m - d) & 0xFFFF,
+    "D&M": lambda d, a, m: d & m,
+    "D|M": lambda d, a, m: d | m,
+}
+
+# 7-bit comp code (a c1..c6) mapped to its word-level function
+_COMP_FUNCTIONS = {
+    int(bits, 2): _COMP_MNEMONIC_FUNCTIONS[mnemonic]
+    for mnemonic, bits in C_COMMAND_COMP.items()
+}
+
+# For each jump code, whether the jump is taken when the ALU output is
+# zero (index 0), positive (1), or negative (2)
+JUMP_TAKEN = (
+    (False, False, False),  # null
+    (False, True, False),   # JGT
+    (True, False, False),   # JEQ
+    (True, True, False),    # JGE
+    (False, False, True),   # JLT
+    (False, True, True),    # JNE
+    (True, False, True),    # JLE
+    (True, True, True),     # JMP
+)
+
+
+def alu_word(x, y, zx, nx, zy, ny, f, no):
+    """Word-level version of cpu.alu.alu16 on unsigned 16-bit ints."""
+    if zx:
+        x = 0
+    if nx:
+        x ^= _WORD_MASK
+    if zy:
+        y = 0
+    if ny:
+        y ^= _WORD_MASK
+    out = (x + y) & _WORD_MASK if f else x & y
+    if no:
+        out ^= _WORD_MASK
+    return out
+
+
+def _generic_comp(code):
+    """Comp function for a code with no mnemonic, evaluated through the ALU
+    control bits as the hardware would."""
+    zx, nx, zy, ny, f, no = [(code >> shift) & 1 for shift in range(5, -1, -1)]
+    if code & 0x40:
+        return lambda d, a, m: alu_word(d, m, zx, nx, zy, ny, f, no)
+    return lambda d, a, m: alu_word(d, a, zx, nx, zy, ny, f, no)
+
+
+def decode(word):
+    """Decode one 16-bit instruction word.
+    :returns (comp, value, dest, jump, uses_m). comp is None for A-instructions,
+        in which case value is the constant to load into A.
+    """
+    if not word & 0x8000:
+        return None, word, 0, 0, False
+
+    code = (word >> 6) & 0x7F
+    comp = _COMP_FUNCTIONS.get(code)
+    if comp is None:
+        comp = _generic_comp(code)
+
+    dest = (word >> 3) & 7
+    jump = word & 7
+    uses_m = bool(code & 0x40) or bool(dest & DEST_M)
+    return comp, word, dest, jump, uses_m
+
+
+# Empty ROM reads as 0, which is the instruction @0
+_EMPTY_INSTRUCTION = decode(0)
+
+
+def _decode_rom(rom):
+    """Decoded instruction for every ROM address, padding with empty ROM"""
+    program = [decode(w) for w in rom]
+    program.extend([_EMPTY_INSTRUCTION]*(ROM_SIZE - len(program)))
+    return program
+
+
+def _write_hooked(comp, pc, callback):
+    """Wrap comp so callback sees the value the instruction at pc writes to M"""
+    def hooked(d, a, m):
+        out = comp(d, a, m)
+        callback(pc, a & _ADDRESS_MASK, out)
+        return out
+
+    return hooked
+
+
+# Why run() stopped early: at a breakpoint before the instruction at pc ran,
+# or at a watchpoint before the instruction at pc wrote value to address
+Hit = collections.namedtuple("Hit", "kind pc address value")
+
+
+class _HitException(Exception):
+    """Raised by instrumented instructions to leave the run loop"""
+
+    def __init__(self, hit):
+        super().__init__(hit)
+        self.hit = hit
+
+
+def _breakpoint(pc):
+    """Comp function that stops the run loop before the instruction at pc"""
+    def hit(d, a, m):
+        raise _HitException(Hit("breakpoint", pc, None, None))
+
+    return hit
+
+
+def _watched(comp, pure_comp, pc, watched):
+    """Wrap comp so the run loop stops before the instruction at pc writes to
+    an address flagged in watched. pure_comp computes the value it would
+    write, without calling any write hooks."""
+    def watch(d, a, m):
+        address = a & _ADDRESS_MASK
+        if watched[address]:
+            raise _HitException(Hit("watchpoint", pc, address, pure_comp(d, a, m)))
+        return comp(d, a, m)
+
+    return watch
+
+
+def _watched_range(start, end):
+    """(start, end) of the RAM addresses a watchpoint covers, end defaulting
+    to just start"""
+    if end is None:
+        end = start + 1
+    if not 0 <= start < end <= RAM_SIZE:
+        raise ValueError(f"Watchpoint range {start} to {end} is not within RAM of {RAM_SIZE} words")
+    return start, end
+
+
+def rom_from_hack(hack_string):
+    """Convert Hack-machine code text (one 16-bit binary word per line) to a
+    list of ints"""
+    return [int(line, 2) for line in hack_string.split()]
+
+
+class Emulator:
+    """Hack CPU with 32K ROM and 32K RAM, operating on words.
+
+    Writes to the screen memory map set a flag in dirty_rows for the screen
+    row they touch, so renderers can skip rows that did not change.
+
+    A program spinning in a loop that changes nothing, such as
+    (END) @END 0;JMP or a wait for a key, would spin the same way until the
+    keyboard changes. run() detects such idle loops and skips ahead to the
+    end of the run or the next scheduled key event, with the same registers,
+    RAM and cycle count as if every iteration had run. Idle loops are not
+    skipped while profiling or tracing, which must see every cycle.
+
+    Breakpoints and watchpoints are compiled into the decoded program: only
+    the instructions that can hit them are replaced, so the run loop costs
+    nothing more while none are set, and little elsewhere when they are.
+    """
+
+    def __init__(self, rom, ram=None):
+        if isinstance(rom, str):
+            rom = rom_from_hack(rom)
+
+        if len(rom) > ROM_SIZE:
+            raise ValueError(f"ROM image of {len(rom)} words exceeds {ROM_SIZE} words")
+
+        self.rom = list(rom)
+        # decoded ROM without instrumentation, and the program actually run
+        self._decoded = _decode_rom(self.rom)
+        self._program = list(self._decoded)
+        # the program without breakpoints and watchpoints, to run an
+        # instruction that hit one
+        self._unbroken = self._program
+        self._hooked = False
+
+        self._write_hooks = []
+        # rom address -> callback or None
+        self._breakpoints = {}
+        # (start, end, callback or None) of each watched range
+        self._watchpoints = []
+
+        # set to an emulator.profiler.Profiler to count executions per ROM address
+        self.profiler = None
+        # set to an emulator.memstats.MemoryStats to count reads and writes per RAM address
+        self.memory_stats = None
+        # set to an emulator.trace.TraceWriter to record every instruction executed
+        self.tracer = None
+        # set to False to run idle loops cycle by cycle
+        self.skip_idle = True
+        self.reset(ram)
+
+    def reset(self, ram=None):
+        """Return to the power-on state, keeping the decoded ROM.
+        :param ram: optional initial RAM contents, as accepted by load_ram()
+        """
+        self.ram = [0]*RAM_SIZE
+        self.a = 0
+        self.d = 0
+        self.pc = 0
+        self.cycle = 0
+        self.dirty_rows = bytearray(b"\x01"*SCREEN_ROWS)
+
+        # set by run(): whether the program is in an idle loop that no
+        # scheduled key event can end, and that loop's (first pc, cycles)
+        self.halted = False
+        self.idle_loop = None
+        # set by run() when it stopped at a breakpoint or watchpoint
+        self.hit = None
+
+        # scheduled (cycle, key) input events, sorted by cycle
+        self._key_events = collections.deque()
+        self.key_recording = None
+
+        if ram is not None:
+            self.load_ram(ram)
+
+    def load_ram(self, values, offset=0):
+        """Copy values into RAM starting at offset.
+        Accepts a sequence of words or a dict of address: word"""
+        if isinstance(values, dict):
+            items = values.items()
+        else:
+            items = enumerate(values, offset)
+
+        for address, value in items:
+            self.write(address, value)
+
+    def read(self, address):
+        return self.ram[address & _ADDRESS_MASK]
+
+    def write(self, address, value):
+        """Write a word to RAM outside of program execution, e.g. for setup"""
+        address &= _ADDRESS_MASK
+        self.ram[address] = value & _WORD_MASK
+        if SCREEN_ADDRESS <= address < KBD_ADDRESS:
+            self.dirty_rows[(address - SCREEN_ADDRESS) >> 5] = 1
+
+    def add_write_hook(self, callback):
+        """Call callback(pc, address, value) before every RAM write made by the
+        program. Only instructions that write M are instrumented, so other
+        instructions run at full speed."""
+        self._write_hooks.append(callback)
+        self._instrument()
+
+    def add_breakpoint(self, address, callback=None):
+        """Stop run() before the instruction at ROM address executes.
+        :param callback: optional callback(emulator), called at the breakpoint.
+            run() goes on if it returns a false value, so it may just log
+        """
+        self._breakpoints[address & _ADDRESS_MASK] = callback
+        self._instrument()
+
+    def remove_breakpoint(self, address):
+        del self._breakpoints[address & _ADDRESS_MASK]
+        self._instrument()
+
+    def add_watchpoint(self, start, end=None, callback=None):
+        """Stop run() before the program writes to a RAM address from start up
+        to end (just start if end is None). The write has not happened yet:
+        RAM holds the old value and hit.value the new one.
+        :param callback: optional callback(emulator, address, value), called at
+            the watchpoint. run() goes on if it returns a false value
+        :raises ValueError if the range is empty or outside RAM
+        """
+        self._watchpoints.append((*_watched_range(start, end), callback))
+        self._instrument()
+
+    def remove_watchpoint(self, start, end=None):
+        start, end = _watched_range(start, end)
+        self._watchpoints = [w for w in self._watchpoints if w[:2] != (start, end)]
+        self._instrument()
+
+    def clear_hooks(self):
+        """Remove all instrumentation added to the decoded program: write
+        hooks, breakpoints and watchpoints"""
+        self._write_hooks = []
+        self._breakpoints = {}
+        self._watchpoints = []
+        self._instrument()
+
+    def _instrument(self):
+        """Rebuild the program run from the decoded ROM and its instrumentation"""
+        program = list(self._decoded)
+        for callback in self._write_hooks:
+            for pc, (comp, value, dest, jump, uses_m) in enumerate(program):
+                if comp is not None and dest & DEST_M:
+                    program[pc] = (_write_hooked(comp, pc, callback), value, dest, jump, uses_m)
+        self._unbroken = program
+
+        if self._watchpoints or self._breakpoints:
+            program = list(program)
+
+        if self._watchpoints:
+            watched = bytearray(RAM_SIZE)
+            for start, end, _ in self._watchpoints:
+                watched[start:end] = b"\x01"*(end - start)
+            for pc, (comp, value, dest, jump, uses_m) in enumerate(program):
+                if comp is not None and dest & DEST_M:
+                    watch = _watched(comp, self._decoded[pc][0], pc, watched)
+                    program[pc] = (watch, value, dest, jump, uses_m)
+
+        for pc in self._breakpoints:
+            _, value, dest, jump, uses_m = program[pc]
+            program[pc] = (_breakpoint(pc), value, dest, jump, uses_m)
+
+        self._program = program
+        # idle loops are found on the decoded ROM, so must not be skipped
+        # past instrumentation that has to see every write
+        self._hooked = bool(self._write_hooks or self._watchpoints)
+
+    def set_key(self, key):
+        """Set the key currently pressed (0 for none) in the KBD register.
+        The change is logged to key_recording if recording is active."""
+        self.ram[KBD_ADDRESS] = key
+        if self.key_recording is not None:
+            self.key_recording.add(self.cycle, key)
+
+    def start_recording(self):
+        """Record all set_key() calls from now on.
+        :returns the KeyboardTrace that events are recorded into
+        """
+        from emulator.keyboard import KeyboardTrace
+
+        self.key_recording = KeyboardTrace()
+        return self.key_recording
+
+    def stop_recording(self):
+        trace = self.key_recording
+        self.key_recording = None
+        return trace
+
+    def replay(self, trace):
+        """Schedule every event of a KeyboardTrace to be applied to KBD when
+        the emulator reaches its cycle. Events already in the past are applied
+        at the start of the next run(). Events on the same cycle are applied
+        in the order they were scheduled."""
+        events = sorted(list(self._key_events) + list(trace.events), key=lambda event: event[0])
+        self._key_events = collections.deque(events)
+
+    def step(self):
+        """Execute a single instruction"""
+        self.run(1)
+
+    def block_length(self):
+        """Number of instructions from pc that run() executes as one unit
+        when given the cycles: a single instruction here"""
+        return 1
+
+    def run(self, cycles, until_halt=False):
+        """Execute cycles instructions, applying scheduled key events at
+        their cycle. The program runs in slices between events, so replay
+        adds no per-instruction cost.
+        :param until_halt: stop early once the program halts, i.e. is found
+            in an idle loop with no key events left to end it
+        :returns number of instructions executed
+        """
+        start = self.cycle
+        end = start + cycles
+        events = self._key_events
+        self.halted = False
+        self.idle_loop = None
+        # run the instruction a breakpoint or watchpoint stopped the last run
+        # at, rather than stopping there again
+        resume = self.hit is not None and self.hit.pc == self.pc
+        self.hit = None
+        while True:
+            while events and events[0][0] <= self.cycle:
+                _, key = events.popleft()
+                self.set_key(key)
+
+            if self.cycle >= end:
+                break
+
+            stop = end
+            if events and events[0][0] < stop:
+                stop = events[0][0]
+            try:
+                if resume:
+                    resume = False
+                    self._execute_unbroken()
+                    continue
+
+                self._execute_slice(stop - self.cycle, until_halt and not events)
+                if self.halted and until_halt:
+                    break
+            except _HitException as e:
+                if not self._stops_at(e.hit):
+                    resume = True
+                    continue
+                self.hit = e.hit
+                break
+
+        return self.cycle - start
+
+    def _execute_slice(self, cycles, stop_on_halt):
+        if self.tracer is not None:
+            self._execute_traced(cycles)
+        elif self.profiler is not None:
+            self._execute_profiled(cycles)
+        elif self.memory_stats is not None:
+            self._execute_sampling_memory(cycles, stop_on_halt)
+        elif self.skip_idle:
+            self._execute_skipping_idle(cycles, stop_on_halt)
+        else:
+            self._execute(cycles)
+
+    def _execute_unbroken(self):
+        """Execute the instruction at pc without its breakpoint or watchpoint"""
+        pc = self.pc
+        instrumented = self._program[pc]
+        self._program[pc] = self._unbroken[pc]
+        try:
+            self._execute_slice(1, False)
+        finally:
+            self._program[pc] = instrumented
+
+    def _stops_at(self, hit):
+        """Call the callbacks of a breakpoint or watchpoint hit
+        :returns True if run() should stop there
+        """
+        if hit.kind == "breakpoint":
+            callbacks = [self._breakpoints[hit.pc]]
+        else:
+            callbacks = [callback for start, end, callback in self._watchpoints if start <= hit.address < end]
+
+        stop = False
+        for callback in callbacks:
+            if callback is None:
+                stop = True
+            elif hit.kind == "breakpoint":
+                stop = callback(self) or stop
+            else:
+                stop = callback(self, hit.address, hit.value) or stop
+        return bool(stop)
+
+    def _execute_skipping_idle(self, cycles, stop_on_halt):
+        """Execute cycles instructions, skipping the rest once the program is
+        in an idle loop
+        :param stop_on_halt: return as soon as an idle loop is found instead
+        """
+        remaining = cycles
+        while remaining:
+            idle = self._find_idle_loop() if remaining >= _IDLE_MIN_CYCLES else None
+            if idle is not None:
+                lead, period = idle
+                self._execute(lead)
+                remaining -= lead
+                self.idle_loop = (self.pc, period)
+                self.halted = not self._key_events
+                if stop_on_halt:
+                    return
+
+                # every period cycles brings back the same state
+                skipped = remaining - remaining % period
+                self.cycle += skipped
+                self._execute(remaining - skipped)
+                return
+
+            n = min(remaining, _IDLE_CHECK_CYCLES)
+            self._execute(n)
+            remaining -= n
+
+    def _find_idle_loop(self):
+        """Follow the program from the current state, without running it, for
+        up to _IDLE_PROBE_CYCLES, looking for an idle loop: a state of pc, A
+        and D that comes back with nothing written in between except words
+        equal to what RAM already holds. Only the keyboard can then end it.
+        :returns (cycles before the loop, cycles per iteration) or None
+        """
+        program = self._decoded
+        ram = self.ram
+        jump_taken = JUMP_TAKEN
+        hooked = self._hooked
+        breakpoints = self._breakpoints
+        a = self.a
+        d = self.d
+        pc = self.pc
+        seen = {}
+
+        for step in range(_IDLE_PROBE_CYCLES):
+            state = (pc, a, d)
+            if state in seen:
+                return seen[state], step - seen[state]
+            if pc in breakpoints:
+                return None
+            seen[state] = step
+
+            comp, value, dest, jump, uses_m = program[pc]
+            if comp is None:
+                a = value
+                pc = (pc + 1) & _ADDRESS_MASK
+                continue
+
+            if uses_m:
+                address = a & _ADDRESS_MASK
+                out = comp(d, a, ram[address])
+            else:
+                out = comp(d, a, 0)
+
+            target = a
+            if dest:
+                # a write hook would see even a write that changes nothing
+                if dest & DEST_M and (hooked or ram[address] != out):
+                    return None
+                if dest & DEST_D:
+                    d = out
+                if dest & DEST_A:
+                    a = out
+
+            if jump and jump_taken[jump][0 if out == 0 else (2 if out & 0x8000 else 1)]:
+                pc = target & _ADDRESS_MASK
+            else:
+                pc = (pc + 1) & _ADDRESS_MASK
+
+        return None
+
+    def _execute(self, cycles):
+        """Execute exactly cycles instructions"""
+        program = self._program
+        ram = self.ram
+        dirty_rows = self.dirty_rows
+        jump_taken = JUMP_TAKEN
+        a = self.a
+        d = self.d
+        pc = self.pc
+
+        try:
+            for executed in range(cycles):
+                comp, value, dest, jump, uses_m = program[pc]
+                if comp is None:
+                    a = value
+                    pc = (pc + 1) & _ADDRESS_MASK
+                    continue
+
+                if uses_m:
+                    address = a & _ADDRESS_MASK
+                    out = comp(d, a, ram[address])
+                else:
+                    out = comp(d, a, 0)
+
+                target = a
+                if dest:
+                    if dest & DEST_M:
+                        ram[address] = out
+                        if SCREEN_ADDRESS <= address < KBD_ADDRESS:
+                            dirty_rows[(address - SCREEN_ADDRESS) >> 5] = 1
+                    if dest & DEST_D:
+                        d = out
+                    if dest & DEST_A:
+                        a = out
+
+                if jump and jump_taken[jump][0 if out == 0 else (2 if out & 0x8000 else 1)]:
+                    pc = target & _ADDRESS_MASK
+                else:
+                    pc = (pc + 1) & _ADDRESS_MASK
+        except _HitException:
+            # the instruction that hit did not run
+            cycles = executed
+            raise
+        finally:
+            self.a = a
+            self.d = d
+            self.pc = pc
+            self.cycle += cycles
+
+    def _execute_profiled(self, cycles):
+        """_execute(), counting each instruction in the profiler"""
+        counts = self.profiler.counts
+        program = self._program
+        ram = self.ram
+        dirty_rows = self.dirty_rows
+        jump_taken = JUMP_TAKEN
+        a = self.a
+        d = self.d
+        pc = self.pc
+
+        try:
+            for executed in range(cycles):
+                counts[pc] += 1
+                comp, value, dest, jump, uses_m = program[pc]
+                if comp is None:
+                    a = value
+                    pc = (pc + 1) & _ADDRESS_MASK
+                    continue
+
+                if uses_m:
+                    address = a & _ADDRESS_MASK
+                    out = comp(d, a, ram[address])
+                else:
+                    out = comp(d, a, 0)
+
+                target = a
+                if dest:
+                    if dest & DEST_M:
+                        ram[address] = out
+                        if SCREEN_ADDRESS <= address < KBD_ADDRESS:
+                            dirty_rows[(address - SCREEN_ADDRESS) >> 5] = 1
+                    if dest & DEST_D:
+                        d = out
+                    if dest & DEST_A:
+                        a = out
+
+                if jump and jump_taken[jump][0 if out == 0 else (2 if out & 0x8000 else 1)]:
+                    pc = target & _ADDRESS_MASK
+                else:
+                    pc = (pc + 1) & _ADDRESS_MASK
+        except _HitException:
+            # the instruction that hit was counted but did not run
+            counts[pc] -= 1
+            cycles = executed
+            raise
+        finally:
+            self.a = a
+            self.d = d
+            self.pc = pc
+            self.cycle += cycles
+
+    def _execute_sampling_memory(self, cycles, stop_on_halt):
+        """Execute cycles instructions, counting memory accesses in the
+        cycles the memory stats sample and running the rest at full speed,
+        skipping idle loops there if skip_idle is set
+        :param stop_on_halt: return as soon as an idle loop is found instead
+        """
+        stats = self.memory_stats
+        period = stats.period
+        remaining = cycles
+        while remaining:
+            if period is None:
+                counted, n = True, remaining
+            else:
+                phase = self.cycle % period
+                if phase < stats.window:
+                    counted, n = True, min(remaining, stats.window - phase)
+                else:
+                    counted, n = False, min(remaining, period - phase)
+
+            if counted:
+                start = self.cycle
+                try:
+                    self._execute_counting_memory(n)
+                finally:
+                    stats.cycles += self.cycle - start
+            else:
+                start = self.cycle
+                try:
+                    if self.skip_idle:
+                        self._execute_skipping_idle(n, stop_on_halt)
+                    else:
+                        self._execute(n)
+                finally:
+                    stats.skipped_cycles += self.cycle - start
+                if self.halted and stop_on_halt:
+                    return
+            remaining -= n
+
+    def _execute_counting_memory(self, cycles):
+        """_execute(), counting the reads and writes of M in the memory stats"""
+        reads = self.memory_stats.reads
+        writes = self.memory_stats.writes
+        program = self._program
+        ram = self.ram
+        dirty_rows = self.dirty_rows
+        jump_taken = JUMP_TAKEN
+        a = self.a
+        d = self.d
+        pc = self.pc
+
+        try:
+            for executed in range(cycles):
+                comp, value, dest, jump, uses_m = program[pc]
+                if comp is None:
+                    a = value
+                    pc = (pc + 1) & _ADDRESS_MASK
+                    continue
+
+                if uses_m:
+                    address = a & _ADDRESS_MASK
+                    # the a-bit of the instruction selects M as ALU input
+                    if value & 0x1000:
+                        reads[address] += 1
+                    out = comp(d, a, ram[address])
+                else:
+                    out = comp(d, a, 0)
+
+                target = a
+                if dest:
+                    if dest & DEST_M:
+                        writes[address] += 1
+                        ram[address] = out
+                        if SCREEN_ADDRESS <= address < KBD_ADDRESS:
+                            dirty_rows[(address - SCREEN_ADDRESS) >> 5] = 1
+                    if dest & DEST_D:
+                        d = out
+                    if dest & DEST_A:
+                        a = out
+
+                if jump and jump_taken[jump][0 if out == 0 else (2 if out & 0x8000 else 1)]:
+                    pc = target & _ADDRESS_MASK
+                else:
+                    pc = (pc + 1) & _ADDRESS_MASK
+        except _HitException:
+            # the instruction that hit did not run, but its read was counted
+            comp, value, dest, jump, uses_m = program[pc]
+            if comp is not None and uses_m and value & 0x1000:
+                reads[a & _ADDRESS_MASK] -= 1
+            cycles = executed
+            raise
+        finally:
+            self.a = a
+            self.d = d
+            self.pc = pc
+            self.cycle += cycles
+
+    def _execute_traced(self, cycles):
+        """_execute(), recording each instruction in the tracer, and counting
+        it in the profiler if there is one"""
+        from emulator.trace import NO_WRITE, RECORD_WORDS
+
+        tracer = self.tracer
+        tracer.begin(self.cycle)
+        buffer = tracer.buffer
+        counts = None if self.profiler is None else self.profiler.counts
+        program = self._program
+        ram = self.ram
+        dirty_rows = self.dirty_rows
+        jump_taken = JUMP_TAKEN
+        a = self.a
+        d = self.d
+        pc = self.pc
+
+        remaining = cycles
+        try:
+            while remaining:
+                # fill the buffer up to the end of the block, then hand it over
+                n = min(remaining, tracer.block_records - tracer.count)
+                i = tracer.count*RECORD_WORDS
+                for _ in range(n):
+                    if counts is not None:
+                        counts[pc] += 1
+                    buffer[i] = pc
+                    comp, value, dest, jump, uses_m = program[pc]
+                    if comp is None:
+                        a = value
+                        pc = (pc + 1) & _ADDRESS_MASK
+                        buffer[i + 1] = a
+                        buffer[i + 2] = d
+                        buffer[i + 3] = NO_WRITE
+                        buffer[i + 4] = 0
+                        i += RECORD_WORDS
+                        continue
+
+                    if uses_m:
+                        address = a & _ADDRESS_MASK
+                        out = comp(d, a, ram[address])
+                    else:
+                        out = comp(d, a, 0)
+
+                    target = a
+                    buffer[i + 3] = NO_WRITE
+                    buffer[i + 4] = 0
+                    if dest:
+                        if dest & DEST_M:
+                            ram[address] = out
+                            if SCREEN_ADDRESS <= address < KBD_ADDRESS:
+                                dirty_rows[(address - SCREEN_ADDRESS) >> 5] = 1
+                            buffer[i + 3] = address
+                            buffer[i + 4] = out
+                        if dest & DEST_D:
+                            d = out
+                        if dest & DEST_A:
+                            a = out
+                    buffer[i + 1] = a
+                    buffer[i + 2] = d
+                    i += RECORD_WORDS
+
+                    if jump and jump_taken[jump][0 if out == 0 else (2 if out & 0x8000 else 1)]:
+                        pc = target & _ADDRESS_MASK
+                    else:
+                        pc = (pc + 1) & _ADDRESS_MASK
+
+                tracer.count += n
+                remaining -= n
+                if tracer.count == tracer.block_records:
+                    tracer.flush()
+        except _HitException:
+            # keep the records of the instructions before the one that hit
+            done = i//RECORD_WORDS - tracer.count
+            tracer.count += done
+            remaining -= done
+            raise
+        finally:
+            self.a = a
+            self.d = d
+            self.pc = pc
+            self.cycle += cycles - remaining
@@ -0,0 +1,145 @@
+"""Run many independent emulator jobs across all cores.
+
+Each job is a ROM, an initial RAM, a cycle budget and a list of probe
+addresses to read back once the budget is spent. Jobs run on a
+ProcessPoolExecutor. Every distinct ROM is copied once into a shared
+memory block; jobs only carry the block's name, and each worker decodes a
+ROM the first time it sees it and reuses the decoded program afterwards.
+"""
+
+import array
+import collections
+import concurrent.futures
+import os
+import time
+from multiprocessing import shared_memory
+
+from emulator.emulator import Emulator, rom_from_hack
+
+FarmJob = collections.namedtuple("FarmJob", ["rom", "ram", "cycles", "probes"])
+FarmJob.__doc__ = """One emulator run.
+rom: list of instruction words or Hack-machine code text
+ram: initial RAM as a dict of address: word or a sequence loaded at address 0, or None
+cycles: number of instructions to execute
+probes: RAM addresses to report after the run
+"""
+
+FarmResult = collections.namedtuple("FarmResult", ["index", "probes", "a", "d", "pc", "cycles", "seconds"])
+FarmResult.__doc__ = """Outcome of a FarmJob.
+index: position of the job in the submitted sequence
+probes: dict of probe address: final word
+seconds: time spent emulating in the worker
+"""
+
+# Per-worker cache of shared ROM name -> Emulator with that ROM decoded
+_worker_emulators = {}
+
+
+def _attach_rom(name, length):
+    """Copy a ROM out of a shared memory block created by the farm"""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        rom = array.array("H")
+        rom.frombytes(bytes(block.buf[:2*length]))
+    finally:
+        block.close()
+
+    return rom.tolist()
+
+
+def _run_job(index, rom_name, rom_length, ram, cycles, probes):
+    emu = _worker_emulators.get(rom_name)
+    if emu is None:
+        emu = Emulator(_attach_rom(rom_name, rom_length))
+        # every cycle of the budget is executed, so instructions per second
+        # measure emulation rather than skipped idle loops
+        emu.skip_idle = False
+        _worker_emulators[rom_name] = emu
+
+    emu.reset(ram)
+    start = time.perf_counter()
+    emu.run(cycles)
+    seconds = time.perf_counter() - start
+
+    values = {address: emu.read(address) for address in probes}
+    return FarmResult(index, values, emu.a, emu.d, emu.pc, cycles, seconds)
+
+
+class EmulatorFarm:
+    """Distribute FarmJobs over a pool of worker processes.
+
+    Use as a context manager so the pool and shared ROM blocks are released:
+
+        with EmulatorFarm() as farm:
+            for result in farm.run(jobs):
+                ...
+            print(farm.instructions_per_second())
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+
+        # ROM contents -> shared memory block holding it
+        self._roms = {}
+
+        self.total_instructions = 0
+        self.worker_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+        for block in self._roms.values():
+            block.close()
+            block.unlink()
+        self._roms.clear()
+
+    def _share_rom(self, rom):
+        if isinstance(rom, str):
+            rom = rom_from_hack(rom)
+
+        key = tuple(rom)
+        block = self._roms.get(key)
+        if block is None:
+            words = array.array("H", key)
+            block = shared_memory.SharedMemory(create=True, size=max(1, len(words)*2))
+            block.buf[:len(words)*2] = words.tobytes()
+            self._roms[key] = block
+
+        return block.name, len(key)
+
+    def run(self, jobs):
+        """Submit jobs and yield a FarmResult for each as soon as it completes.
+        Results arrive in completion order; use FarmResult.index to match them
+        to jobs.
+        """
+        start = time.perf_counter()
+        futures = []
+        for i, job in enumerate(jobs):
+            name, length = self._share_rom(job.rom)
+            futures.append(self._executor.submit(
+                _run_job, i, name, length, job.ram, job.cycles, list(job.probes)))
+
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                self.total_instructions += result.cycles
+                self.worker_seconds += result.seconds
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+            self.wall_seconds += time.perf_counter() - start
+
+    def instructions_per_second(self):
+        """Aggregate emulated instructions per wall-clock second across all
+        workers, over every run() so far"""
+        if self.wall_seconds == 0:
+            return 0.0
+        return self.total_instructions/self.wall_seconds
@@ -0,0 +1,218 @@
+"""Emulator that compiles Hack-machine code into Python functions.
+
+Each basic block, the straight run of instructions from a jump target up to
+and including the next jump, is translated once into the source of a
+Python function and compiled with exec(). Within a block, a value loaded
+into A by an A-instruction is known at compile time, so it is folded into
+memory addresses, comp expressions, screen row marking and jump targets
+instead of being computed at run time:
+
+    @counter        def block_4(ram, dirty_rows, a, d):
+    D=M                 d = ram[16]
+    @0                  d = (d - ram[0]) & 65535
+    D=D-M       -->     out = d
+    @END                return 18, d, (18 if out < 32768 else 10)
+    D;JGE
+
+JitEmulator behaves exactly like Emulator. A block only runs whole, so
+the last few cycles of a run that end inside a block are interpreted;
+instrumented programs (write hooks, breakpoints, watchpoints) are always
+interpreted.
+"""
+from assembler.parser import C_COMMAND_COMP
+from emulator.emulator import (
+    DEST_A, DEST_D, DEST_M, Emulator, KBD_ADDRESS, ROM_SIZE, SCREEN_ADDRESS, alu_word)
+
+_ADDRESS_MASK = 0x7FFF
+
+# longest block compiled, so a long straight run of code compiles in pieces
+_MAX_BLOCK_LENGTH = 256
+
+# Python expression of each comp mnemonic, in terms of the D, A and M
+# operands as unsigned 16-bit ints
+_COMP_MNEMONIC_EXPRESSIONS = {
+    "0": "0",
+    "1": "1",
+    "-1": "65535",
+    "D": "{d}",
+    "A": "{a}",
+    "!D": "{d} ^ 65535",
+    "!A": "{a} ^ 65535",
+    "-D": "-{d} & 65535",
+    "-A": "-{a} & 65535",
+    "D+1": "({d} + 1) & 65535",
+    "A+1": "({a} + 1) & 65535",
+    "D-1": "({d} - 1) & 65535",
+    "A-1": "({a} - 1) & 65535",
+    "D+A": "({d} + {a}) & 65535",
+    "D-A": "({d} - {a}) & 65535",
+    "A-D": "({a} - {d}) & 65535",
+    "D&A": "{d} & {a}",
+    "D|A": "{d} | {a}",
+    "M": "{m}",
+    "!M": "{m} ^ 65535",
+    "-M": "-{m} & 65535",
+    "M+1": "({m} + 1) & 65535",
+    "M-1": "({m} - 1) & 65535",
+    "D+M": "({d} + {m}) & 65535",
+    "D-M": "({d} - {m}) & 65535",
+    "M-D": "({m} - {d}) & 65535",
+    "D&M": "{d} & {m}",
+    "D|M": "{d} | {m}",
+}
+
+# 7-bit comp code (a c1..c6) mapped to its expression
+_COMP_EXPRESSIONS = {
+    int(bits, 2): _COMP_MNEMONIC_EXPRESSIONS[mnemonic]
+    for mnemonic, bits in C_COMMAND_COMP.items()
+}
+
+# condition on the ALU output under which each jump code is taken
+_JUMP_CONDITIONS = (
+    None,                       # null
+    "0 < out < 32768",          # JGT
+    "out == 0",                 # JEQ
+    "out < 32768",              # JGE
+    "out >= 32768",             # JLT
+    "out != 0",                 # JNE
+    "out == 0 or out >= 32768",  # JLE
+    "True",                     # JMP
+)
+
+
+def _comp_expression(code):
+    expression = _COMP_EXPRESSIONS.get(code)
+    if expression is None:
+        # no mnemonic: evaluate through the ALU control bits
+        zx, nx, zy, ny, f, no = [(code >> shift) & 1 for shift in range(5, -1, -1)]
+        y = "{m}" if code & 0x40 else "{a}"
+        expression = f"alu_word({{d}}, {y}, {zx}, {nx}, {zy}, {ny}, {f}, {no})"
+    return expression
+
+
+def compile_block(rom, start):
+    """Python source of the function running the basic block at start
+    :returns (source, number of instructions in the block)
+    """
+    lines = [f"def block_{start}(ram, dirty_rows, a, d):"]
+    # value of A when known at compile time, else None and A is in a
+    known_a = None
+    pc = start
+    length = 0
+    while True:
+        word = rom[pc] if pc < len(rom) else 0
+        length += 1
+        next_pc = (pc + 1) & _ADDRESS_MASK
+
+        if not word & 0x8000:
+            known_a = word
+        else:
+            code = (word >> 6) & 0x7F
+            dest = (word >> 3) & 7
+            jump = word & 7
+            uses_m = bool(code & 0x40) or bool(dest & DEST_M)
+
+            if known_a is None:
+                a = "a"
+                address = "address"
+                target = "a & 32767"
+                if uses_m:
+                    lines.append("    address = a & 32767")
+            else:
+                a = str(known_a)
+                address = str(known_a & _ADDRESS_MASK)
+                target = address
+
+            expression = _comp_expression(code).format(d="d", a=a, m=f"ram[{address}]")
+            if jump or dest not in (0, DEST_A, DEST_D, DEST_M):
+                # the ALU output goes to several places
+                lines.append(f"    out = {expression}")
+                expression = "out"
+            if dest & DEST_M:
+                lines.append(f"    ram[{address}] = {expression}")
+                if known_a is None:
+                    lines.append(f"    if {SCREEN_ADDRESS} <= address < {KBD_ADDRESS}:")
+                    lines.append(f"        dirty_rows[(address - {SCREEN_ADDRESS}) >> 5] = 1")
+                elif SCREEN_ADDRESS <= int(address) < KBD_ADDRESS:
+                    lines.append(f"    dirty_rows[{(int(address) - SCREEN_ADDRESS) >> 5}] = 1")
+            if dest & DEST_D:
+                lines.append(f"    d = {expression}")
+            if dest & DEST_A:
+                if jump and known_a is None:
+                    # the jump goes to A as it was before this instruction
+                    lines.append("    target = a & 32767")
+                    target = "target"
+                lines.append(f"    a = {expression}")
+                known_a = None
+
+            if jump:
+                a = "a" if known_a is None else str(known_a)
+                condition = _JUMP_CONDITIONS[jump]
+                if condition == "True":
+                    lines.append(f"    return {a}, d, {target}")
+                else:
+                    lines.append(f"    return {a}, d, ({target} if {condition} else {next_pc})")
+                return "\n".join(lines) + "\n", length
+
+        if length == _MAX_BLOCK_LENGTH or next_pc == 0:
+            a = "a" if known_a is None else str(known_a)
+            lines.append(f"    return {a}, d, {next_pc}")
+            return "\n".join(lines) + "\n", length
+        pc = next_pc
+
+
+class JitEmulator(Emulator):
+    """Emulator running compiled basic blocks. Blocks are compiled on first
+    execution and kept for the life of the emulator."""
+
+    def __init__(self, rom, ram=None):
+        super().__init__(rom, ram)
+        # rom address -> (function, length) of the block starting there
+        self._blocks = [None]*ROM_SIZE
+
+    def _compile(self, start):
+        source, length = compile_block(self.rom, start)
+        namespace = {"alu_word": alu_word}
+        exec(source, namespace)
+        return namespace[f"block_{start}"], length
+
+    def block_length(self):
+        """Number of instructions in the compiled block at pc, or 1 if the
+        program is interpreted"""
+        if self._hooked or self._breakpoints:
+            return 1
+        block = self._blocks[self.pc]
+        if block is None:
+            block = self._blocks[self.pc] = self._compile(self.pc)
+        return block[1]
+
+    def _execute(self, cycles):
+        """Execute exactly cycles instructions"""
+        if self._hooked or self._breakpoints:
+            super()._execute(cycles)
+            return
+
+        blocks = self._blocks
+        ram = self.ram
+        dirty_rows = self.dirty_rows
+        a = self.a
+        d = self.d
+        pc = self.pc
+
+        remaining = cycles
+        while remaining:
+            block = blocks[pc]
+            if block is None:
+                block = blocks[pc] = self._compile(pc)
+            function, length = block
+            if length > remaining:
+                break
+            a, d, pc = function(ram, dirty_rows, a, d)
+            remaining -= length
+
+        self.a = a
+        self.d = d
+        self.pc = pc
+        self.cycle += cycles - remaining
+        if remaining:
+            super()._execute(remaining)
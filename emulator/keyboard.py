@@ -0,0 +1,104 @@
+"""Keyboard input traces for reproducible emulator runs.
+
+A trace is a list of (cycle, key) events: when the emulator reaches cycle,
+the KBD register is set to key (0 releases all keys). Traces are stored as
+text, one event per line:
+
+    # comment
+    <cycle> <key>
+
+Key codes follow the Hack keyboard map, e.g. 65 for 'A', 130 for left arrow.
+"""
+
+# Hack key codes for the non-printable keys
+KEY_NEWLINE = 128
+KEY_BACKSPACE = 129
+KEY_LEFT = 130
+KEY_UP = 131
+KEY_RIGHT = 132
+KEY_DOWN = 133
+KEY_HOME = 134
+KEY_END = 135
+KEY_PAGE_UP = 136
+KEY_PAGE_DOWN = 137
+KEY_INSERT = 138
+KEY_DELETE = 139
+KEY_ESC = 140
+
+_TRACE_HEADER = "# hack keyboard trace"
+
+
+class KeyboardTrace:
+    """Ordered list of (cycle, key) events"""
+
+    def __init__(self, events=None):
+        self.events = []
+        if events is not None:
+            for cycle, key in events:
+                self.add(cycle, key)
+
+    def add(self, cycle, key):
+        """Append an event. Events must be added in cycle order"""
+        if cycle < 0:
+            raise ValueError(f"Negative cycle in keyboard trace: {cycle}")
+        if not 0 <= key < 2**16:
+            raise ValueError(f"Key code {key} is not a 16-bit word")
+        if self.events and cycle < self.events[-1][0]:
+            raise ValueError(
+                f"Keyboard event at cycle {cycle} is before previous event at cycle {self.events[-1][0]}")
+
+        self.events.append((cycle, key))
+
+    def __len__(self):
+        return len(self.events)
+
+    def __eq__(self, other):
+        return isinstance(other, KeyboardTrace) and self.events == other.events
+
+    def dumps(self):
+        lines = [_TRACE_HEADER]
+        for cycle, key in self.events:
+            lines.append(f"{cycle} {key}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, filename):
+        with open(filename, "w") as f:
+            f.write(self.dumps())
+
+
+def loads(trace_string):
+    """Parse a keyboard trace from its text format"""
+    trace = KeyboardTrace()
+    for i, line in enumerate(trace_string.splitlines()):
+        comment = line.find("#")
+        if comment != -1:
+            line = line[:comment]
+
+        fields = line.split()
+        if not fields:
+            continue
+
+        if len(fields) != 2 or not fields[0].isdigit() or not fields[1].isdigit():
+            raise SyntaxError(f"Invalid keyboard event on line {i}: {line.strip()}")
+
+        trace.add(int(fields[0]), int(fields[1]))
+
+    return trace
+
+
+def load(filename):
+    with open(filename, "r") as f:
+        return loads(f.read())
+
+
+def key_presses(presses):
+    """Build a trace from (cycle, key, duration) presses, releasing each key
+    after duration cycles. Presses are taken in cycle order, so on the same
+    cycle a release comes before the press of a later key, and a press
+    before its own release"""
+    events = []
+    for cycle, key, duration in sorted(presses, key=lambda press: press[0]):
+        events.append((cycle, key))
+        events.append((cycle + duration, 0))
+
+    return KeyboardTrace(sorted(events, key=lambda event: event[0]))
@@ -0,0 +1,149 @@
+"""Memory access statistics for the Hack emulator and NRAM.
+
+Counts reads and writes of each RAM address. Attach one to an emulator or
+an NRAM to enable it; without one they run as before and pay nothing:
+
+    emu.memory_stats = MemoryStats(period=2**16)
+    emu.run(10000000)
+    print(emu.memory_stats.report())
+
+The emulator counts the reads and writes instructions make of M. An NRAM
+counts what its buses do: Computer reads the word at A on every cycle, as
+the hardware does, whether or not the instruction uses it.
+
+Counted cycles are interpreted, a third slower than Emulator alone and
+two to three times slower than JitEmulator. For long runs, give a period:
+only the first window cycles of every period are counted, and the rest
+run at full speed, skipping idle loops as the emulator otherwise would.
+Counts are then a sample, which scale() turns into estimates for the
+whole run.
+
+Counts are aggregated into pages of page_size addresses for heatmaps, and
+exported as CSV or NumPy arrays.
+"""
+from emulator.emulator import KBD_ADDRESS, RAM_SIZE, SCREEN_ADDRESS
+
+# cycles counted at the start of every period when sampling
+_DEFAULT_WINDOW = 1024
+
+_DEFAULT_PAGE_SIZE = 256
+
+# heatmap shades, from pages not accessed to the busiest
+_SHADES = " .:-=+*#%@"
+_HEATMAP_COLUMNS = 32
+
+
+class MemoryStats:
+    def __init__(self, size=RAM_SIZE, period=None, window=_DEFAULT_WINDOW):
+        """:param size: number of addresses counted
+        :param period: count only the first window cycles of every period
+            cycles, or every cycle if None. Only the emulator samples; an
+            NRAM counts every access
+        """
+        if period is not None and not 0 < window <= period:
+            raise ValueError(f"Window of {window} cycles does not fit a period of {period}")
+
+        self.size = size
+        self.period = period
+        self.window = window
+        self.clear()
+
+    def clear(self):
+        self.reads = [0]*self.size
+        self.writes = [0]*self.size
+        # cycles whose accesses were counted, and cycles run without counting
+        self.cycles = 0
+        self.skipped_cycles = 0
+
+    def scale(self):
+        """Factor from counts to estimated accesses over the whole run"""
+        if not self.cycles:
+            return 1
+        return (self.cycles + self.skipped_cycles)/self.cycles
+
+    def total_reads(self):
+        return sum(self.reads)
+
+    def total_writes(self):
+        return sum(self.writes)
+
+    def pages(self, page_size=_DEFAULT_PAGE_SIZE):
+        """Accesses of each page of page_size addresses.
+        :returns list of (first address, reads, writes), one for every page
+        """
+        return [(start, sum(self.reads[start:start + page_size]), sum(self.writes[start:start + page_size]))
+                for start in range(0, self.size, page_size)]
+
+    def hottest(self, limit=None):
+        """Accessed addresses, most accessed first.
+        :returns list of (address, reads, writes)
+        """
+        accessed = [(address, reads, writes)
+                    for address, (reads, writes) in enumerate(zip(self.reads, self.writes)) if reads or writes]
+        accessed.sort(key=lambda item: (-item[1] - item[2], item[0]))
+        return accessed[:limit]
+
+    def to_csv(self, page_size=None):
+        """CSV of the accessed addresses, or of every page if page_size is
+        given, with a header line: address,reads,writes"""
+        if page_size is None:
+            rows = ((address, reads, writes)
+                    for address, (reads, writes) in enumerate(zip(self.reads, self.writes)) if reads or writes)
+        else:
+            rows = self.pages(page_size)
+        return "address,reads,writes\n" + "".join(f"{address},{reads},{writes}\n" for address, reads, writes in rows)
+
+    def to_numpy(self, page_size=None):
+        """Counts as a uint64 NumPy array of shape (2, addresses), reads then
+        writes, or (2, pages) if page_size is given
+        :raises ImportError if NumPy is not installed
+        """
+        import numpy as np
+
+        counts = np.array([self.reads, self.writes], dtype=np.uint64)
+        if page_size is not None:
+            pages = -(-self.size//page_size)
+            padded = np.zeros((2, pages*page_size), dtype=np.uint64)
+            padded[:, :self.size] = counts
+            counts = padded.reshape(2, pages, page_size).sum(axis=2)
+        return counts
+
+    def heatmap(self, page_size=_DEFAULT_PAGE_SIZE):
+        """Text heatmap of the accesses of each page, on a log scale, with a
+        row of _HEATMAP_COLUMNS pages per line"""
+        import math
+
+        totals = [reads + writes for _, reads, writes in self.pages(page_size)]
+        busiest = max(totals, default=0)
+        top = math.log(busiest + 1) or 1
+        shades = "".join(
+            _SHADES[0] if not total else _SHADES[1 + int((len(_SHADES) - 2)*math.log(total + 1)/top)]
+            for total in totals)
+
+        lines = []
+        for row in range(0, len(shades), _HEATMAP_COLUMNS):
+            start = row*page_size
+            end = start + _HEATMAP_COLUMNS*page_size
+            regions = "".join(f"  {name}" for name, address in (("SCREEN", SCREEN_ADDRESS), ("KBD", KBD_ADDRESS))
+                              if start <= address < end)
+            lines.append(f"{start:6d} |{shades[row:row + _HEATMAP_COLUMNS]}|{regions}")
+        lines.append(f"one column per {page_size} words, '{_SHADES[1]}' to '{_SHADES[-1]}' up to {busiest} accesses")
+        return "\n".join(lines) + "\n"
+
+    def report(self, limit=20, page_size=_DEFAULT_PAGE_SIZE):
+        """Human-readable summary: totals, busiest addresses and heatmap"""
+        scale = self.scale()
+        lines = [f"{self.cycles} cycles counted, {self.total_reads()} reads, {self.total_writes()} writes"]
+        if scale != 1:
+            lines.append(f"sampled {self.cycles} of {self.cycles + self.skipped_cycles} cycles; "
+                         f"about {round(scale*self.total_reads())} reads and "
+                         f"{round(scale*self.total_writes())} writes in all")
+
+        lines.append("")
+        lines.append("   address      reads     writes")
+        for address, reads, writes in self.hottest(limit):
+            lines.append(f"{address:10d} {reads:10d} {writes:10d}")
+
+        lines.append("")
+        lines.append(self.heatmap(page_size))
+        return "\n".join(lines)
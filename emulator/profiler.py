@@ -0,0 +1,95 @@
+"""Execution profiler for the Hack emulator.
+
+Counts how many times each ROM address executes. Attach one to an emulator
+to enable it; an emulator without a profiler runs its normal loop and pays
+nothing:
+
+    source_map = SourceMap()
+    emu = Emulator(assemble(asm, source_map))
+    emu.profiler = Profiler(source_map)
+    emu.run(1000000)
+    print(emu.profiler.report())
+
+Counts are mapped back to source lines and labels through a SourceMap
+from assembler.sourcemap.
+"""
+
+from emulator.emulator import ROM_SIZE
+
+# name used for instructions before the first label
+_NO_LABEL = "(start)"
+
+
+class Profiler:
+    def __init__(self, source_map=None):
+        self.source_map = source_map
+        self.counts = [0]*ROM_SIZE
+
+    def clear(self):
+        self.counts = [0]*ROM_SIZE
+
+    def total(self):
+        return sum(self.counts)
+
+    def _line(self, address):
+        if self.source_map is None:
+            return None
+        return self.source_map.line_at(address)
+
+    def _label(self, address):
+        if self.source_map is None:
+            return _NO_LABEL
+        return self.source_map.label_at(address) or _NO_LABEL
+
+    def hotspots(self, limit=None):
+        """Executed ROM addresses, most executed first.
+        :returns list of (address, count, source line, label)
+        """
+        executed = [(count, address) for address, count in enumerate(self.counts) if count]
+        executed.sort(key=lambda item: (-item[0], item[1]))
+        if limit is not None:
+            executed = executed[:limit]
+
+        return [(address, count, self._line(address), self._label(address)) for count, address in executed]
+
+    def label_cycles(self):
+        """Cycles spent in each label region, most expensive first.
+        A region runs from a label up to the next label in ROM.
+        :returns list of (label, cycles)
+        """
+        cycles = {}
+        for address, count in enumerate(self.counts):
+            if count:
+                label = self._label(address)
+                cycles[label] = cycles.get(label, 0) + count
+
+        return sorted(cycles.items(), key=lambda item: (-item[1], item[0]))
+
+    def report(self, limit=20):
+        """Human-readable hotspot report"""
+        total = self.total() or 1
+        lines = ["   address      count      %   line  label"]
+        for address, count, line, label in self.hotspots(limit):
+            line = "" if line is None else line
+            lines.append(f"{address:10d} {count:10d} {100*count/total:6.2f} {line:>6}  {label}")
+
+        lines.append("")
+        lines.append("    cycles      %  label")
+        for label, count in self.label_cycles()[:limit]:
+            lines.append(f"{count:10d} {100*count/total:6.2f}  {label}")
+
+        return "\n".join(lines) + "\n"
+
+    def folded(self):
+        """Profile in the folded-stack format read by flamegraph.pl and
+        speedscope: one "label;line count" entry per executed instruction
+        """
+        samples = {}
+        for address, count in enumerate(self.counts):
+            if count:
+                line = self._line(address)
+                frame = f"line {line}" if line is not None else f"rom {address}"
+                stack = f"{self._label(address)};{frame}"
+                samples[stack] = samples.get(stack, 0) + count
+
+        return "".join(f"{stack} {count}\n" for stack, count in samples.items())
@@ -0,0 +1,170 @@
+"""Real-time runner for interactive Hack programs under asyncio.
+
+A RealtimeRunner runs an emulator in slices of cycles and yields to the
+event loop between them, so I/O never runs per cycle. Before each slice it
+sets KBD from the next key put on its queue, and after it sends a Frame of
+the screen to every subscriber if the screen has changed since the last
+one:
+
+    runner = RealtimeRunner(emu, cycles_per_second=2000000)
+    frames = runner.subscribe()
+    task = asyncio.create_task(runner.run())
+    await runner.keys.put(KEY_LEFT)
+    frame = await frames.get()
+
+Slices are paced to the target cycles per second: the runner sleeps while
+ahead of schedule. When it falls behind, the time it is behind is its lag.
+Lag beyond max_lag is given up rather than caught up, so a stall does not
+make the program run fast afterwards. With cycles_per_second None, slices
+run back to back, only yielding to the event loop between them.
+
+A subscriber's queue holds the latest frames only: if a subscriber is too
+slow to take them, the oldest is dropped, and the emulator never waits.
+"""
+import asyncio
+import collections
+import time
+
+from emulator.screen import ScreenRenderer
+
+# slices run per second when paced
+_SLICES_PER_SECOND = 100
+# cycles per slice when not paced
+_UNPACED_SLICE_CYCLES = 2**16
+# seconds behind schedule before the runner gives up catching up
+_MAX_LAG = 0.25
+_FRAMES_PER_SECOND = 60
+
+# The screen after cycle: the rows changed since the previous frame, and
+# the packed framebuffer (see ScreenRenderer.packed)
+Frame = collections.namedtuple("Frame", "cycle rows data")
+
+
+class RealtimeRunner:
+    def __init__(self, emulator, cycles_per_second=None, slice_cycles=None,
+                 frames_per_second=_FRAMES_PER_SECOND, max_lag=_MAX_LAG):
+        """:param emulator: Emulator or JitEmulator to run
+        :param cycles_per_second: target speed, or None to run flat out
+        :param slice_cycles: cycles run between visits to the event loop, by
+            default a hundredth of a second's worth
+        :param frames_per_second: most frames sent to subscribers per second
+        """
+        if slice_cycles is None:
+            slice_cycles = (_UNPACED_SLICE_CYCLES if cycles_per_second is None
+                            else max(1, cycles_per_second//_SLICES_PER_SECOND))
+
+        self.emulator = emulator
+        self.cycles_per_second = cycles_per_second
+        self.slice_cycles = slice_cycles
+        self.frame_interval = 1/frames_per_second
+        self.max_lag = max_lag
+        # Hack key codes to set KBD to, in order, one per slice; 0 releases
+        # the key
+        self.keys = asyncio.Queue()
+        self.screen = ScreenRenderer(emulator.ram, emulator.dirty_rows)
+
+        self._subscribers = []
+        self._stopping = False
+
+        self.cycles = 0
+        self.seconds = 0.0
+        self.frames = 0
+        # seconds behind schedule after the last slice, the most seen, and
+        # the total given up
+        self.lag = 0.0
+        self.max_lag_seen = 0.0
+        self.dropped_seconds = 0.0
+
+    def subscribe(self, maxsize=1):
+        """Queue receiving a Frame whenever the screen changes, keeping the
+        latest maxsize frames"""
+        queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.remove(queue)
+
+    def stop(self):
+        """Make run() return after the slice in progress"""
+        self._stopping = True
+
+    async def run(self, cycles=None):
+        """Run the emulator until stop() is called or, if given, for cycles
+        :returns number of cycles executed
+        """
+        emulator = self.emulator
+        self._stopping = False
+        start_cycle = emulator.cycle
+        started = time.perf_counter()
+        # when the cycles run so far are due, at the target speed
+        schedule = started
+        last_frame = None
+
+        if not self.frames:
+            self._publish(list(range(len(emulator.dirty_rows))))
+            last_frame = started
+
+        while not self._stopping:
+            n = self.slice_cycles
+            if cycles is not None:
+                n = min(n, start_cycle + cycles - emulator.cycle)
+                if n <= 0:
+                    break
+            if not self.keys.empty():
+                # one key change per slice, so the program gets a slice to
+                # see each, even a press and release queued together
+                emulator.set_key(self.keys.get_nowait())
+            executed = emulator.run(n)
+            if emulator.hit is not None:
+                # stopped at a breakpoint or watchpoint
+                break
+
+            now = time.perf_counter()
+            if last_frame is None or now - last_frame >= self.frame_interval:
+                rows = self.screen.update()
+                if rows:
+                    self._publish(rows)
+                    last_frame = now
+
+            if self.cycles_per_second is None:
+                await asyncio.sleep(0)
+                continue
+
+            schedule += executed/self.cycles_per_second
+            lag = now - schedule
+            if lag > self.max_lag:
+                self.dropped_seconds += lag - self.max_lag
+                schedule = now - self.max_lag
+                lag = self.max_lag
+            self.lag = max(lag, 0.0)
+            self.max_lag_seen = max(self.max_lag_seen, self.lag)
+            await asyncio.sleep(max(-lag, 0))
+
+        # bring subscribers up to date with the last slice
+        rows = self.screen.update()
+        if rows:
+            self._publish(rows)
+
+        executed = emulator.cycle - start_cycle
+        self.cycles += executed
+        self.seconds += time.perf_counter() - started
+        return executed
+
+    def _publish(self, rows):
+        frame = Frame(self.emulator.cycle, rows, self.screen.packed())
+        self.frames += 1
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+    def throughput(self):
+        """Cycles per second achieved over all runs"""
+        return self.cycles/self.seconds if self.seconds else 0.0
+
+    def report(self):
+        target = "unpaced" if self.cycles_per_second is None else f"target {self.cycles_per_second}"
+        return (f"{self.cycles} cycles in {self.seconds:.2f}s: {self.throughput():.0f} cycles/s ({target}), "
+                f"{self.frames} frames, lag {1000*self.lag:.1f}ms (max {1000*self.max_lag_seen:.1f}ms, "
+                f"{self.dropped_seconds:.2f}s given up)\n")
@@ -0,0 +1,143 @@
+"""Headless renderer for the Hack screen memory map.
+
+The 512x256 screen is mapped to RAM starting at SCREEN. Each row is 32
+words, and the least significant bit of a word is its leftmost pixel.
+A set bit is a black pixel.
+
+The renderer keeps a packed 1-bit framebuffer (64 bytes per row, most
+significant bit leftmost, as in PBM) and only re-renders rows flagged in
+a dirty_rows buffer, such as Emulator.dirty_rows.
+"""
+
+import struct
+import zlib
+
+from emulator.emulator import SCREEN_ADDRESS, SCREEN_ROWS, SCREEN_WORDS_PER_ROW
+
+SCREEN_WIDTH = 512
+SCREEN_HEIGHT = 256
+_ROW_BYTES = SCREEN_WIDTH // 8
+
+# byte with its bit order reversed, to turn LSB-leftmost words into
+# MSB-leftmost bytes
+_REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+# packed byte expanded to 8 RGB pixels (1 = black)
+_RGB_PIXELS = [
+    b"".join(b"\x00\x00\x00" if (i >> bit) & 1 else b"\xff\xff\xff" for bit in range(7, -1, -1))
+    for i in range(256)
+]
+
+# packed byte inverted for 1-bit grayscale PNG, where 1 = white
+_INVERTED_BITS = bytes(i ^ 0xFF for i in range(256))
+
+
+class ScreenRenderer:
+    """Render the screen region of a RAM into frames.
+
+    :param ram: indexable sequence of 16-bit words holding at least the screen map
+    :param dirty_rows: optional bytearray of SCREEN_ROWS flags set by whoever
+        writes to the screen. Rows with a flag set are re-rendered by update() and
+        the flag is cleared. If None, every row is re-rendered on each update().
+    """
+
+    def __init__(self, ram, dirty_rows=None):
+        self._ram = ram
+        self._dirty_rows = dirty_rows
+        self._framebuffer = bytearray(_ROW_BYTES*SCREEN_HEIGHT)
+        self.frame_count = 0
+        self._render_rows(range(SCREEN_ROWS))
+        if dirty_rows is not None:
+            dirty_rows[:] = bytes(SCREEN_ROWS)
+
+    def update(self):
+        """Bring the framebuffer up to date with RAM.
+        :returns list of rows that were re-rendered
+        """
+        dirty_rows = self._dirty_rows
+        if dirty_rows is None:
+            rows = list(range(SCREEN_ROWS))
+        else:
+            rows = [row for row in range(SCREEN_ROWS) if dirty_rows[row]]
+            for row in rows:
+                dirty_rows[row] = 0
+
+        self._render_rows(rows)
+        self.frame_count += 1
+        return rows
+
+    def _render_rows(self, rows):
+        ram = self._ram
+        framebuffer = self._framebuffer
+        reverse = _REVERSED_BITS
+        for row in rows:
+            address = SCREEN_ADDRESS + row*SCREEN_WORDS_PER_ROW
+            i = row*_ROW_BYTES
+            for word in ram[address:address + SCREEN_WORDS_PER_ROW]:
+                framebuffer[i] = reverse[word & 0xFF]
+                framebuffer[i + 1] = reverse[(word >> 8) & 0xFF]
+                i += 2
+
+    def pixel(self, x, y):
+        """1 if pixel (x, y) is black in the last rendered frame"""
+        byte = self._framebuffer[y*_ROW_BYTES + (x >> 3)]
+        return (byte >> (7 - (x & 7))) & 1
+
+    def packed(self):
+        """Framebuffer as bytes, 64 bytes per row, MSB leftmost, 1 = black"""
+        return bytes(self._framebuffer)
+
+    def to_pbm(self):
+        """Last rendered frame as a binary PBM (P4) image"""
+        header = f"P4\n{SCREEN_WIDTH} {SCREEN_HEIGHT}\n".encode("ascii")
+        return header + bytes(self._framebuffer)
+
+    def to_ppm(self):
+        """Last rendered frame as a binary PPM (P6) image"""
+        header = f"P6\n{SCREEN_WIDTH} {SCREEN_HEIGHT}\n255\n".encode("ascii")
+        pixels = _RGB_PIXELS
+        return header + b"".join([pixels[b] for b in self._framebuffer])
+
+    def to_png(self):
+        """Last rendered frame as a 1-bit grayscale PNG image"""
+        inverted = bytes(self._framebuffer).translate(_INVERTED_BITS)
+        raw = bytearray()
+        for i in range(0, len(inverted), _ROW_BYTES):
+            raw.append(0)  # filter type: none
+            raw.extend(inverted[i:i + _ROW_BYTES])
+
+        ihdr = struct.pack(">IIBBBBB", SCREEN_WIDTH, SCREEN_HEIGHT, 1, 0, 0, 0, 0)
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + _png_chunk(b"IHDR", ihdr)
+            + _png_chunk(b"IDAT", zlib.compress(bytes(raw)))
+            + _png_chunk(b"IEND", b"")
+        )
+
+    def to_numpy(self):
+        """Last rendered frame as a (256, 512) uint8 NumPy array, 1 = black.
+        :raises ImportError if NumPy is not installed
+        """
+        import numpy as np
+
+        packed = np.frombuffer(bytes(self._framebuffer), dtype=np.uint8)
+        return np.unpackbits(packed).reshape(SCREEN_HEIGHT, SCREEN_WIDTH)
+
+    def save(self, filename):
+        """Write the last rendered frame to a .pbm, .ppm or .png file"""
+        if filename.endswith(".png"):
+            data = self.to_png()
+        elif filename.endswith(".ppm"):
+            data = self.to_ppm()
+        elif filename.endswith(".pbm"):
+            data = self.to_pbm()
+        else:
+            raise ValueError(f"Unsupported image format: {filename}")
+
+        with open(filename, "wb") as f:
+            f.write(data)
+
+
+def _png_chunk(chunk_type, data):
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
@@ -0,0 +1,334 @@
+"""Binary execution traces of the Hack emulator.
+
+Attach a TraceWriter to an emulator to record one fixed-width record per
+executed instruction; an emulator without one runs its normal loop:
+
+    with TraceWriter("pong.trace", compression="zlib") as trace:
+        emu.tracer = trace
+        emu.run(1000000)
+
+Each record is five little-endian 16-bit words: the PC of the instruction,
+A and D after it, and the address and value it wrote to RAM (address
+NO_WRITE if it wrote nothing). The emulator fills a preallocated block of
+records in place. Full blocks are copied out and handed to a background
+thread to compress and write, while the emulator goes on refilling the
+buffer.
+
+File layout: a header, then blocks of (first cycle, record count, payload
+size, payload), then an index of every block and a trailer pointing at
+the index. TraceReader uses the index to seek to any cycle; a trace whose
+writer never closed it is read by walking the blocks instead.
+"""
+import array
+import bisect
+import collections
+import lzma
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+NO_WRITE = 0xFFFF
+
+# words per record: pc, a, d, write address, write value
+RECORD_WORDS = 5
+
+_DEFAULT_BLOCK_RECORDS = 2**16
+
+_MAGIC = b"HACKTRC1"
+_INDEX_MAGIC = b"HTRCIDX1"
+# magic, compression, words per record, records per block
+_HEADER = struct.Struct("<8sBBI")
+# first cycle, record count, payload size
+_BLOCK_HEADER = struct.Struct("<QII")
+# first cycle, file offset of block header, record count
+_INDEX_ENTRY = struct.Struct("<QQI")
+# index offset, block count, magic
+_TRAILER = struct.Struct("<QI8s")
+
+_COMPRESSIONS = {None: 0, "zlib": 1, "lzma": 2}
+_COMPRESSION_NAMES = {code: name for name, code in _COMPRESSIONS.items()}
+
+# unwritten blocks the emulator may run ahead of the background writer
+_QUEUED_BLOCKS = 4
+
+TraceRecord = collections.namedtuple("TraceRecord", "cycle pc a d address value")
+
+
+def _compress(compression, data):
+    if compression == "zlib":
+        return zlib.compress(data, 1)
+    if compression == "lzma":
+        return lzma.compress(data, preset=1)
+    return data
+
+
+def _decompress(compression, data):
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "lzma":
+        return lzma.decompress(data)
+    return data
+
+
+def _words_from_bytes(data):
+    words = array.array("H")
+    words.frombytes(data)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words
+
+
+def _bytes_from_words(words):
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words.tobytes()
+
+
+class TraceWriter:
+    def __init__(self, filename, compression=None, block_records=_DEFAULT_BLOCK_RECORDS):
+        """:param compression: None, "zlib" or "lzma"
+        :param block_records: records per block, the unit of compression and seeking
+        """
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Unknown trace compression: {compression}")
+
+        self.compression = compression
+        self.block_records = block_records
+        # filled in place by the emulator: count records from first_cycle.
+        # A list, as storing ints into one is much faster than into an array
+        self.buffer = [0]*(RECORD_WORDS*block_records)
+        self.count = 0
+        self.first_cycle = 0
+
+        self._file = open(filename, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, _COMPRESSIONS[compression], RECORD_WORDS, block_records))
+        self._index = []
+        self._error = None
+        self._queue = queue.Queue(_QUEUED_BLOCKS)
+        self._thread = threading.Thread(target=self._write_blocks, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def begin(self, cycle):
+        """Start recording at cycle, ending the current block if records
+        so far do not lead up to it"""
+        if self.count and self.first_cycle + self.count != cycle:
+            self.flush()
+        if not self.count:
+            self.first_cycle = cycle
+
+    def add(self, pc, a, d, address=NO_WRITE, value=0):
+        """Append one record, for callers other than the emulator's loop"""
+        i = self.count*RECORD_WORDS
+        self.buffer[i:i + RECORD_WORDS] = (pc, a, d, address, value)
+        self.count += 1
+        if self.count == self.block_records:
+            self.flush()
+
+    def flush(self):
+        """Hand the records in the buffer to the background writer"""
+        if self._error is not None:
+            raise self._error
+        if self.count:
+            data = _bytes_from_words(array.array("H", self.buffer[:self.count*RECORD_WORDS]))
+            self._queue.put((self.first_cycle, self.count, data))
+            self.first_cycle += self.count
+            self.count = 0
+
+    def close(self):
+        if self._file is None:
+            return
+
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(_INDEX_ENTRY.pack(*entry))
+        self._file.write(_TRAILER.pack(index_offset, len(self._index), _INDEX_MAGIC))
+        self._file.close()
+        self._file = None
+        if self._error is not None:
+            raise self._error
+
+    def _write_blocks(self):
+        while True:
+            block = self._queue.get()
+            if block is None:
+                return
+            if self._error is not None:
+                continue
+
+            first_cycle, count, data = block
+            try:
+                payload = _compress(self.compression, data)
+                offset = self._file.tell()
+                self._file.write(_BLOCK_HEADER.pack(first_cycle, count, len(payload)))
+                self._file.write(payload)
+                self._index.append((first_cycle, offset, count))
+            except Exception as e:
+                self._error = e
+
+
+class TraceReader:
+    def __init__(self, filename):
+        self._file = open(filename, "rb")
+        magic, compression, record_words, self.block_records = _HEADER.unpack(self._file.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Not a Hack execution trace: {filename}")
+        if record_words != RECORD_WORDS:
+            raise ValueError(f"Trace records of {record_words} words are not supported")
+
+        self.compression = _COMPRESSION_NAMES[compression]
+        # (first cycle, offset, count) of each block, in cycle order
+        self.blocks = self._read_index()
+        self._block_starts = [first_cycle for first_cycle, _, _ in self.blocks]
+        self._cached_block = None
+        self._cached_words = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self):
+        """Number of records"""
+        return sum(count for _, _, count in self.blocks)
+
+    def _read_index(self):
+        f = self._file
+        size = f.seek(0, 2)
+        if size >= _HEADER.size + _TRAILER.size:
+            f.seek(size - _TRAILER.size)
+            index_offset, block_count, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic == _INDEX_MAGIC:
+                f.seek(index_offset)
+                data = f.read(block_count*_INDEX_ENTRY.size)
+                return list(_INDEX_ENTRY.iter_unpack(data))
+
+        # no index, as the writer did not close the trace: walk the blocks
+        blocks = []
+        offset = _HEADER.size
+        while offset + _BLOCK_HEADER.size <= size:
+            f.seek(offset)
+            first_cycle, count, payload_size = _BLOCK_HEADER.unpack(f.read(_BLOCK_HEADER.size))
+            if offset + _BLOCK_HEADER.size + payload_size > size:
+                break
+            blocks.append((first_cycle, offset, count))
+            offset += _BLOCK_HEADER.size + payload_size
+        return blocks
+
+    def block_words(self, i):
+        """All words of block i, RECORD_WORDS per record"""
+        if self._cached_block != i:
+            _, offset, _ = self.blocks[i]
+            self._file.seek(offset)
+            _, _, payload_size = _BLOCK_HEADER.unpack(self._file.read(_BLOCK_HEADER.size))
+            data = _decompress(self.compression, self._file.read(payload_size))
+            self._cached_words = _words_from_bytes(data)
+            self._cached_block = i
+        return self._cached_words
+
+    def _find_block(self, cycle):
+        """Index of the block holding cycle, or None"""
+        i = bisect.bisect_right(self._block_starts, cycle) - 1
+        if i < 0:
+            return None
+        first_cycle, _, count = self.blocks[i]
+        if cycle >= first_cycle + count:
+            return None
+        return i
+
+    def record_at(self, cycle):
+        """TraceRecord of cycle
+        :raises KeyError if the trace has no record of cycle
+        """
+        i = self._find_block(cycle)
+        if i is None:
+            raise KeyError(f"Trace has no record of cycle {cycle}")
+
+        j = (cycle - self.blocks[i][0])*RECORD_WORDS
+        return _record(cycle, self.block_words(i)[j:j + RECORD_WORDS])
+
+    def records(self, start=0, end=None):
+        """TraceRecords of cycles from start up to end, in cycle order"""
+        i = max(bisect.bisect_right(self._block_starts, start) - 1, 0)
+        for i in range(i, len(self.blocks)):
+            first_cycle, _, count = self.blocks[i]
+            if end is not None and first_cycle >= end:
+                return
+            words = self.block_words(i)
+            first = max(start - first_cycle, 0)
+            last = count if end is None else min(count, end - first_cycle)
+            for j in range(first, last):
+                yield _record(first_cycle + j, words[j*RECORD_WORDS:(j + 1)*RECORD_WORDS])
+
+    def segments(self):
+        """(first cycle, words) of each block, in cycle order"""
+        for i, (first_cycle, _, _) in enumerate(self.blocks):
+            yield first_cycle, self.block_words(i)
+
+
+def _record(cycle, words):
+    pc, a, d, address, value = words
+    if address == NO_WRITE:
+        address = None
+        value = None
+    return TraceRecord(cycle, pc, a, d, address, value)
+
+
+def first_difference(trace_a, trace_b):
+    """First cycle at which two TraceReaders differ.
+    :returns (cycle, record of a, record of b), where a record is None if
+        its trace has no record of that cycle, or None if the traces match
+    """
+    segments_a = trace_a.segments()
+    segments_b = trace_b.segments()
+    start_a, words_a = next(segments_a, (None, None))
+    start_b, words_b = next(segments_b, (None, None))
+    while words_a is not None and words_b is not None:
+        if start_a != start_b:
+            cycle = min(start_a, start_b)
+            return cycle, _record_or_none(trace_a, cycle), _record_or_none(trace_b, cycle)
+
+        # compare the records both segments hold, then keep the rest of the longer
+        n = min(len(words_a), len(words_b))
+        if words_a[:n] != words_b[:n]:
+            for j in range(0, n, RECORD_WORDS):
+                if words_a[j:j + RECORD_WORDS] != words_b[j:j + RECORD_WORDS]:
+                    cycle = start_a + j//RECORD_WORDS
+                    return (cycle, _record(cycle, words_a[j:j + RECORD_WORDS]),
+                            _record(cycle, words_b[j:j + RECORD_WORDS]))
+
+        start_a += n//RECORD_WORDS
+        start_b += n//RECORD_WORDS
+        words_a = words_a[n:]
+        words_b = words_b[n:]
+        if not words_a:
+            start_a, words_a = next(segments_a, (None, None))
+        if not words_b:
+            start_b, words_b = next(segments_b, (None, None))
+
+    if words_a is None and words_b is None:
+        return None
+    cycle = start_a if words_a is not None else start_b
+    return cycle, _record_or_none(trace_a, cycle), _record_or_none(trace_b, cycle)
+
+
+def _record_or_none(trace, cycle):
+    try:
+        return trace.record_at(cycle)
+    except KeyError:
+        return None
@@ -0,0 +1,213 @@
+"""Sampled verification of the fast emulator engines against the chips.
+
+Emulator and JitEmulator compute whole words; cpu.computer.Computer
+evaluates alu16, Register16 and NRAM gate by gate, too slowly to follow a
+long run. A Verifier runs a fast engine as usual and, at sampled cycles,
+replays what the engine runs next through a Computer from the same state:
+the instruction an Emulator interprets, or the whole block a JitEmulator
+runs compiled. A, D and PC are loaded into the Computer's registers, and
+each word an instruction addresses into its memory as RAM held it before.
+Both must then agree on A, D, PC and all of RAM:
+
+    verifier = Verifier(JitEmulator(rom), fraction=0.001)
+    verifier.run(10000000)
+    print(verifier.report())
+
+The run stops at the first divergence, kept in verifier.divergence with
+the instructions and the state they started from. Time spent in the replay is
+counted apart from time running the engine, so the cost of leaving
+verification on in a soak test can be read off the report.
+"""
+import collections
+import math
+import random
+import time
+
+from emulator.emulator import KBD_ADDRESS
+
+_ADDRESS_MASK = 0x7FFF
+
+# cycles between checks if neither every nor fraction is given
+_DEFAULT_EVERY = 1024
+
+# A, D and PC after the instructions checked, and the word they left at
+# the address of the Divergence
+Outcome = collections.namedtuple("Outcome", "a d pc m")
+
+# The length instructions from pc, run as one unit from cycle, on which
+# the engine and the chips disagree: the first instruction, the registers
+# and the word at address before them, and the Outcome of each. address is
+# the first word of RAM that differs, or the one A held if only registers
+# differ
+Divergence = collections.namedtuple("Divergence", "cycle pc instruction a d m fast reference length address")
+
+
+class Verifier:
+    def __init__(self, emulator, every=None, fraction=None, seed=0):
+        """:param emulator: Emulator or JitEmulator to check, with its program
+            loaded
+        :param every: check from one cycle in every this many
+        :param fraction: check from this fraction of cycles, picked at
+            random (one of every and fraction; by default every 1024th
+            cycle). A check covers the compiled block a JitEmulator runs
+            from there, so more cycles than this are checked
+        :param seed: seed of the random choice of cycles, so a run can be
+            repeated with the same checks
+        """
+        from cpu.computer import Computer
+
+        if every is not None and fraction is not None:
+            raise ValueError("Give one of every and fraction, not both")
+        if fraction is not None and not 0 < fraction <= 1:
+            raise ValueError(f"Fraction of cycles {fraction} is not above 0 and up to 1")
+        if every is None and fraction is None:
+            every = _DEFAULT_EVERY
+        if every is not None and every < 1:
+            raise ValueError(f"Cannot check every {every} cycles")
+
+        self.emulator = emulator
+        self.reference = Computer(emulator.rom)
+        self.every = every
+        self.fraction = fraction
+        self._random = random.Random(seed)
+
+        self.cycles = 0
+        self.checked = 0
+        self.fast_seconds = 0.0
+        self.verify_seconds = 0.0
+        self.divergence = None
+        self._next = emulator.cycle + self._gap() - 1
+
+    def _gap(self):
+        """Cycles up to the next check"""
+        if self.every is not None:
+            return self.every
+        if self.fraction == 1:
+            return 1
+        # geometric distribution: each cycle is checked with probability fraction
+        return 1 + int(math.log(1.0 - self._random.random())/math.log(1.0 - self.fraction))
+
+    def run(self, cycles):
+        """Run the emulator for cycles, checking the sampled ones. Stops early
+        at the first divergence, or where the emulator stops at a breakpoint
+        or watchpoint.
+        :returns number of cycles executed
+        """
+        emulator = self.emulator
+        start = emulator.cycle
+        end = start + cycles
+        while emulator.cycle < end and self.divergence is None:
+            # the emulator may have run on its own since the last check
+            self._next = max(self._next, emulator.cycle)
+            ahead = min(self._next, end) - emulator.cycle
+            if ahead:
+                started = time.perf_counter()
+                emulator.run(ahead)
+                self.fast_seconds += time.perf_counter() - started
+            else:
+                self._check(end)
+                self._next = emulator.cycle + self._gap() - 1
+            if emulator.hit is not None:
+                break
+
+        self.cycles += emulator.cycle - start
+        return emulator.cycle - start
+
+    def _check(self, end):
+        """Run the instructions the engine runs next as one unit, up to end,
+        on the emulator and on the chips, recording a divergence if they
+        disagree"""
+        emulator = self.emulator
+        reference = self.reference
+
+        started = time.perf_counter()
+        if emulator.hit is None:
+            # key events due now change KBD before the instructions read it;
+            # after a hit they have been, and running would clear the hit
+            emulator.run(0)
+        a = emulator.a
+        d = emulator.d
+        pc = emulator.pc
+        cycle = emulator.cycle
+        length = emulator.block_length()
+        events = emulator._key_events
+        if cycle + length > end or events and events[0][0] < cycle + length:
+            # the engine would not run the block whole either
+            length = 1
+        # a key event right after the instructions changes KBD once they ran
+        keyed = bool(events) and events[0][0] <= cycle + length
+        before = emulator.ram[:]
+        emulator.run(length)
+        replayed = time.perf_counter()
+        self.fast_seconds += replayed - started
+        if emulator.hit is not None or emulator.cycle != cycle + length:
+            # the instructions did not all run
+            return
+
+        # each instruction reads the word at A: load it as it was before the
+        # block, unless an earlier instruction of the block addressed it
+        reference.set_registers(a, d, pc)
+        loaded = {}
+        for _ in range(length):
+            address = reference.a & _ADDRESS_MASK
+            if address not in loaded:
+                loaded[address] = before[address]
+                reference.write(address, before[address])
+            reference.step()
+        expected = before
+        for address in loaded:
+            expected[address] = reference.read(address)
+        if keyed:
+            expected[KBD_ADDRESS] = emulator.ram[KBD_ADDRESS]
+        self.checked += length
+
+        registers = (emulator.a, emulator.d, emulator.pc)
+        reference_registers = (reference.a, reference.d, reference.pc)
+        if registers != reference_registers or emulator.ram != expected:
+            address = next((address for address, word in enumerate(emulator.ram) if word != expected[address]),
+                           a & _ADDRESS_MASK)
+            m = loaded.get(address, expected[address])
+            instruction = emulator.rom[pc] if pc < len(emulator.rom) else 0
+            self.divergence = Divergence(cycle, pc, instruction, a, d, m,
+                                         Outcome(*registers, emulator.ram[address]),
+                                         Outcome(*reference_registers, expected[address]), length, address)
+        self.verify_seconds += time.perf_counter() - replayed
+
+    def overhead(self):
+        """Time spent verifying, as a fraction of the time running the engine"""
+        return self.verify_seconds/self.fast_seconds if self.fast_seconds else 0.0
+
+    def report(self):
+        """Human-readable summary of the checks and the first divergence"""
+        lines = [f"checked {self.checked} of {self.cycles} cycles: "
+                 f"{self.fast_seconds:.3f}s running, {self.verify_seconds:.3f}s verifying "
+                 f"({100*self.overhead():.1f}% overhead)"]
+
+        divergence = self.divergence
+        if divergence is None:
+            lines.append("no divergence")
+            return "\n".join(lines) + "\n"
+
+        from assembler.disassembler import decode_table
+
+        address = divergence.address
+        if divergence.length == 1:
+            lines.append(f"divergence at cycle {divergence.cycle}, pc {divergence.pc}: "
+                         f"{decode_table()[divergence.instruction]} ({divergence.instruction:016b})")
+        else:
+            rom = self.emulator.rom
+            lines.append(f"divergence in the block of {divergence.length} instructions at cycle {divergence.cycle}, "
+                         f"pc {divergence.pc}:")
+            for pc in range(divergence.pc, divergence.pc + divergence.length):
+                word = rom[pc] if pc < len(rom) else 0
+                lines.append(f"  {pc:6d}: {decode_table()[word]}")
+        memory = "KBD" if address == KBD_ADDRESS else f"M[{address}]"
+        lines.append(f"  before: A={divergence.a} D={divergence.d} {memory}={divergence.m}")
+        lines.append(f"  {'':8}{'engine':>8}{'chips':>8}")
+        for field in Outcome._fields:
+            fast = getattr(divergence.fast, field)
+            expected = getattr(divergence.reference, field)
+            name = memory if field == "m" else field.upper()
+            mark = "" if fast == expected else "  <--"
+            lines.append(f"  {name:8}{fast:>8}{expected:>8}{mark}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,39 @@
+import sys
+from assembler import client
+
+args = sys.argv[1:]
+optimize = "-O" in args
+if optimize:
+    args.remove("-O")
+
+watch = "--watch" in args
+if watch:
+    args.remove("--watch")
+
+socket_path = client.DEFAULT_SOCKET
+if "--socket" in args:
+    i = args.index("--socket")
+    socket_path = args[i + 1]
+    del args[i:i + 2]
+
+if len(args) not in (2, 3):
+    print("usage: python hack-asm.py [--socket path] [--watch] [-O] input.asm output.hack [output.map]")
+    sys.exit(1)
+
+try:
+    if watch:
+        for response in client.watch(*args, optimize=optimize, socket_path=socket_path):
+            if response["ok"]:
+                print(f"assembled {args[0]} in {response['seconds']*1000:.0f} ms")
+            else:
+                print(response["error"])
+    else:
+        client.assemble_file(*args, optimize=optimize, socket_path=socket_path)
+except (FileNotFoundError, ConnectionRefusedError):
+    print(f"no assembler daemon on {socket_path}, start one with: python hack-assembled.py")
+    sys.exit(1)
+except KeyboardInterrupt:
+    pass
+except Exception as e:
+    print(e)
+    sys.exit(1)
@@ -1,8 +1,25 @@
 import sys
 from assembler.assembler import assemble_file
 
-if len(sys.argv) != 3:
-    print("usage: python hack-assemble.py input.asm output.hack")
+args = sys.argv[1:]
+optimize = "-O" in args
+if optimize:
+    args.remove("-O")
+
+workers = None
+if "-j" in args:
+    i = args.index("-j")
+    workers = int(args[i + 1])
+    del args[i:i + 2]
+
+if len(args) not in (2, 3) or (workers and (optimize or len(args) == 3)):
+    print("usage: python hack-assemble.py [-O] input.asm output.hack [output.map]")
+    print("       python hack-assemble.py -j workers input.asm output.hack")
     sys.exit(1)
 
-assemble_file(sys.argv[1], sys.argv[2])
+if workers:
+    # imported only when needed, as process pools are slow to import
+    from assembler.parallel import assemble_file_parallel
+    assemble_file_parallel(*args, workers=workers)
+else:
+    assemble_file(*args, optimize=optimize)
@@ -0,0 +1,18 @@
+import sys
+from assembler.client import DEFAULT_SOCKET
+from assembler.daemon import AssemblerDaemon
+
+args = sys.argv[1:]
+workers = None
+if "-j" in args:
+    i = args.index("-j")
+    workers = int(args[i + 1])
+    del args[i:i + 2]
+
+if len(args) > 1:
+    print("usage: python hack-assembled.py [-j workers] [socket]")
+    sys.exit(1)
+
+socket_path = args[0] if args else DEFAULT_SOCKET
+print(f"assembler daemon listening on {socket_path}")
+AssemblerDaemon(socket_path, workers).run()
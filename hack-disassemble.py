@@ -0,0 +1,14 @@
+import sys
+from assembler.disassembler import disassemble_file
+
+args = sys.argv[1:]
+binary = None
+if "--binary" in args:
+    args.remove("--binary")
+    binary = True
+
+if len(args) not in (2, 3):
+    print("usage: python hack-disassemble.py [--binary] input.hack output.asm [input.map]")
+    sys.exit(1)
+
+disassemble_file(*args, binary=binary)
@@ -0,0 +1,9 @@
+import sys
+from assembler.linker import build
+
+if len(sys.argv) < 3:
+    print("usage: python hack-link.py output.hack module1.asm [module2.asm ...]")
+    sys.exit(1)
+
+for module in build(sys.argv[2:], sys.argv[1]):
+    print(f"assembled {module}")
@@ -0,0 +1,31 @@
+import sys
+from emulator.trace import TraceReader, first_difference
+
+# records shown before the first difference
+CONTEXT = 3
+
+
+def describe(record):
+    if record is None:
+        return "(no record)"
+    write = "" if record.address is None else f" RAM[{record.address}]={record.value}"
+    return f"pc={record.pc} A={record.a} D={record.d}{write}"
+
+
+if len(sys.argv) != 3:
+    print("usage: python hack-trace-diff.py a.trace b.trace")
+    sys.exit(1)
+
+with TraceReader(sys.argv[1]) as a, TraceReader(sys.argv[2]) as b:
+    difference = first_difference(a, b)
+    if difference is None:
+        print(f"traces match ({len(a)} cycles)")
+        sys.exit(0)
+
+    cycle, record_a, record_b = difference
+    print(f"first difference at cycle {cycle}")
+    for record in a.records(max(cycle - CONTEXT, 0), cycle):
+        print(f"  {record.cycle}: {describe(record)}")
+    print(f"< {cycle}: {describe(record_a)}")
+    print(f"> {cycle}: {describe(record_b)}")
+    sys.exit(1)
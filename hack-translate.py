@@ -0,0 +1,15 @@
+import sys
+from vmtranslator.codewriter import SIZE, SPEED
+from vmtranslator.translator import translate_file
+
+args = sys.argv[1:]
+mode = SPEED
+if "--size" in args:
+    args.remove("--size")
+    mode = SIZE
+
+if len(args) != 2:
+    print("usage: python hack-translate.py [--size] input.vm|directory output.asm")
+    sys.exit(1)
+
+translate_file(args[0], args[1], mode)
@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest
-from assembler.assembler import assemble
+from assembler.assembler import assemble, assemble_file
+from assembler.sourcemap import SourceMap, loads
+from tests.util import repo_path
 
 
 class TestAssembler(unittest.TestCase):
@@ -74,6 +78,51 @@ class TestAssembler(unittest.TestCase):
         actual = assemble(asm_string)
         self.assertEqual(expected, actual, "Compare assembler output to a verified file")
 
+    def test_assemble_bytes(self):
+        with open(repo_path("tests", "data", "Pong.asm"), "rb") as f:
+            asm_bytes = f.read()
+
+        string_map = SourceMap()
+        bytes_map = SourceMap()
+        self.assertEqual(assemble(asm_bytes.decode(), string_map), assemble(asm_bytes, bytes_map))
+        self.assertEqual(string_map.dumps(), bytes_map.dumps())
+
+    def test_str_and_bytes_accept_the_same_source(self):
+        sources = ["@5\rD=A\n", "@5\r\nD=A\r\r\n(END)\r@END\r0;JMP", "@5\x0cD=A", "(LOOP)\n@LOOP\t\x0b\n0;JMP",
+                   "(ab-)\n@0", "(a-b)\n@0", "@i\x1c\n", "\n\n@i\rD=Q"]
+        for source in sources:
+            try:
+                assemble(source)
+            except SyntaxError as e:
+                with self.assertRaises(SyntaxError, msg=repr(source)) as raised:
+                    assemble(source.encode())
+                self.assertEqual(str(e), str(raised.exception))
+                continue
+
+            string_map = SourceMap()
+            bytes_map = SourceMap()
+            self.assertEqual(assemble(source, string_map), assemble(source.encode(), bytes_map), repr(source))
+            self.assertEqual(string_map.dumps(), bytes_map.dumps(), repr(source))
+
+    def test_assemble_file_mmap(self):
+        with open(repo_path("tests", "data", "Add.asm"), "r") as f:
+            expected = assemble(f.read())
+
+        with tempfile.TemporaryDirectory() as d:
+            output = os.path.join(d, "Add.hack")
+            source_map_file = os.path.join(d, "Add.map")
+            assemble_file(repo_path("tests", "data", "Add.asm"), output, source_map_file)
+            with open(output, "r") as f:
+                self.assertEqual(expected, f.read())
+            with open(source_map_file, "r") as f:
+                self.assertEqual([8, 9, 10, 11, 12, 13], loads(f.read()).lines)
+
+            empty = os.path.join(d, "empty.asm")
+            open(empty, "w").close()
+            assemble_file(empty, output)
+            with open(output, "r") as f:
+                self.assertEqual("", f.read())
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
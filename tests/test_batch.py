@@ -0,0 +1,70 @@
+import unittest
+
+from assembler.assembler import assemble
+from emulator.emulator import Emulator
+from tests.util import assemble_repo_file
+
+try:
+    import numpy as np
+    from emulator.batch import BatchEmulator
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestBatchEmulator(unittest.TestCase):
+
+    def test_mult_sweep(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        r0, r1 = np.meshgrid(np.arange(12), np.arange(12))
+        r0 = r0.ravel()
+        r1 = r1.ravel()
+        batch = BatchEmulator(rom, len(r0), {0: r0, 1: r1})
+        batch.run(12*12 + 20)
+        np.testing.assert_array_equal(r0*r1, batch.get_ram(2))
+
+    def test_matches_scalar_emulator(self):
+        # exercises every dest combination, M reads and conditional jumps
+        rom = assemble("""
+            @R0
+            D=M
+            @NEG
+            D;JLT
+            @R1
+            AM=D+1
+            MD=M-1
+            @R2
+            M=D
+            @END
+            0;JMP
+        (NEG)
+            @R2
+            AMD=!D
+            @R3
+            M=D|A
+        (END)
+            @END
+            0;JMP
+        """)
+        inputs = [0, 1, 5, 0x7FFF, 0x8000, 0xFFFF]
+        batch = BatchEmulator(rom, len(inputs), {0: np.array(inputs, dtype=np.uint16)})
+        batch.run(30)
+        for lane, value in enumerate(inputs):
+            emu = Emulator(rom, {0: value})
+            emu.run(30)
+            self.assertEqual(emu.a, batch.a[lane])
+            self.assertEqual(emu.d, batch.d[lane])
+            self.assertEqual(emu.pc, batch.pc[lane])
+            self.assertEqual(emu.ram[:16], batch.ram[lane, :16].tolist(), f"R0={value}")
+
+    def test_lockstep_single_group(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        batch = BatchEmulator(rom, 1000, {0: 3, 1: 7})
+        batch.run(10)
+        self.assertEqual(1, batch.group_count())
+        batch.run(100)
+        self.assertTrue((batch.get_ram(2) == 21).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
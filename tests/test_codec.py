@@ -0,0 +1,36 @@
+import unittest
+
+from cpu.codec import WORD_BITS, bits_to_int, bits_to_word, int_to_bits, word_to_bits
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_word_bits_table(self):
+        self.assertEqual(2**16, len(WORD_BITS))
+        for word in (0, 1, 9, 0x8000, 12345, 0xFFFF):
+            expected = tuple(int(digit) for digit in format(word, "016b"))
+            self.assertEqual(expected, WORD_BITS[word])
+            self.assertEqual(expected, word_to_bits(word))
+
+    def test_round_trip(self):
+        for word in range(2**16):
+            self.assertEqual(word, bits_to_word(WORD_BITS[word]))
+        self.assertEqual(12345, bits_to_word(list(WORD_BITS[12345])))
+
+    def test_negative_and_overflow(self):
+        self.assertEqual(WORD_BITS[0xFFFF], word_to_bits(-1))
+        self.assertEqual(WORD_BITS[0x8000], word_to_bits(-32768))
+        self.assertEqual(WORD_BITS[5], word_to_bits(0x10005))
+
+    def test_n_bits(self):
+        self.assertEqual((1, 0, 0, 1), int_to_bits(9, 4))
+        self.assertEqual((1, 0, 0, 1), int_to_bits(25, 4))
+        self.assertEqual((), int_to_bits(9, 0))
+        self.assertEqual(9, bits_to_int([1, 0, 0, 1]))
+        self.assertEqual(0, bits_to_int([]))
+        self.assertEqual((1,) + (0,)*19, int_to_bits(2**19, 20))
+        self.assertEqual(2**19 + 3, bits_to_int(int_to_bits(2**19 + 3, 20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from cpu.computer import Computer
+from emulator.emulator import Emulator
+from tests.util import assemble_repo_file
+
+
+class TestComputer(unittest.TestCase):
+
+    def assert_matches_emulator(self, rom, ram, cycles):
+        computer = Computer(rom, ram)
+        emu = Emulator(rom, ram)
+        for cycle in range(cycles):
+            computer.step()
+            emu.step()
+            self.assertEqual((emu.a, emu.d, emu.pc), (computer.a, computer.d, computer.pc), f"cycle {cycle}")
+        for address in range(32):
+            self.assertEqual(emu.ram[address], computer.read(address))
+        return computer
+
+    def test_mult(self):
+        computer = self.assert_matches_emulator(assemble_repo_file("asm", "mult.asm"), {0: 3, 1: 5}, 200)
+        self.assertEqual(15, computer.read(2))
+
+    def test_screen_and_indirect_writes(self):
+        computer = self.assert_matches_emulator(assemble_repo_file("asm", "screenfill.asm"), {}, 300)
+        self.assertEqual(0x5555, computer.read(16384))
+
+    def test_write(self):
+        computer = Computer([])
+        computer.write(24576, 65)
+        computer.write(7, -1)
+        self.assertEqual(65, computer.read(24576))
+        self.assertEqual(0xFFFF, computer.read(7))
+        self.assertEqual(0, computer.pc, "writing memory does not advance the program")
+
+    def test_load(self):
+        computer = Computer(assemble_repo_file("asm", "memcpy.asm"), {0: 100, 1: 200, 2: 3})
+        computer.load([11, 22, 33], 100)
+        computer.run(100)
+        self.assertEqual([11, 22, 33], list(computer.memory(200, 203)))
+        self.assertEqual(0, computer.clock.cycle - computer.cycle, "loading does not tick the clock")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from assembler import client
+from assembler.daemon import AssemblerDaemon
+from tests.util import assemble_repo_file, repo_path
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.socket = os.path.join(self.dir, "assembler.sock")
+        self.daemon = AssemblerDaemon(self.socket, workers=1, poll_interval=0.02)
+        self.thread = threading.Thread(target=self.daemon.run)
+        self.thread.start()
+
+        deadline = time.monotonic() + 10
+        while not client.ping(self.socket):
+            self.assertLess(time.monotonic(), deadline, "daemon did not start")
+            time.sleep(0.02)
+
+    def tearDown(self):
+        client.shutdown(self.socket)
+        self.thread.join(10)
+        self.assertFalse(os.path.exists(self.socket), "socket removed on shutdown")
+        shutil.rmtree(self.dir)
+
+    def read(self, name):
+        with open(os.path.join(self.dir, name), "r") as f:
+            return f.read()
+
+    def test_assemble(self):
+        output = os.path.join(self.dir, "Add.hack")
+        response = client.assemble_file(repo_path("tests", "data", "Add.asm"), output, socket_path=self.socket)
+        self.assertTrue(response["ok"])
+        self.assertEqual(assemble_repo_file("tests", "data", "Add.asm"), self.read("Add.hack"))
+
+    def test_error(self):
+        bad = os.path.join(self.dir, "bad.asm")
+        with open(bad, "w") as f:
+            f.write("@i\nD=Q\n")
+
+        with self.assertRaisesRegex(Exception, "line 1"):
+            client.assemble_file(bad, os.path.join(self.dir, "bad.hack"), socket_path=self.socket)
+
+        self.assertFalse(client.request({"command": "launch"}, self.socket)["ok"])
+
+    def test_watch(self):
+        source = os.path.join(self.dir, "watched.asm")
+        output = os.path.join(self.dir, "watched.hack")
+        with open(source, "w") as f:
+            f.write("@1\n")
+
+        responses = client.watch(source, output, socket_path=self.socket)
+        self.assertTrue(next(responses)["ok"])
+        self.assertEqual("0000000000000001\n", self.read("watched.hack"))
+
+        with open(source, "w") as f:
+            f.write("@2\n@3\n")
+        self.assertTrue(next(responses)["ok"])
+        self.assertEqual("0000000000000010\n0000000000000011\n", self.read("watched.hack"))
+
+        with open(source, "w") as f:
+            f.write("@-1\n")
+        self.assertFalse(next(responses)["ok"])
+        responses.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from assembler.assembler import assemble
+from assembler.disassembler import *
+from assembler.sourcemap import SourceMap
+from tests.util import repo_path
+
+
+class TestDisassembler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(repo_path("tests", "data", "Pong.asm"), "r") as f:
+            cls.pong_map = SourceMap()
+            cls.pong_hack = assemble(f.read(), cls.pong_map)
+
+    def test_decode_table(self):
+        table = decode_table()
+        self.assertEqual(2**16, len(table))
+        self.assertEqual("@0", table[0])
+        self.assertEqual("@32767", table[0x7FFF])
+        self.assertEqual("D=M+1;JGE", table[0b1111110111010011])
+        self.assertEqual("0;JMP", table[0b1110101010000111])
+        self.assertEqual("AMD=D|M", table[0b1111010101111000])
+        self.assertTrue(table[0b1000101010000111].startswith("//"), "C-instruction not starting 111")
+        self.assertTrue(table[0b1110111110000000].startswith("//"), "comp code with no mnemonic")
+
+    def test_round_trip_pong(self):
+        asm = disassemble_hack(self.pong_hack)
+        self.assertEqual(self.pong_hack, assemble(asm))
+
+    def test_round_trip_pong_labels(self):
+        asm = disassemble_hack(self.pong_hack, self.pong_map)
+        self.assertEqual(self.pong_hack, assemble(asm))
+        self.assertIn("(END_EQ)\n", asm)
+        self.assertIn("@END_EQ\nD;JNE\n", asm)
+
+    def test_labels(self):
+        source_map = SourceMap()
+        hack = assemble("(LOOP)\n@LOOP\n(X)\n(Y)\nD;JGT\n@X\nD=A\n(END)\n", source_map)
+        asm = disassemble_hack(hack, source_map)
+        self.assertEqual("(LOOP)\n@LOOP\n(X)\n(Y)\nD;JGT\n@1\nD=A\n(END)\n", asm)
+
+    def test_labels_across_chunks(self):
+        source_map = SourceMap()
+        hack = assemble("(LOOP)\n" + "D=D+1\n"*(2**16 - 1) + "@LOOP\n0;JMP\n", source_map)
+        asm = disassemble_hack(hack, source_map)
+        self.assertTrue(asm.endswith("@LOOP\n0;JMP\n"))
+        self.assertEqual(hack, assemble(asm))
+
+    def test_binary(self):
+        words = [int(line, 2) for line in self.pong_hack.split()]
+        data = to_binary(words)
+        self.assertEqual(bytes([words[0] >> 8, words[0] & 0xFF]), data[:2], "big-endian")
+        self.assertEqual(words, list(from_binary(data)))
+        self.assertEqual(disassemble_hack(self.pong_hack), disassemble(from_binary(data)))
+
+    def test_disassemble_file(self):
+        expected = disassemble_hack(self.pong_hack, self.pong_map)
+        with tempfile.TemporaryDirectory() as d:
+            hack_file = os.path.join(d, "Pong.hack")
+            bin_file = os.path.join(d, "Pong.bin")
+            map_file = os.path.join(d, "Pong.map")
+            with open(hack_file, "w") as f:
+                f.write(self.pong_hack)
+            with open(bin_file, "wb") as f:
+                f.write(to_binary(int(line, 2) for line in self.pong_hack.split()))
+            self.pong_map.save(map_file)
+
+            for rom_file in (hack_file, bin_file):
+                output = os.path.join(d, "Pong.asm")
+                disassemble_file(rom_file, output, map_file)
+                with open(output, "r") as f:
+                    self.assertEqual(expected, f.read(), rom_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,278 @@
+import unittest
+
+from assembler.assembler import assemble
+from assembler.sourcemap import SourceMap
+from emulator.emulator import *
+from emulator.keyboard import KeyboardTrace
+from emulator.profiler import Profiler
+from tests.util import assemble_repo_file, repo_path
+
+
+def read_repo_file(*parts):
+    with open(repo_path(*parts), "r") as f:
+        return f.read()
+
+
+class TestEmulator(unittest.TestCase):
+
+    def test_a_instruction(self):
+        emu = Emulator(assemble("@1234"))
+        emu.step()
+        self.assertEqual(1234, emu.a)
+        self.assertEqual(1, emu.pc)
+
+    def test_c_instruction_dests(self):
+        emu = Emulator(assemble("""
+            @7
+            D=A
+            @100
+            AM=D+1
+        """))
+        emu.run(4)
+        self.assertEqual(7, emu.d)
+        self.assertEqual(8, emu.ram[100], "M is written using A before the update")
+        self.assertEqual(8, emu.a)
+
+    def test_negative_values_are_16_bit(self):
+        emu = Emulator(assemble("""
+            D=-1
+            @5
+            M=D-1
+        """))
+        emu.run(3)
+        self.assertEqual(0xFFFF, emu.d)
+        self.assertEqual(0xFFFE, emu.ram[5])
+
+    def test_jumps(self):
+        # jump target is A before the instruction executes
+        cases = [
+            ("0", "JEQ", True), ("1", "JEQ", False),
+            ("1", "JGT", True), ("-1", "JGT", False), ("0", "JGT", False),
+            ("-1", "JLT", True), ("0", "JLT", False),
+            ("0", "JGE", True), ("-1", "JGE", False),
+            ("0", "JNE", False), ("-1", "JNE", True),
+            ("0", "JLE", True), ("1", "JLE", False),
+            ("1", "JMP", True),
+        ]
+        for comp, jump, taken in cases:
+            emu = Emulator(assemble(f"@10\n{comp};{jump}"))
+            emu.run(2)
+            self.assertEqual(10 if taken else 2, emu.pc, f"{comp};{jump}")
+
+    def test_jump_uses_old_a(self):
+        emu = Emulator(assemble("@10\nA=1;JMP"))
+        emu.run(2)
+        self.assertEqual(10, emu.pc)
+        self.assertEqual(1, emu.a)
+
+    def test_mult(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        for r0, r1 in [(0, 5), (3, 4), (7, 9), (12, 1)]:
+            emu = Emulator(rom, {0: r0, 1: r1})
+            emu.run(1000)
+            self.assertEqual(r0*r1, emu.ram[2], f"{r0} * {r1}")
+
+    def test_generic_comp_matches_alu(self):
+        # 0x2A with a=0 is the "0" mnemonic; verify an undocumented code via the ALU
+        emu = Emulator([0b1110000001010000])  # comp code 0000001: x&y then negate -> !(D&A)
+        emu.d = 0b1100
+        emu.a = 0b1010
+        emu.step()
+        self.assertEqual(0b1000 ^ 0xFFFF, emu.d)
+
+    def test_screen_writes_mark_dirty_rows(self):
+        emu = Emulator(assemble("@SCREEN\nM=1\n@16416\nM=1"))
+        emu.dirty_rows[:] = bytes(SCREEN_ROWS)
+        emu.run(2)
+        self.assertEqual([0], [i for i, v in enumerate(emu.dirty_rows) if v])
+        emu.run(2)
+        self.assertEqual([0, 1], [i for i, v in enumerate(emu.dirty_rows) if v])
+
+    def test_write_hook(self):
+        emu = Emulator(assemble("@3\nM=1\nD=M\n@4\nAM=D+1"))
+        writes = []
+        emu.add_write_hook(lambda pc, address, value: writes.append((pc, address, value)))
+        emu.run(5)
+        self.assertEqual([(1, 3, 1), (4, 4, 2)], writes)
+
+        emu.clear_hooks()
+        emu.reset()
+        emu.run(5)
+        self.assertEqual(2, len(writes))
+
+    def assert_same_state(self, expected, emu):
+        self.assertEqual((expected.cycle, expected.pc, expected.a, expected.d),
+                         (emu.cycle, emu.pc, emu.a, emu.d))
+        self.assertEqual(expected.ram, emu.ram)
+
+    def test_skip_end_loop(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        emu = Emulator(rom, {0: 7, 1: 9})
+        spun = Emulator(rom, {0: 7, 1: 9})
+        spun.skip_idle = False
+        for cycles in (100000, 12345, 1):
+            self.assertEqual(cycles, emu.run(cycles))
+            spun.run(cycles)
+            self.assert_same_state(spun, emu)
+            if cycles == 100000:
+                self.assertTrue(emu.halted)
+                self.assertEqual(2, emu.idle_loop[1], "(END) @END 0;JMP")
+                self.assertFalse(spun.halted)
+
+        emu.run(10**12)
+        self.assertEqual(10**12 + 112346, emu.cycle)
+        self.assertEqual(63, emu.ram[2])
+
+    def test_until_halt(self):
+        emu = Emulator(assemble_repo_file("asm", "mult.asm"), {0: 7, 1: 9})
+        executed = emu.run(10**12, until_halt=True)
+        self.assertLess(executed, 10**6)
+        self.assertEqual(executed, emu.cycle)
+        self.assertTrue(emu.halted)
+        self.assertEqual(63, emu.ram[2])
+
+        emu = Emulator(assemble("@0\nM=M+1\n@0\n0;JMP"))
+        self.assertEqual(100000, emu.run(100000, until_halt=True), "a counting loop is not idle")
+        self.assertFalse(emu.halted)
+
+    def test_skip_keyboard_wait(self):
+        # wait for a key, store it in R0, then halt
+        rom = assemble("""
+            (WAIT)
+            @KBD
+            D=M
+            @WAIT
+            D;JEQ
+            @0
+            M=D
+            (END)
+            @END
+            0;JMP
+        """)
+        emu = Emulator(rom)
+        spun = Emulator(rom)
+        spun.skip_idle = False
+        for machine in (emu, spun):
+            machine.replay(KeyboardTrace([(150001, 65)]))
+        emu.run(150000)
+        self.assertFalse(emu.halted, "waiting for a scheduled key")
+        self.assertEqual(4, emu.idle_loop[1])
+
+        emu.run(10**6)
+        spun.run(150000 + 10**6)
+        self.assert_same_state(spun, emu)
+        self.assertEqual(65, emu.ram[0])
+        self.assertTrue(emu.halted)
+
+    def test_skip_silent_writes(self):
+        # rewrites R0 with the value it already holds
+        rom = assemble("@0\nM=0\n(LOOP)\n@0\nM=0\n@LOOP\n0;JMP")
+        emu = Emulator(rom)
+        emu.run(10**9)
+        self.assertTrue(emu.halted)
+
+        writes = []
+        emu = Emulator(rom)
+        emu.add_write_hook(lambda pc, address, value: writes.append(address))
+        emu.run(5000)
+        self.assertFalse(emu.halted, "hooked writes are not skipped")
+        # cycle 1, then cycles 3, 7, ..., 4999
+        self.assertEqual(1 + 1250, len(writes))
+
+    def test_breakpoint(self):
+        source_map = SourceMap()
+        emu = Emulator(assemble(read_repo_file("asm", "mult.asm"), source_map), {0: 3, 1: 4})
+        loop = source_map.labels["LOOP"]
+        emu.add_breakpoint(loop)
+
+        executed = emu.run(1000)
+        self.assertEqual(Hit("breakpoint", loop, None, None), emu.hit)
+        self.assertEqual(loop, emu.pc)
+        self.assertEqual(executed, emu.cycle)
+
+        emu.run(1000)
+        self.assertEqual(loop, emu.pc, "resumes past the breakpoint to hit it on the next iteration")
+        self.assertEqual(executed + 14, emu.cycle)
+
+        emu.remove_breakpoint(loop)
+        emu.run(1000)
+        self.assertIsNone(emu.hit)
+        self.assertEqual(12, emu.ram[2])
+
+    def test_breakpoint_callback(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        emu = Emulator(rom, {0: 3, 1: 4})
+        hits = []
+        emu.add_breakpoint(0, lambda e: hits.append(e.cycle))
+        self.assertEqual(1000, emu.run(1000), "a callback returning None does not stop the run")
+        self.assertEqual([0], hits)
+        self.assertEqual(12, emu.ram[2])
+
+        emu = Emulator(rom, {0: 3, 1: 4})
+        # stop at LOOP once the counter reaches 2
+        emu.add_breakpoint(4, lambda e: e.ram[16] == 2)
+        emu.run(1000)
+        self.assertEqual(4, emu.pc)
+        self.assertEqual(8, emu.ram[2])
+
+    def test_watchpoint(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        spun = Emulator(rom, {0: 3, 1: 4})
+        writes = []
+        spun.add_write_hook(lambda pc, address, value: writes.append((pc, address, value)))
+        spun.run(1000)
+        expected = [write for write in writes if write[1] == 2]
+
+        emu = Emulator(rom, {0: 3, 1: 4})
+        emu.add_write_hook(lambda pc, address, value: None)
+        emu.add_watchpoint(2)
+        hits = []
+        while emu.run(1000 - emu.cycle):
+            if emu.hit is None:
+                break
+            self.assertEqual("watchpoint", emu.hit.kind)
+            self.assertEqual(emu.pc, emu.hit.pc)
+            hits.append((emu.hit.pc, emu.hit.address, emu.hit.value))
+        self.assertEqual(expected, hits)
+        self.assertEqual(1000, emu.cycle)
+        self.assert_same_state(spun, emu)
+
+    def test_watchpoint_range_callback(self):
+        emu = Emulator(assemble("@5\nM=1\n@7\nM=1\n@9\nM=1\n@8\nM=1"))
+        seen = []
+        emu.add_watchpoint(6, 9, lambda e, address, value: seen.append(address) or address == 8)
+        emu.run(100)
+        self.assertEqual([7, 8], seen)
+        self.assertEqual(7, emu.pc)
+        self.assertEqual(0, emu.ram[8], "stops before the write")
+        self.assertEqual(1, emu.ram[9])
+
+        emu.clear_hooks()
+        emu.run(1)
+        self.assertEqual(1, emu.ram[8])
+
+    def test_watchpoint_range_checked(self):
+        emu = Emulator(assemble("@5\nM=1"))
+        for start, end in ((-1, 4), (5, 5), (RAM_SIZE - 1, RAM_SIZE + 1), (RAM_SIZE, None)):
+            with self.assertRaises(ValueError):
+                emu.add_watchpoint(start, end)
+            with self.assertRaises(ValueError):
+                emu.remove_watchpoint(start, end)
+        emu.add_watchpoint(RAM_SIZE - 1)
+        emu.remove_watchpoint(RAM_SIZE - 1)
+        self.assertEqual(2, emu.run(2))
+
+    def test_breakpoint_while_profiling(self):
+        emu = Emulator(assemble_repo_file("asm", "mult.asm"), {0: 3, 1: 4})
+        emu.profiler = Profiler()
+        emu.add_breakpoint(4)
+        emu.run(100)
+        emu.run(100 - emu.cycle)
+        self.assertEqual(emu.cycle, emu.profiler.total())
+
+    def test_rom_from_hack(self):
+        self.assertEqual([5, 0xFFFF], rom_from_hack("0000000000000101\n1111111111111111\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
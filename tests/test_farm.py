@@ -0,0 +1,32 @@
+import unittest
+
+from emulator.farm import *
+from tests.util import assemble_repo_file
+
+
+class TestFarm(unittest.TestCase):
+
+    def test_mult_sweep(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        fill = assemble_repo_file("asm", "fill.asm")
+        jobs = [FarmJob(rom, {0: a, 1: b}, 500, [2]) for a in range(6) for b in range(6)]
+        jobs.append(FarmJob(fill, {24576: 1}, 2000, [16384, 16385]))
+
+        with EmulatorFarm(workers=2) as farm:
+            results = list(farm.run(jobs))
+            self.assertEqual(2, len(farm._roms), "each distinct ROM is shared once")
+
+        self.assertEqual(list(range(len(jobs))), sorted(r.index for r in results))
+        for result in results:
+            if result.index < 36:
+                a, b = divmod(result.index, 6)
+                self.assertEqual({2: a*b}, result.probes)
+            else:
+                self.assertEqual({16384: 0xFFFF, 16385: 0xFFFF}, result.probes)
+
+        self.assertEqual(36*500 + 2000, farm.total_instructions)
+        self.assertGreater(farm.instructions_per_second(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from cpu import alu, gate, memory
+from cpu.computer import Computer
+from cpu.instrument import TOP, GateCounter
+from tests.util import assemble_repo_file, int16_as_register
+
+
+class TestGateCounter(unittest.TestCase):
+
+    def test_gate_nands(self):
+        with GateCounter() as counter:
+            gate.not_gate(1)
+            gate.and_gate(1, 0)
+            gate.or_gate(1, 0)
+            gate.xor_gate(1, 0)
+            gate.mux_gate(1, 0, 1)
+        self.assertEqual(1 + 2 + 3 + 6 + 8, counter.calls["nand_gate"])
+        self.assertEqual(6, counter.nands["xor_gate"])
+        self.assertEqual(8, counter.nands_per_call("mux_gate"))
+        self.assertEqual(1, counter.callers[TOP]["xor_gate"])
+        self.assertEqual(1, counter.callers["xor_gate"]["nand_gate"])
+
+    def test_alu_nands(self):
+        with GateCounter() as counter:
+            out = [None]*16
+            alu.alu16(int16_as_register(1234), int16_as_register(-5), *alu.ALU_X_PLUS_Y, out)
+            alu.alu16(int16_as_register(1234), int16_as_register(7), *alu.ALU_X_AND_Y, out)
+        self.assertEqual(int16_as_register(1234 & 7), out)
+        # the structure does the same work whatever the inputs
+        self.assertEqual(2, counter.calls["alu16"])
+        self.assertEqual(counter.calls["nand_gate"], counter.nands["alu16"])
+        self.assertEqual(1152, counter.nands_per_call("alu16"))
+        self.assertEqual(2, counter.callers["alu16"]["add16"])
+        self.assertEqual(32, counter.callers["add"]["full_adder"])
+
+    def test_originals_restored(self):
+        mux = gate.mux_gate
+        with GateCounter():
+            self.assertIsNot(mux, gate.mux_gate)
+            self.assertIs(gate.mux_gate, memory.mux_gate)
+        self.assertIs(mux, gate.mux_gate)
+        self.assertIs(mux, memory.mux_gate)
+        self.assertIs(memory.Register16.__dict__["set_input"], memory.Register16.set_input)
+        self.assertFalse(hasattr(memory.Register16.set_input, "__wrapped__"))
+
+    def test_not_nested(self):
+        with GateCounter():
+            with self.assertRaises(Exception):
+                GateCounter().__enter__()
+
+    def test_computer(self):
+        with GateCounter() as counter:
+            computer = Computer(assemble_repo_file("asm", "mult.asm"), {0: 5, 1: 3})
+            counter.attach(computer.clock, computer.buses())
+            computer.run(100)
+        self.assertEqual(100, counter.calls["Computer.step"])
+        self.assertEqual(100, counter.callers["Computer.step"]["alu16"])
+        self.assertGreater(counter.nands_per_call("Computer.step"), counter.nands_per_call("alu16"))
+        # PC counts up one bit at a time, or jumps
+        self.assertEqual(100, counter.samples["PC"])
+        self.assertEqual(16, len(counter.toggle_rates("PC")))
+        self.assertGreater(counter.toggle_rates("PC")[15], 0.5)
+        self.assertEqual(0, counter.toggles["PC"][0])
+        self.assertIn("alu16", counter.report())
+
+        # detached on exit
+        computer.run(1)
+        self.assertEqual(100, counter.samples["PC"])
+
+    def test_watch(self):
+        bus = [0, 0, 0]
+        counter = GateCounter()
+        counter.watch("bus", lambda: bus)
+        bus[0] = 1
+        counter.sample()
+        bus[0] = 0
+        bus[2] = 1
+        counter.sample()
+        self.assertEqual([2, 0, 1], counter.toggles["bus"])
+        self.assertEqual([1.0, 0.0, 0.5], counter.toggle_rates("bus"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import random
+import unittest
+
+from benchmarks.emulators import PROGRAMS, check, load_rom, new_emulator
+from emulator.emulator import Emulator
+from emulator.jit import JitEmulator, compile_block
+
+
+class TestJit(unittest.TestCase):
+
+    def assert_same_state(self, expected, emu):
+        self.assertEqual((expected.cycle, expected.pc, expected.a, expected.d),
+                         (emu.cycle, emu.pc, emu.a, emu.d))
+        self.assertEqual(expected.ram, emu.ram)
+        self.assertEqual(expected.dirty_rows, emu.dirty_rows)
+
+    def test_compile_block(self):
+        # @counter D=M @0 D=D-M @END D;JGE from mult.asm
+        rom = [16, 0xFC10, 0, 0xF4D0, 18, 0xE303]
+        source, length = compile_block(rom, 0)
+        self.assertEqual(6, length)
+        self.assertIn("d = ram[16]", source)
+        self.assertIn("return 18, d, (18 if out < 32768 else 6)", source)
+
+    def test_random_programs(self):
+        rng = random.Random(5)
+        for trial in range(200):
+            rom = [rng.randrange(2**16) if rng.random() < 0.6 else rng.randrange(64)
+                   for _ in range(rng.randrange(1, 60))]
+            ram = {address: rng.randrange(2**16) for address in range(64)}
+            emu = Emulator(rom, ram)
+            jit = JitEmulator(rom, ram)
+            for cycles in (1, 7, 100, 3, 1000):
+                emu.run(cycles)
+                jit.run(cycles)
+                self.assert_same_state(emu, jit)
+
+    def test_corpus(self):
+        for program in PROGRAMS:
+            if program.name == "pong":
+                continue
+            rom = load_rom(program)
+            for engine in (Emulator, JitEmulator):
+                emu = new_emulator(engine, rom, program)
+                emu.run(program.cycles)
+                self.assertEqual([], check(program, emu.ram), f"{program.name} on {engine.__name__}")
+
+    def test_pong(self):
+        program = [program for program in PROGRAMS if program.name == "pong"][0]
+        rom = load_rom(program)
+        emu = new_emulator(Emulator, rom, program)
+        jit = new_emulator(JitEmulator, rom, program)
+        emu.run(500000)
+        jit.run(500000)
+        self.assert_same_state(emu, jit)
+
+    def test_hooks_are_interpreted(self):
+        rom = load_rom(PROGRAMS[0])
+        jit = JitEmulator(rom, {0: 3, 1: 4})
+        writes = []
+        jit.add_write_hook(lambda pc, address, value: writes.append(address))
+        jit.add_breakpoint(4)
+        jit.run(1000)
+        self.assertEqual(4, jit.pc)
+        self.assertEqual([16, 2], writes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from assembler.assembler import assemble
+from emulator.emulator import Emulator, KBD_ADDRESS
+from emulator.keyboard import *
+from emulator import keyboard
+from tests.util import assemble_repo_file, repo_path
+
+
+class TestKeyboard(unittest.TestCase):
+
+    def test_round_trip(self):
+        trace = KeyboardTrace([(0, 65), (10, 0), (10, 66), (250, 0)])
+        self.assertEqual(trace, keyboard.loads(trace.dumps()))
+
+    def test_loads_comments_and_errors(self):
+        trace = keyboard.loads("# header\n\n5 130  # left\n9 0\n")
+        self.assertEqual([(5, 130), (9, 0)], trace.events)
+        with self.assertRaises(SyntaxError):
+            keyboard.loads("5 left")
+        with self.assertRaises(ValueError):
+            keyboard.loads("9 1\n5 0")
+
+    def test_replay_applies_keys_at_cycle(self):
+        # D=M of KBD in a loop, storing into R0 every iteration
+        emu = Emulator(assemble("""
+            (LOOP)
+            @KBD
+            D=M
+            @LOOP
+            0;JMP
+        """))
+        emu.replay(KeyboardTrace([(6, 65), (12, 0)]))
+        emu.run(6)
+        self.assertEqual(65, emu.ram[KBD_ADDRESS], "event applied once cycle 6 is reached")
+        emu.run(4)
+        self.assertEqual(65, emu.d)
+        emu.run(2)
+        self.assertEqual(0, emu.ram[KBD_ADDRESS])
+
+    def test_same_cycle_events_keep_their_order(self):
+        self.assertEqual([(5, 65), (5, 0)], key_presses([(5, 65, 0)]).events)
+        self.assertEqual([(0, 66), (5, 0), (5, 65), (10, 0)], key_presses([(0, 66, 5), (5, 65, 5)]).events)
+        self.assertEqual([(0, 66), (5, 0), (5, 65), (10, 0)], key_presses([(5, 65, 5), (0, 66, 5)]).events,
+                         "presses in mixed order")
+
+        emu = Emulator(assemble("(LOOP)\n@LOOP\n0;JMP"))
+        trace = emu.start_recording()
+        emu.set_key(66)
+        emu.set_key(0)
+        emu.stop_recording()
+        emu.set_key(0)
+
+        emu.replay(trace)
+        emu.replay(KeyboardTrace([(3, 65)]))
+        emu.replay(KeyboardTrace([(3, 0)]))
+        emu.run(1)
+        self.assertEqual(0, emu.ram[KBD_ADDRESS], "a press and release on one cycle leaves the key released")
+        emu.run(3)
+        self.assertEqual(0, emu.ram[KBD_ADDRESS], "events scheduled later on the same cycle apply later")
+
+    def test_record_then_replay_is_deterministic(self):
+        rom = assemble_repo_file("asm", "fill.asm")
+        emu = Emulator(rom)
+        trace = emu.start_recording()
+        emu.run(1000)
+        emu.set_key(65)
+        emu.run(150000)
+        emu.set_key(0)
+        emu.run(1000)
+        self.assertEqual([(1000, 65), (151000, 0)], emu.stop_recording().events)
+
+        replayed = Emulator(rom)
+        replayed.replay(trace)
+        replayed.run(152000)
+        self.assertEqual(emu.ram, replayed.ram)
+        self.assertEqual((emu.a, emu.d, emu.pc), (replayed.a, replayed.d, replayed.pc))
+
+    def test_pong_session(self):
+        rom = assemble_repo_file("tests", "data", "Pong.asm")
+        trace = keyboard.load(repo_path("tests", "data", "Pong.keys"))
+        runs = []
+        for _ in range(2):
+            emu = Emulator(rom)
+            emu.replay(trace)
+            emu.run(300000)
+            runs.append(emu.ram)
+
+        self.assertEqual(runs[0], runs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
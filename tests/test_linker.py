@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from assembler.assembler import assemble
+from assembler.linker import build, link
+from assembler.objectfile import ROM, SYMBOL, assemble_object
+from assembler import objectfile
+from tests.util import repo_path
+
+
+def split_at_labels(asm, parts):
+    """Split assembly source into parts, cutting only before label lines"""
+    lines = asm.splitlines(keepends=True)
+    size = len(lines)//parts
+    modules = []
+    start = 0
+    for _ in range(parts - 1):
+        cut = start + size
+        while not lines[cut].startswith("("):
+            cut += 1
+        modules.append("".join(lines[start:cut]))
+        start = cut
+    modules.append("".join(lines[start:]))
+    return modules
+
+
+class TestLinker(unittest.TestCase):
+
+    def test_object_file(self):
+        obj = assemble_object("""
+            @LOOP
+            0;JMP
+            (LOOP)
+            @SCREEN
+            @x
+            @OTHER
+            @7
+        """)
+        self.assertEqual({"LOOP": 2}, obj.exports)
+        self.assertEqual([2, 0b1110101010000111, 16384, 0, 0, 7], obj.code)
+        self.assertEqual([(0, ROM, "LOOP"), (3, SYMBOL, "x"), (4, SYMBOL, "OTHER")], obj.relocations)
+
+        loaded = objectfile.loads(obj.dumps())
+        self.assertEqual(obj.code, loaded.code)
+        self.assertEqual(obj.exports, loaded.exports)
+        self.assertEqual(obj.relocations, loaded.relocations)
+
+        self.assertEqual([32767], assemble_object("@32767").code)
+        with self.assertRaises(Exception):
+            assemble_object("@32768")
+
+    def test_link_resolves_across_modules(self):
+        main = assemble_object("@x\nM=1\n@LIB\n0;JMP\n(BACK)\n@y\nM=0")
+        lib = assemble_object("(LIB)\n@x\nM=M+1\n@BACK\n0;JMP")
+        expected = assemble("@x\nM=1\n@LIB\n0;JMP\n(BACK)\n@y\nM=0\n(LIB)\n@x\nM=M+1\n@BACK\n0;JMP")
+        self.assertEqual(expected, link([main, lib]))
+
+    def test_duplicate_label(self):
+        with self.assertRaises(Exception):
+            link([assemble_object("(A)\nD=0"), assemble_object("(A)\nD=1")])
+
+    def test_pong_matches_monolithic_assembly(self):
+        with open(repo_path("tests", "data", "Pong.asm"), "r") as f:
+            asm = f.read()
+
+        modules = split_at_labels(asm, 4)
+        self.assertEqual(asm, "".join(modules))
+        self.assertEqual(assemble(asm), link([assemble_object(m) for m in modules]))
+
+    def test_build_reassembles_changed_modules(self):
+        with tempfile.TemporaryDirectory() as d:
+            main = os.path.join(d, "main.asm")
+            lib = os.path.join(d, "lib.asm")
+            output = os.path.join(d, "out.hack")
+            with open(main, "w") as f:
+                f.write("@LIB\n0;JMP\n")
+            with open(lib, "w") as f:
+                f.write("(LIB)\n@x\nM=1\n")
+
+            self.assertEqual([main, lib], build([main, lib], output))
+            self.assertEqual([], build([main, lib], output))
+
+            with open(lib, "w") as f:
+                f.write("(LIB)\n@y\n@x\nM=1\n")
+            stamp = os.path.getmtime(main) + 10
+            os.utime(lib, (stamp, stamp))
+            self.assertEqual([lib], build([main, lib], output))
+
+            with open(output, "r") as f:
+                self.assertEqual(assemble("@LIB\n0;JMP\n(LIB)\n@y\n@x\nM=1\n"), f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from itertools import product
+
+from cpu import alu, gate, lut
+from cpu.lut import BIT, lookup_table, tabulate
+
+# every tabulated gate with the widths of its arguments
+TABULATED = [
+    (gate.xor_gate, (BIT, BIT)),
+    (gate.mux_gate, (BIT, BIT, BIT)),
+    (gate.dmux_gate, (BIT, BIT)),
+    (gate.dmux4way_gate, (BIT, 2)),
+    (gate.or8way_gate, (8,)),
+    (gate.and8way_gate, (8,)),
+    (gate.mux4way_gate, (4, 2)),
+    (gate.mux8way_gate, (8, 3)),
+    (alu.half_adder, (BIT, BIT)),
+    (alu.full_adder, (BIT, BIT, BIT)),
+]
+
+
+def structural(tabulated):
+    """The gate's NAND structure, also when lookup tables are turned off"""
+    return getattr(tabulated, "__wrapped__", tabulated)
+
+
+def all_inputs(widths):
+    """Every argument list of a gate, buses as lists"""
+    choices = [(0, 1) if width == BIT else [list(bits) for bits in product((0, 1), repeat=width)]
+               for width in widths]
+    return product(*choices)
+
+
+class TestLookupTable(unittest.TestCase):
+
+    def test_tables_match_structure(self):
+        for tabulated, widths in TABULATED:
+            for arguments in all_inputs(widths):
+                self.assertEqual(structural(tabulated)(*arguments), tabulated(*arguments),
+                                 f"{tabulated.__name__}{arguments}")
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            mux4way = structural(gate.mux4way_gate)
+            built = tabulate(mux4way, (4, 2), cache_dir)
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+            self.assertEqual("mux4way_gate", built.__name__)
+
+            loaded = tabulate(mux4way, (4, 2), cache_dir)
+            for arguments in all_inputs((4, 2)):
+                self.assertEqual(mux4way(*arguments), loaded(*arguments))
+
+            # a damaged table is rebuilt
+            path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+            with open(path, "wb") as f:
+                f.write(b"HLUT")
+            rebuilt = tabulate(mux4way, (4, 2), cache_dir)
+            self.assertEqual(mux4way([0, 0, 1, 0], [0, 1]), rebuilt([0, 0, 1, 0], [0, 1]))
+            self.assertEqual(6 + 64, os.path.getsize(path))
+
+    def test_cache_keyed_by_source(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            tabulate(structural(gate.mux_gate), (BIT, BIT, BIT), cache_dir)
+            tabulate(structural(gate.xor_gate), (BIT, BIT), cache_dir)
+            tabulate(structural(gate.xor_gate), (BIT, BIT), cache_dir)
+            self.assertEqual(2, len(os.listdir(cache_dir)))
+
+    @unittest.skipUnless(lut.ENABLED, "lookup tables are turned off")
+    def test_table_built_on_first_call(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            default = lut.CACHE_DIR
+            lut.CACHE_DIR = cache_dir
+            try:
+                xor = lookup_table(BIT, BIT)(structural(gate.xor_gate))
+                self.assertEqual([], os.listdir(cache_dir))
+                self.assertEqual("xor_gate", xor.__name__)
+                self.assertEqual(1, xor(0, 1))
+                self.assertEqual(1, len(os.listdir(cache_dir)))
+                self.assertEqual((0, 1, 1, 0), xor.__globals__["_table"])
+            finally:
+                lut.CACHE_DIR = default
+
+    def test_rejects_mutable_outputs(self):
+        with self.assertRaises(ValueError):
+            tabulate(gate.not16_gate, (16,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,14 @@
+import array
 import unittest
 
 from cpu.memory import *
 from tests.util import *
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class MockGate:
     def __init__(self, clock):
@@ -146,6 +152,56 @@ class TestMemory(unittest.TestCase):
         ram.set_address_bus([1, 1])
         self.assertEqual(expected[3], ram.get_output_bus())
 
+    def test_nram_load(self):
+        clock = ChipClock()
+        ram = NRAM(16, clock)
+        mock = MockGate(clock)
+
+        self.assertEqual(2, ram.load(b"\x12\x34\xff\xff", 1))
+        ram.load(array.array("H", [7, 8]), 4)
+        ram.load([9, -1, 0x10002], 13)
+        self.assertEqual([0, 0x1234, 0xFFFF, 0, 7, 8, 0, 0, 0, 0, 0, 0, 0, 9, 0xFFFF, 2], list(ram.view()))
+
+        ram.set_address_bus([0, 0, 0, 1])
+        self.assertEqual(int16_as_register(0x1234), ram.get_output_bus())
+        self.assertFalse(mock.tick_called)
+        self.assertEqual(0, clock.cycle)
+
+        with self.assertRaises(ValueError):
+            ram.load([1, 2], 15)
+        with self.assertRaises(ValueError):
+            ram.load(b"\x00")
+
+    def test_nram_view_dump_fill(self):
+        ram = NRAM(8, ChipClock())
+        ram.fill(0xAAAA, 2, 5)
+        self.assertEqual([0, 0, 0xAAAA, 0xAAAA, 0xAAAA, 0, 0, 0], list(ram.view()))
+        self.assertEqual(b"\xaa\xaa\xaa\xaa", ram.dump(3, 5))
+
+        # a view shares the registers
+        view = ram.view(6)
+        view[1] = 5
+        ram.set_address_bus([1, 1, 1])
+        self.assertEqual(int16_as_register(5), ram.get_output_bus())
+
+        other = NRAM(8, ChipClock())
+        other.load(ram.dump())
+        self.assertEqual(list(ram.view()), list(other.view()))
+
+        with self.assertRaises(ValueError):
+            ram.view(4, 9)
+
+    @unittest.skipIf(numpy is None, "NumPy not installed")
+    def test_nram_numpy(self):
+        ram = NRAM(8, ChipClock())
+        ram.load(numpy.arange(4, dtype=numpy.uint16) + 1, 2)
+        ram.load(numpy.array([3, 4], dtype=numpy.int64), 6)
+        words = ram.to_numpy()
+        self.assertEqual([0, 0, 1, 2, 3, 4, 3, 4], words.tolist())
+
+        words[0] = 99
+        self.assertEqual(99, ram.view()[0])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
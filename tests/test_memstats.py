@@ -0,0 +1,118 @@
+import unittest
+
+from assembler.assembler import assemble
+from cpu.computer import Computer
+from emulator.emulator import Emulator
+from emulator.jit import JitEmulator
+from emulator.memstats import MemoryStats
+from tests.util import assemble_repo_file
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# reads 5 and 6 once, writes 6 twice, then loops
+PROGRAM = "@5\nD=M\n@6\nM=D+1\nM=M+1\n(END)\n@END\n0;JMP"
+
+
+class TestMemoryStats(unittest.TestCase):
+
+    def test_emulator_counts(self):
+        for engine in (Emulator, JitEmulator):
+            emu = engine(assemble(PROGRAM), {5: 10})
+            emu.memory_stats = MemoryStats()
+            emu.run(100)
+            stats = emu.memory_stats
+            self.assertEqual(12, emu.ram[6])
+            self.assertEqual([(6, 1, 2), (5, 1, 0)], stats.hottest())
+            self.assertEqual((2, 2), (stats.total_reads(), stats.total_writes()))
+            self.assertEqual(100, stats.cycles)
+
+    def test_sampling(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        full = Emulator(rom, {0: 1000, 1: 30})
+        full.memory_stats = MemoryStats()
+        full.run(20000)
+
+        sampled = Emulator(rom, {0: 1000, 1: 30})
+        sampled.memory_stats = MemoryStats(period=1000, window=100)
+        sampled.run(20000)
+        self.assertEqual(30000, sampled.ram[2])
+        stats = sampled.memory_stats
+        self.assertEqual((2000, 18000), (stats.cycles, stats.skipped_cycles))
+        self.assertEqual(10, stats.scale())
+        estimate = stats.scale()*stats.total_reads()
+        self.assertAlmostEqual(full.memory_stats.total_reads(), estimate, delta=estimate/20)
+        self.assertIn("sampled 2000 of 20000 cycles", stats.report())
+
+    def test_sampling_stops_at_halt(self):
+        for engine in (Emulator, JitEmulator):
+            emu = engine(assemble(PROGRAM), {5: 10})
+            emu.memory_stats = MemoryStats(period=2**16)
+            executed = emu.run(3000000, until_halt=True)
+            self.assertTrue(emu.halted)
+            self.assertLess(executed, 2**17)
+            stats = emu.memory_stats
+            self.assertEqual(executed, stats.cycles + stats.skipped_cycles)
+
+            emu.run(3000000)
+            self.assertIsNotNone(emu.idle_loop, "idle loops are skipped between windows")
+            self.assertEqual(executed + 3000000, stats.cycles + stats.skipped_cycles)
+
+    def test_watchpoint_while_counting(self):
+        emu = Emulator(assemble(PROGRAM), {5: 10})
+        emu.memory_stats = MemoryStats()
+        emu.add_watchpoint(6)
+        emu.run(100)
+        self.assertEqual(3, emu.pc)
+        emu.run(1)
+        stats = emu.memory_stats
+        self.assertEqual((1, 1, 0), (stats.writes[6], stats.reads[5], stats.reads[6]),
+                         "the write stopped at is counted once")
+
+    def test_nram_counts(self):
+        computer = Computer(assemble(PROGRAM), {5: 10})
+        computer.memory_stats = MemoryStats()
+        computer.run(5)
+        stats = computer.memory_stats
+        self.assertEqual(5, stats.cycles)
+        self.assertEqual(2, stats.writes[6])
+        # the chips read the word at A on every cycle
+        self.assertEqual(5, stats.total_reads())
+
+    def test_pages_and_export(self):
+        stats = MemoryStats(size=1024)
+        stats.reads[3] = 4
+        stats.writes[300] = 2
+        stats.reads[1023] = 1
+        self.assertEqual([(0, 4, 0), (256, 0, 2), (512, 0, 0), (768, 1, 0)], stats.pages())
+        self.assertEqual("address,reads,writes\n3,4,0\n300,0,2\n1023,1,0\n", stats.to_csv())
+        self.assertEqual("address,reads,writes\n0,4,2\n512,1,0\n", stats.to_csv(page_size=512))
+
+        heatmap = stats.heatmap(page_size=64).splitlines()
+        self.assertEqual("     0 |@   *          =|", heatmap[0])
+
+    @unittest.skipIf(numpy is None, "NumPy not installed")
+    def test_numpy(self):
+        stats = MemoryStats(size=1024)
+        stats.reads[3] = 4
+        stats.writes[300] = 2
+        stats.reads[1023] = 1
+        counts = stats.to_numpy()
+        self.assertEqual((2, 1024), counts.shape)
+        self.assertEqual(4, counts[0, 3])
+        self.assertEqual([[4, 0, 0, 1], [0, 2, 0, 0]], stats.to_numpy(page_size=256).tolist())
+        self.assertEqual([[4, 1], [2, 0]], stats.to_numpy(page_size=1000).tolist())
+
+    def test_report_regions(self):
+        emu = Emulator(assemble_repo_file("asm", "screenfill.asm"))
+        emu.memory_stats = MemoryStats()
+        emu.run(1000)
+        report = emu.memory_stats.report()
+        self.assertIn("16384 |", report)
+        self.assertIn("SCREEN", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
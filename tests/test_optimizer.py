@@ -0,0 +1,142 @@
+import unittest
+
+from assembler.assembler import assemble
+from assembler.optimizer import OptimizationReport
+from assembler.parser import AsmParser
+from assembler.sourcemap import SourceMap
+from assembler import optimizer
+from benchmarks.peephole import cycles_to_write, same_writes
+from tests.util import repo_path
+
+
+def optimized_commands(asm):
+    p = AsmParser(asm)
+    report = optimizer.optimize(p)
+    return [command for command, _ in p.get_commands()], report
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def test_redundant_a_load(self):
+        commands, report = optimized_commands("""
+            @SP
+            M=M+1
+            @SP
+            A=M
+            @SP
+            M=D
+        """)
+        self.assertEqual(["@SP", "M=M+1", "A=M", "@SP", "M=D"], commands)
+        self.assertEqual(1, report.rewrites["redundant_a_load"])
+
+    def test_redundant_a_load_aliases(self):
+        commands, _ = optimized_commands("@R0\nM=0\n@SP\nM=1\n@0\nD=M")
+        self.assertEqual(["@R0", "M=0", "M=1", "D=M"], commands)
+
+    def test_label_resets_known_a(self):
+        commands, _ = optimized_commands("@x\nM=0\n(L)\n@x\nM=M+1\n@L\n0;JMP")
+        self.assertEqual(["@x", "M=0", "(L)", "@x", "M=M+1", "@L", "0;JMP"], commands)
+
+    def test_jump_to_next(self):
+        commands, report = optimized_commands("""
+            @NEXT
+            D;JEQ
+            (NEXT)
+            @x
+            M=D
+            @SKIP
+            D=D-1;JGT
+            (SKIP)
+            M=D
+        """)
+        self.assertEqual(["(NEXT)", "@x", "M=D", "@SKIP", "D=D-1", "(SKIP)", "M=D"], commands)
+        self.assertEqual(2, report.rewrites["jump_to_next"])
+
+    def test_unreachable(self):
+        commands, report = optimized_commands("""
+            @END
+            0;JMP
+            D=1
+            @x
+            (UNUSED)
+            M=D
+            (END)
+            @END
+            0;JMP
+            D=0
+        """)
+        # once the dead code is gone, the first jump only goes to the next instruction
+        self.assertEqual(["(END)", "@END", "0;JMP"], commands)
+        self.assertEqual(4, report.rewrites["unreachable"])
+        self.assertEqual(1, report.rewrites["jump_to_next"])
+
+    def test_jump_chain(self):
+        commands, report = optimized_commands("""
+            @A1
+            0;JMP
+            (A1)
+            @A2
+            0;JMP
+            (A2)
+            @FINAL
+            0;JMP
+            (FINAL)
+            D=1
+            @A1
+            D;JNE
+            M=D
+        """)
+        # the conditional jump keeps @A1 because its fall-through uses A, so
+        # A1 stays, now jumping straight to FINAL
+        self.assertEqual(
+            ["@FINAL", "0;JMP", "(A1)", "@FINAL", "(FINAL)", "D=1", "@A1", "D;JNE", "M=D"], commands)
+        self.assertGreater(report.rewrites["jump_chain"], 0)
+
+    def test_numeric_jump_target_relocated(self):
+        asm = """
+            @4
+            0;JMP
+            D=1
+            D=1
+            D=0
+            @4
+            0;JMP
+        """
+        commands, _ = optimized_commands(asm)
+        self.assertEqual(["@$rom.4", "($rom.4)", "D=0", "@$rom.4", "0;JMP"], commands)
+        self.assertEqual(
+            "0000000000000001\n1110101010010000\n"
+            "0000000000000001\n1110101010000111\n",
+            assemble(asm, optimize=True))
+
+    def test_report(self):
+        report = OptimizationReport()
+        assemble("@x\nM=0\n@x\nM=1\n", optimize=True, optimization_report=report)
+        self.assertEqual(4, report.words_before)
+        self.assertEqual(3, report.words_after)
+        self.assertEqual(1, report.words_saved)
+
+    def test_source_map_keeps_original_lines(self):
+        source_map = SourceMap()
+        assemble("@x\nM=0\n@x\nM=1\n", source_map, optimize=True)
+        self.assertEqual([1, 2, 4], source_map.lines)
+
+    def test_pong_differential(self):
+        with open(repo_path("tests", "data", "Pong.asm"), "r") as f:
+            asm = f.read()
+
+        report = OptimizationReport()
+        original_map = SourceMap()
+        optimized_map = SourceMap()
+        original = assemble(asm, original_map)
+        optimized = assemble(asm, optimized_map, optimize=True, optimization_report=report)
+        self.assertGreater(report.words_saved, 0)
+
+        original_cycles, original_log = cycles_to_write(original, 50000)
+        optimized_cycles, optimized_log = cycles_to_write(optimized, 50000)
+        self.assertTrue(same_writes(original_log, original_map, optimized_log, optimized_map))
+        self.assertLess(optimized_cycles, original_cycles)
+
+
+if __name__ == '__main__':
+    unittest.main()
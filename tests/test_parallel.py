@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from assembler.assembler import assemble
+from assembler.parallel import assemble_parallel, assemble_file_parallel
+from tests.util import repo_path
+
+
+class TestParallelAssembler(unittest.TestCase):
+
+    def test_pong_identical(self):
+        with open(repo_path("tests", "data", "Pong.asm"), "r") as f:
+            asm = f.read()
+
+        self.assertEqual(assemble(asm), assemble_parallel(asm, workers=2, chunks=7))
+
+    def test_variable_order_across_chunks(self):
+        # @later is a label defined in the last chunk, used before any variable
+        asm = "\n".join([
+            "@later", "0;JMP",
+            "@b", "M=1",
+            "@a", "M=1",
+            "(later)",
+            "@c", "M=1",
+            "@a", "M=0",
+            "@b", "D=M",
+        ]) + "\n"
+        expected = assemble(asm)
+        for chunks in range(1, 8):
+            self.assertEqual(expected, assemble_parallel(asm, workers=2, chunks=chunks), f"{chunks} chunks")
+
+    def test_duplicate_label_across_chunks(self):
+        asm = "(A)\nD=0\n" + "D=1\n"*20 + "(A)\nD=0\n"
+        with self.assertRaises(Exception) as context:
+            assemble_parallel(asm, workers=2, chunks=4)
+        self.assertIn("line 22", str(context.exception))
+
+    def test_syntax_error_line_number(self):
+        asm = "D=1\n"*30 + "D=Q\n"
+        with self.assertRaises(Exception) as context:
+            assemble_parallel(asm, workers=2, chunks=3)
+        self.assertIn("line 30", str(context.exception))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            output = os.path.join(d, "Pong.hack")
+            assemble_file_parallel(repo_path("tests", "data", "Pong.asm"), output, workers=2, chunks=5)
+            with open(output, "r") as f:
+                actual = f.read()
+
+        with open(repo_path("tests", "data", "Pong.asm"), "r") as f:
+            self.assertEqual(assemble(f.read()), actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
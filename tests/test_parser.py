@@ -1,5 +1,7 @@
 import unittest
-from assembler.parser import _is_a_type, _is_c_type, _is_l_type, AsmParser, Command
+from assembler.parser import _is_a_type, _is_c_type, _is_l_type, AsmParser, AsmBytesParser, Command
+from assembler.parser import C_COMMAND_COMP, C_COMMAND_DEST, C_COMMAND_JUMP, _VALID_C_COMMANDS
+from tests.util import repo_path
 
 
 class TestParser(unittest.TestCase):
@@ -39,6 +41,20 @@ class TestParser(unittest.TestCase):
         # dest+comp+jump
         self.assertTrue(_is_c_type("D=D|M;JEQ"))
 
+    def test_c_command_bits(self):
+        count = 0
+        for d, dest in C_COMMAND_DEST.items():
+            for c, comp in C_COMMAND_COMP.items():
+                for j, jump in C_COMMAND_JUMP.items():
+                    key = (d + "=" if d != "null" else "") + c + (";" + j if j != "null" else "")
+                    self.assertEqual("111" + comp + dest + jump, _VALID_C_COMMANDS[key])
+                    count += 1
+        self.assertEqual(1792, count)
+
+    def test_not_c_command(self):
+        for s in ("null=D", "D;null", "=D", "D;", "A=D=M", "", "D=M;JMP;JMP", "D=X", "d=M"):
+            self.assertFalse(_is_c_type(s), s)
+
     def test_is_l_command(self):
         self.assertTrue(_is_l_type("(LOOP)"))
         self.assertTrue(_is_l_type("(Symbol)"))
@@ -50,6 +66,7 @@ class TestParser(unittest.TestCase):
         self.assertFalse(_is_l_type("(symbol"))
         self.assertFalse(_is_l_type("symbol)"))
         self.assertFalse(_is_l_type("symbol"))
+        self.assertFalse(_is_l_type("(ab-)"))
 
     def test_get_command_type(self):
         asm = """// this is a comment
@@ -199,6 +216,79 @@ class TestParser(unittest.TestCase):
         self.assertEqual("AM", p.get_dest())
         p.advance()
         self.assertEqual("AMD", p.get_dest())
+
+
+class TestBytesParser(unittest.TestCase):
+    def assert_same_commands(self, asm):
+        p = AsmParser(asm)
+        bp = AsmBytesParser(asm.encode())
+        while p.has_more():
+            self.assertTrue(bp.has_more())
+            p.advance()
+            bp.advance()
+            t = p.command_type()
+            self.assertEqual(t, bp.command_type())
+            self.assertEqual(p.get_line_number(), bp.get_line_number())
+            if t is Command.C_COMMAND:
+                self.assertEqual(p.get_dest(), bp.get_dest())
+                self.assertEqual(p.get_comp(), bp.get_comp())
+                self.assertEqual(p.get_jump(), bp.get_jump())
+                self.assertEqual(p.get_c_bits(), bp.get_c_bits())
+            else:
+                self.assertEqual(p.get_symbol(), bp.get_symbol())
+
+        self.assertFalse(bp.has_more())
+
+    def test_same_as_string_parser(self):
+        self.assert_same_commands("""// this is a comment
+
+        (LOOP)
+            @SCREEN
+            M=1
+\t\t\t@KBD\r
+            D=M;JLE   // an inline comment
+            @123// another inline comment
+        (END)
+            @END
+            0;JMP""")
+
+    def test_same_as_string_parser_pong(self):
+        with open(repo_path("tests", "data", "Pong.asm"), "r") as f:
+            self.assert_same_commands(f.read())
+
+    def test_first_line(self):
+        p = AsmBytesParser(b"\n\n@i\nD=M\n\n(x)\n", 10)
+        lines = []
+        while p.has_more():
+            p.advance()
+            lines.append(p.get_line_number())
+        self.assertEqual([12, 13, 15], lines)
+
+    def test_reset(self):
+        p = AsmBytesParser(b"@i\nD=M\n")
+        p.advance()
+        p.advance()
+        self.assertFalse(p.has_more())
+        p.reset()
+        p.advance()
+        self.assertEqual("i", p.get_symbol())
+
+    def test_wrong_command_kind(self):
+        p = AsmBytesParser(b"@i\nD=M\n")
+        p.advance()
+        with self.assertRaises(Exception):
+            p.get_comp()
+        p.advance()
+        with self.assertRaises(Exception):
+            p.get_symbol()
+
+    def test_invalid_commands(self):
+        for asm in (b"@-1", b"@1symbol", b"(LOOP", b"(a-b)", b"D=X", b"\n\nD = M", b"@123\n(123)"):
+            with self.assertRaises(SyntaxError):
+                AsmBytesParser(asm)
+
+        with self.assertRaisesRegex(SyntaxError, "line 2"):
+            AsmBytesParser(b"@i\n\nD=Q\n")
         
         
 if __name__ == '__main__':
@@ -0,0 +1,56 @@
+import unittest
+
+from assembler.assembler import assemble
+from assembler.sourcemap import SourceMap
+from emulator.emulator import Emulator
+from emulator.profiler import Profiler
+from tests.util import repo_path
+
+
+class TestProfiler(unittest.TestCase):
+
+    def profile_mult(self, r0, r1, cycles=400):
+        with open(repo_path("asm", "mult.asm"), "r") as f:
+            asm = f.read()
+
+        source_map = SourceMap()
+        emu = Emulator(assemble(asm, source_map), {0: r0, 1: r1})
+        emu.profiler = Profiler(source_map)
+        emu.run(cycles)
+        return emu
+
+    def test_counts_match_cycles(self):
+        emu = self.profile_mult(5, 3)
+        self.assertEqual(400, emu.profiler.total())
+        self.assertEqual(15, emu.ram[2], "profiled run still computes the result")
+
+    def test_hotspots(self):
+        emu = self.profile_mult(5, 3)
+        address, count, line, label = emu.profiler.hotspots(1)[0]
+        self.assertEqual("END", label, "program spends most cycles in the END loop")
+        self.assertEqual(len(emu.profiler.hotspots(5)), 5)
+
+        regions = dict(emu.profiler.label_cycles())
+        self.assertEqual(4, regions["(start)"])
+        # 5 full iterations of 14 instructions + the final check of 6
+        self.assertEqual(5*14 + 6, regions["LOOP"])
+        self.assertEqual(400 - 4 - 76, regions["END"])
+
+    def test_report_and_folded(self):
+        emu = self.profile_mult(2, 2)
+        report = emu.profiler.report(5)
+        self.assertIn("END", report)
+        folded = emu.profiler.folded().splitlines()
+        total = sum(int(entry.rsplit(" ", 1)[1]) for entry in folded)
+        self.assertEqual(400, total)
+        self.assertTrue(any(entry.startswith("LOOP;line ") for entry in folded))
+
+    def test_profiler_without_source_map(self):
+        emu = Emulator(assemble("@0\n0;JMP"))
+        emu.profiler = Profiler()
+        emu.run(10)
+        self.assertEqual([(0, 5, None, "(start)"), (1, 5, None, "(start)")], emu.profiler.hotspots())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+
+from assembler.assembler import assemble
+from emulator.emulator import Emulator, KBD_ADDRESS
+from emulator.jit import JitEmulator
+from emulator.realtime import RealtimeRunner
+from tests.util import assemble_repo_file
+
+# a frame whose 8192 screen words are all -1
+BLACK = b"\xff"*(64*256)
+
+
+class TestRealtimeRunner(unittest.TestCase):
+
+    def test_keys_and_frames(self):
+        async def session():
+            runner = RealtimeRunner(JitEmulator(assemble_repo_file("asm", "fill.asm")))
+            frames = runner.subscribe()
+            await runner.run(0)
+            initial = frames.get_nowait()
+            self.assertEqual(256, len(initial.rows))
+
+            await runner.keys.put(65)
+            await runner.run(300000)
+            self.assertEqual(65, runner.emulator.ram[KBD_ADDRESS])
+            frame = frames.get_nowait()
+            self.assertEqual(BLACK, frame.data)
+            self.assertTrue(frames.empty(), "only the latest frame is kept")
+            self.assertEqual(runner.emulator.cycle, frame.cycle)
+
+            await runner.keys.put(0)
+            await runner.run(300000)
+            self.assertEqual(bytes(len(BLACK)), frames.get_nowait().data)
+            return runner
+
+        runner = asyncio.run(session())
+        self.assertEqual(600000, runner.cycles)
+        self.assertGreater(runner.frames, 2)
+
+    def test_queued_tap(self):
+        async def session():
+            # stores the first key seen in R0
+            runner = RealtimeRunner(Emulator(assemble("""
+                (WAIT)
+                @KBD
+                D=M
+                @WAIT
+                D;JEQ
+                @0
+                M=D
+                (END)
+                @END
+                0;JMP
+            """)), slice_cycles=1000)
+            await runner.keys.put(65)
+            await runner.keys.put(0)
+            await runner.run(1000)
+            self.assertEqual(1, runner.keys.qsize(), "the release waits for the next slice")
+            await runner.run(1000)
+            return runner
+
+        runner = asyncio.run(session())
+        self.assertEqual(65, runner.emulator.ram[0])
+        self.assertEqual(0, runner.emulator.ram[KBD_ADDRESS])
+
+    def test_pacing(self):
+        async def session():
+            runner = RealtimeRunner(Emulator(assemble_repo_file("asm", "fill.asm")), cycles_per_second=200000)
+            await runner.run(40000)
+            return runner
+
+        runner = asyncio.run(session())
+        self.assertEqual(2000, runner.slice_cycles)
+        self.assertGreater(runner.seconds, 0.19)
+        self.assertLess(runner.throughput(), 210000)
+        self.assertIn("target 200000", runner.report())
+
+    def test_gives_up_lag(self):
+        async def session():
+            # far faster than the emulator can go
+            runner = RealtimeRunner(Emulator(assemble_repo_file("asm", "fill.asm")), cycles_per_second=10**9,
+                                    slice_cycles=10000, max_lag=0.01)
+            await runner.run(200000)
+            return runner
+
+        runner = asyncio.run(session())
+        self.assertAlmostEqual(0.01, runner.max_lag_seen)
+        self.assertGreater(runner.dropped_seconds, 0)
+
+    def test_stop_yields_to_other_tasks(self):
+        async def session():
+            runner = RealtimeRunner(Emulator(assemble("(LOOP)\n@LOOP\n0;JMP")), slice_cycles=1000)
+            runner.emulator.skip_idle = False
+
+            async def stop_soon():
+                await asyncio.sleep(0.05)
+                runner.stop()
+
+            stopper = asyncio.create_task(stop_soon())
+            executed = await runner.run()
+            await stopper
+            return executed
+
+        executed = asyncio.run(session())
+        self.assertGreater(executed, 0)
+        self.assertEqual(0, executed % 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+import zlib
+
+from emulator.emulator import Emulator, SCREEN_ADDRESS, KBD_ADDRESS, SCREEN_ROWS
+from emulator.screen import *
+from tests.util import assemble_repo_file
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestScreen(unittest.TestCase):
+
+    def test_pixel_bit_order(self):
+        ram = [0]*KBD_ADDRESS
+        ram[SCREEN_ADDRESS] = 0b1        # leftmost pixel of row 0
+        ram[SCREEN_ADDRESS + 33] = 0x8000  # pixel 31 of row 1
+        screen = ScreenRenderer(ram)
+        self.assertEqual(1, screen.pixel(0, 0))
+        self.assertEqual(0, screen.pixel(1, 0))
+        self.assertEqual(1, screen.pixel(31, 1))
+        self.assertEqual(b"\x80", screen.packed()[0:1])
+
+    def test_only_dirty_rows_rerendered(self):
+        ram = [0]*KBD_ADDRESS
+        dirty = bytearray(SCREEN_ROWS)
+        screen = ScreenRenderer(ram, dirty)
+
+        ram[SCREEN_ADDRESS + 5*32] = 1
+        ram[SCREEN_ADDRESS + 7*32] = 1
+        dirty[5] = 1
+        self.assertEqual([5], screen.update())
+        self.assertEqual(1, screen.pixel(0, 5))
+        self.assertEqual(0, screen.pixel(0, 7), "row 7 was not marked dirty")
+        self.assertEqual(bytes(SCREEN_ROWS), bytes(dirty))
+        self.assertEqual([], screen.update())
+
+    def test_fill_black(self):
+        emu = Emulator(assemble_repo_file("asm", "fill.asm"))
+        screen = ScreenRenderer(emu.ram, emu.dirty_rows)
+        emu.ram[KBD_ADDRESS] = 65
+        emu.run(120000)
+        self.assertEqual(list(range(SCREEN_ROWS)), screen.update())
+        self.assertEqual(b"\xff"*(64*256), screen.packed())
+
+    def test_image_formats(self):
+        ram = [0]*KBD_ADDRESS
+        ram[SCREEN_ADDRESS] = 1
+        screen = ScreenRenderer(ram)
+
+        pbm = screen.to_pbm()
+        self.assertTrue(pbm.startswith(b"P4\n512 256\n"))
+        ppm = screen.to_ppm()
+        header = b"P6\n512 256\n255\n"
+        self.assertEqual(len(header) + 512*256*3, len(ppm))
+        self.assertEqual(b"\x00\x00\x00\xff\xff\xff", ppm[len(header):len(header) + 6])
+
+        png = screen.to_png()
+        self.assertTrue(png.startswith(b"\x89PNG\r\n\x1a\n"))
+        idat = png.index(b"IDAT")
+        length = int.from_bytes(png[idat - 4:idat], "big")
+        raw = zlib.decompress(png[idat + 4:idat + 4 + length])
+        self.assertEqual(256*65, len(raw))
+        self.assertEqual(b"\x00\x7f", raw[:2])
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "frame.png")
+            screen.save(path)
+            with open(path, "rb") as f:
+                self.assertEqual(png, f.read())
+
+    @unittest.skipIf(numpy is None, "NumPy not installed")
+    def test_numpy(self):
+        ram = [0]*KBD_ADDRESS
+        ram[SCREEN_ADDRESS + 32*255 + 31] = 0x8000
+        bitmap = ScreenRenderer(ram).to_numpy()
+        self.assertEqual((256, 512), bitmap.shape)
+        self.assertEqual(1, bitmap[255, 511])
+        self.assertEqual(1, bitmap.sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from assembler.assembler import assemble
+from assembler.sourcemap import SourceMap
+from assembler import sourcemap
+
+
+class TestSourceMap(unittest.TestCase):
+    asm = """// comment
+    @2
+    D=A
+    (LOOP)
+        D=D-1
+        @LOOP
+        D;JGT
+    (END)
+    (HALT)
+        @END
+        0;JMP
+    """
+
+    def test_lines_and_labels(self):
+        source_map = SourceMap()
+        code = assemble(self.asm, source_map)
+        self.assertEqual(len(code.split()), len(source_map.lines))
+        self.assertEqual([2, 3, 5, 6, 7, 10, 11], source_map.lines)
+        self.assertEqual({"LOOP": 2, "END": 5, "HALT": 5}, source_map.labels)
+
+    def test_label_at(self):
+        source_map = SourceMap()
+        assemble(self.asm, source_map)
+        self.assertIsNone(source_map.label_at(1))
+        self.assertEqual("LOOP", source_map.label_at(2))
+        self.assertEqual("LOOP", source_map.label_at(4))
+        self.assertEqual("HALT", source_map.label_at(6))
+        self.assertEqual(6, source_map.line_at(3))
+        self.assertIsNone(source_map.line_at(100))
+
+    def test_round_trip(self):
+        source_map = SourceMap()
+        assemble(self.asm, source_map)
+        loaded = sourcemap.loads(source_map.dumps())
+        self.assertEqual(source_map.lines, loaded.lines)
+        self.assertEqual(source_map.labels, loaded.labels)
+        self.assertEqual("LOOP", loaded.label_at(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
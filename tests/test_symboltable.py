@@ -0,0 +1,107 @@
+import sys
+import unittest
+
+from assembler.assembler import assemble
+from assembler.symbolstore import CompactSymbols, SpilledSymbols
+from assembler.symboltable import SymbolTable, _PREDEFINED_SYMBOLS
+from tests.util import repo_path
+
+
+class TestSymbolTable(unittest.TestCase):
+    def test_predefined(self):
+        table = SymbolTable()
+        self.assertTrue(table.contains("SCREEN"))
+        self.assertEqual(16384, table.get_address("SCREEN"))
+        self.assertEqual(15, table.get_address("R15"))
+        self.assertEqual({}, table.symbols, "predefined symbols are shared, not copied")
+
+    def test_overlay(self):
+        a = SymbolTable()
+        b = SymbolTable()
+        a.add_symbol("LOOP", 10)
+        self.assertTrue(a.contains("LOOP"))
+        self.assertEqual(10, a.get_address("LOOP"))
+        self.assertFalse(b.contains("LOOP"))
+
+    def test_redefine(self):
+        table = SymbolTable()
+        table.add_symbol("LOOP", 10)
+        with self.assertRaises(Exception):
+            table.add_symbol("LOOP", 11)
+        with self.assertRaises(Exception):
+            table.add_symbol("KBD", 11)
+
+    def test_predefined_immutable(self):
+        with self.assertRaises(TypeError):
+            _PREDEFINED_SYMBOLS["LOOP"] = 1
+
+    def test_try_add(self):
+        table = SymbolTable()
+        self.assertTrue(table.try_add("LOOP", 10))
+        self.assertFalse(table.try_add("LOOP", 11))
+        self.assertFalse(table.try_add("SP", 11))
+        self.assertEqual(10, table.get_address("LOOP"))
+        self.assertEqual({"LOOP": 10}, table.symbols)
+
+    def test_get_or_allocate(self):
+        table = SymbolTable(next_variable_address=20)
+        table.add_symbol("LOOP", 10)
+        self.assertEqual(10, table.get_or_allocate("LOOP"))
+        self.assertEqual(16384, table.get_or_allocate("SCREEN"))
+        self.assertEqual(20, table.get_or_allocate("i"))
+        self.assertEqual(21, table.get_or_allocate("j"))
+        self.assertEqual(20, table.get_or_allocate("i"))
+        self.assertEqual(22, table.next_variable_address)
+        self.assertEqual({"LOOP": 10, "i": 20, "j": 21}, table.symbols)
+
+    def test_interned(self):
+        table = SymbolTable()
+        name = "".join(["var", "iable"])
+        table.get_or_allocate(name)
+        self.assertIs(sys.intern("variable"), next(iter(table.symbols)))
+
+
+class TestSymbolStores(unittest.TestCase):
+
+    def check_mapping(self, symbols):
+        table = SymbolTable(symbols)
+        names = [f"symbol{i}" for i in range(5000)] + ["ünïcode"]
+        for i, name in enumerate(names):
+            self.assertTrue(table.try_add(name, i))
+        self.assertFalse(table.try_add("symbol17", 1))
+        self.assertEqual(len(names), len(symbols))
+
+        for i, name in enumerate(names):
+            self.assertEqual(i, table.get_address(name))
+        self.assertEqual(16, table.get_or_allocate("new"))
+        self.assertEqual(16, symbols["new"])
+        self.assertNotIn("missing", symbols)
+        self.assertIsNone(symbols.get("missing"))
+        with self.assertRaises(KeyError):
+            symbols["missing"]
+
+        symbols["new"] = 17
+        self.assertEqual(17, symbols["new"])
+        self.assertEqual(len(names) + 1, len(symbols))
+        expected = {name: i for i, name in enumerate(names)}
+        expected["new"] = 17
+        self.assertEqual(expected, dict(symbols.items()))
+
+    def test_compact(self):
+        self.check_mapping(CompactSymbols())
+
+    def test_spilled(self):
+        with SpilledSymbols(buffer_size=1000) as symbols:
+            self.check_mapping(symbols)
+
+    def test_assemble(self):
+        with open(repo_path("tests", "data", "Pong.asm"), "r") as f:
+            source = f.read()
+        expected = assemble(source)
+        self.assertEqual(expected, assemble(source, symbols=CompactSymbols()))
+        with SpilledSymbols() as symbols:
+            self.assertEqual(expected, assemble(source, symbols=symbols))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from assembler.assembler import assemble
+from emulator.emulator import Emulator
+from emulator.trace import TraceReader, TraceWriter, first_difference
+from tests.util import repo_path
+
+
+def mult_rom():
+    with open(repo_path("asm", "mult.asm"), "r") as f:
+        return assemble(f.read())
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def record(self, name, ram, cycles=400, **kwargs):
+        filename = os.path.join(self.dir, name)
+        emu = Emulator(mult_rom(), ram)
+        with TraceWriter(filename, **kwargs) as trace:
+            emu.tracer = trace
+            emu.run(cycles)
+        return filename, emu
+
+    def expected(self, ram, cycles=400):
+        """(pc, a, d, address, value) of each cycle, by stepping with a write hook"""
+        emu = Emulator(mult_rom(), ram)
+        writes = []
+        emu.add_write_hook(lambda pc, address, value: writes.append((address, value)))
+        records = []
+        for _ in range(cycles):
+            pc = emu.pc
+            emu.step()
+            address, value = writes.pop() if writes else (None, None)
+            records.append((pc, emu.a, emu.d, address, value))
+        return records
+
+    def test_records_match_execution(self):
+        filename, emu = self.record("mult.trace", {0: 5, 1: 3})
+        self.assertEqual(15, emu.ram[2], "traced run still computes the result")
+
+        with TraceReader(filename) as trace:
+            self.assertEqual(400, len(trace))
+            records = [tuple(record[1:]) for record in trace.records()]
+        self.assertEqual(self.expected({0: 5, 1: 3}), records)
+
+    def test_blocks_and_compression(self):
+        expected = self.expected({0: 7, 1: 6})
+        for compression in (None, "zlib", "lzma"):
+            filename, _ = self.record(f"mult-{compression}.trace", {0: 7, 1: 6}, compression=compression,
+                                      block_records=64)
+            with TraceReader(filename) as trace:
+                self.assertEqual(compression, trace.compression)
+                self.assertEqual(7, len(trace.blocks), "400 records in blocks of 64")
+                self.assertEqual(expected, [tuple(record[1:]) for record in trace.records()])
+
+    def test_seek(self):
+        expected = self.expected({0: 7, 1: 6})
+        filename, _ = self.record("mult.trace", {0: 7, 1: 6}, compression="zlib", block_records=64)
+        with TraceReader(filename) as trace:
+            for cycle in (399, 0, 128, 127, 200):
+                record = trace.record_at(cycle)
+                self.assertEqual(cycle, record.cycle)
+                self.assertEqual(expected[cycle], tuple(record[1:]))
+            with self.assertRaises(KeyError):
+                trace.record_at(400)
+
+            self.assertEqual(list(range(60, 70)), [record.cycle for record in trace.records(60, 70)])
+
+    def test_runs_across_calls(self):
+        filename = os.path.join(self.dir, "mult.trace")
+        emu = Emulator(mult_rom(), {0: 5, 1: 3})
+        with TraceWriter(filename, block_records=64) as trace:
+            emu.tracer = trace
+            for _ in range(100):
+                emu.run(3)
+            emu.step()
+            emu.tracer = None
+            emu.run(10)
+
+        with TraceReader(filename) as trace:
+            self.assertEqual(301, len(trace))
+            self.assertEqual(self.expected({0: 5, 1: 3}, 301), [tuple(record[1:]) for record in trace.records()])
+
+    def test_unclosed_trace(self):
+        filename = os.path.join(self.dir, "unclosed.trace")
+        writer = TraceWriter(filename, compression="zlib", block_records=64)
+        for cycle in range(100):
+            writer.add(cycle, cycle, 0)
+        # stop the background writer without writing the index
+        writer.flush()
+        writer._queue.put(None)
+        writer._thread.join()
+        writer._file.close()
+
+        with TraceReader(filename) as trace:
+            self.assertEqual(100, len(trace))
+            self.assertEqual(99, trace.record_at(99).pc)
+
+    def test_first_difference(self):
+        same, _ = self.record("a.trace", {0: 5, 1: 3}, block_records=64)
+        other, _ = self.record("b.trace", {0: 5, 1: 3}, compression="lzma", block_records=100)
+        with TraceReader(same) as a, TraceReader(other) as b:
+            self.assertIsNone(first_difference(a, b), "blocking and compression do not matter")
+
+        diverged, _ = self.record("c.trace", {0: 6, 1: 3}, block_records=64)
+        with TraceReader(same) as a, TraceReader(diverged) as c:
+            cycle, record_a, record_c = first_difference(a, c)
+        pairs = zip(self.expected({0: 5, 1: 3}), self.expected({0: 6, 1: 3}))
+        self.assertEqual(next(i for i, (x, y) in enumerate(pairs) if x != y), cycle)
+        self.assertNotEqual(record_a, record_c)
+        self.assertEqual(record_a.pc, record_c.pc)
+
+        shorter, _ = self.record("d.trace", {0: 5, 1: 3}, cycles=300)
+        with TraceReader(same) as a, TraceReader(shorter) as d:
+            self.assertEqual((300, a.record_at(300), None), first_difference(a, d))
+
+
+if __name__ == '__main__':
+    unittest.main()
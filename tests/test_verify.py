@@ -0,0 +1,103 @@
+import unittest
+
+from assembler.assembler import assemble
+from emulator.emulator import Emulator
+from emulator.jit import JitEmulator, compile_block
+from emulator.keyboard import key_presses
+from emulator.verify import Verifier
+from tests.util import assemble_repo_file
+
+
+class TestVerifier(unittest.TestCase):
+
+    def test_every_cycle_matches(self):
+        rom = assemble_repo_file("asm", "bubblesort.asm")
+        for engine in (Emulator, JitEmulator):
+            verifier = Verifier(engine(rom, {0: 2048, 1: 6, 2048: 5, 2049: 3, 2050: 9, 2051: 1, 2052: 7, 2053: 2}),
+                                every=1)
+            self.assertEqual(500, verifier.run(500))
+            self.assertIsNone(verifier.divergence, verifier.report())
+            self.assertEqual(500, verifier.checked)
+
+    def test_sampled_cycles(self):
+        rom = assemble_repo_file("asm", "mult.asm")
+        verifier = Verifier(Emulator(rom, {0: 300, 1: 200}), every=100)
+        verifier.run(1000)
+        self.assertEqual(10, verifier.checked)
+        self.assertEqual(1000, verifier.cycles)
+
+        verifier = Verifier(Emulator(rom, {0: 300, 1: 200}), fraction=0.05, seed=1)
+        verifier.run(10000)
+        self.assertTrue(400 < verifier.checked < 600, verifier.checked)
+        self.assertEqual(10000, verifier.emulator.cycle)
+        self.assertEqual(60000, verifier.emulator.ram[2])
+
+        with self.assertRaises(ValueError):
+            Verifier(Emulator(rom), every=10, fraction=0.1)
+
+    def test_keyboard_read(self):
+        emu = Emulator(assemble("@KBD\nD=M\n@0\nM=D\n@0\n0;JMP"))
+        emu.replay(key_presses([(2, 75, 100)]))
+        verifier = Verifier(emu, every=1)
+        verifier.run(6)
+        self.assertIsNone(verifier.divergence, verifier.report())
+        self.assertEqual(0, emu.ram[0])
+        emu.reset()
+        emu.set_key(75)
+        verifier.run(6)
+        self.assertEqual(75, emu.ram[0])
+
+    def test_divergence(self):
+        emu = Emulator(assemble("@7\nD=A\n@20\nM=D+1\n@0\n0;JMP"))
+        # a wrong M=D+1 in the interpreter
+        comp, value, dest, jump, uses_m = emu._program[3]
+        emu._program[3] = (lambda d, a, m: (d + 2) & 0xFFFF, value, dest, jump, uses_m)
+
+        verifier = Verifier(emu, every=1)
+        self.assertEqual(4, verifier.run(100))
+        divergence = verifier.divergence
+        self.assertEqual((3, 3, 20, 7, 0), (divergence.cycle, divergence.pc, divergence.a, divergence.d, divergence.m))
+        self.assertEqual((20, 7, 4, 9), divergence.fast)
+        self.assertEqual((20, 7, 4, 8), divergence.reference)
+        report = verifier.report()
+        self.assertIn("divergence at cycle 3, pc 3: M=D+1", report)
+        self.assertIn("M[20]          9       8  <--", report)
+
+    def test_compiled_block_divergence(self):
+        class MiscompilingEmulator(JitEmulator):
+            def _compile(self, start):
+                # a wrong M=D+1 in the compiled code
+                source, length = compile_block(self.rom, start)
+                namespace = {}
+                exec(source.replace("(d + 1)", "(d + 2)"), namespace)
+                return namespace[f"block_{start}"], length
+
+        emu = MiscompilingEmulator(assemble("@7\nD=A\n@20\nM=D+1\n@0\n0;JMP"))
+        verifier = Verifier(emu, every=1)
+        self.assertEqual(6, verifier.run(100))
+        self.assertEqual(9, emu.ram[20])
+        divergence = verifier.divergence
+        self.assertEqual((0, 0, 6, 20, 0), (divergence.cycle, divergence.pc, divergence.length, divergence.address,
+                                            divergence.m))
+        self.assertEqual((0, 7, 0, 9), divergence.fast)
+        self.assertEqual((0, 7, 0, 8), divergence.reference)
+        report = verifier.report()
+        self.assertIn("divergence in the block of 6 instructions at cycle 0, pc 0:", report)
+        self.assertIn("       3: M=D+1", report)
+        self.assertIn("M[20]          9       8  <--", report)
+
+    def test_stops_at_breakpoint(self):
+        emu = Emulator(assemble_repo_file("asm", "mult.asm"), {0: 3, 1: 5})
+        emu.add_breakpoint(4)
+        verifier = Verifier(emu, every=1)
+        verifier.run(100)
+        self.assertEqual(4, emu.pc)
+        self.assertEqual("breakpoint", emu.hit.kind)
+        cycle = emu.cycle
+        verifier.run(1)
+        self.assertEqual(cycle + 1, emu.cycle, "goes on past the breakpoint")
+        self.assertIsNone(verifier.divergence)
+
+
+if __name__ == '__main__':
+    unittest.main()
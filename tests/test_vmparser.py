@@ -0,0 +1,67 @@
+import unittest
+
+from vmtranslator.parser import VmParser, VmCommand
+
+
+class TestVmParser(unittest.TestCase):
+
+    def test_commands(self):
+        vm = """// comment
+        push constant 7   // inline comment
+        pop local 2
+        add
+
+        label LOOP
+        if-goto LOOP
+        goto END
+        function Main.f 3
+        call Main.f 1
+        return
+        """
+        expected = [
+            (VmCommand.PUSH, "constant", 7),
+            (VmCommand.POP, "local", 2),
+            (VmCommand.ARITHMETIC, "add", None),
+            (VmCommand.LABEL, "LOOP", None),
+            (VmCommand.IF_GOTO, "LOOP", None),
+            (VmCommand.GOTO, "END", None),
+            (VmCommand.FUNCTION, "Main.f", 3),
+            (VmCommand.CALL, "Main.f", 1),
+            (VmCommand.RETURN, None, None),
+        ]
+
+        p = VmParser(vm)
+        for command_type, arg1, arg2 in expected:
+            self.assertTrue(p.has_more())
+            p.advance()
+            self.assertEqual(command_type, p.command_type())
+            if arg1 is not None:
+                self.assertEqual(arg1, p.arg1())
+            if arg2 is not None:
+                self.assertEqual(arg2, p.arg2())
+
+        self.assertFalse(p.has_more())
+
+    def test_line_numbers(self):
+        p = VmParser("\n// x\npush constant 1\n\nadd")
+        p.advance()
+        self.assertEqual(2, p.get_line_number())
+        p.advance()
+        self.assertEqual(4, p.get_line_number())
+
+    def test_errors(self):
+        for vm in ["jump LOOP", "push constant", "push heap 1", "pop constant 1", "push local x", "return 1"]:
+            with self.assertRaises(SyntaxError, msg=vm):
+                VmParser(vm)
+
+        p = VmParser("add\nreturn")
+        p.advance()
+        with self.assertRaises(Exception):
+            p.arg2()
+        p.advance()
+        with self.assertRaises(Exception):
+            p.arg1()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+
+from assembler.assembler import assemble
+from emulator.emulator import Emulator
+from vmtranslator.codewriter import SPEED, SIZE, CodeWriter
+from vmtranslator.translator import translate, translate_file
+from tests.util import repo_path
+
+# SP, LCL, ARG, THIS, THAT for tests that run without bootstrap
+_SEGMENTS = {0: 256, 1: 300, 2: 400, 3: 3000, 4: 3010}
+
+
+def run_vm(vm, mode, cycles=2000, ram=None):
+    """Translate vm without bootstrap, run it and return the emulator"""
+    asm = translate([("Test", vm + "\nlabel HALT\ngoto HALT\n")], mode, bootstrap=False)
+    initial = dict(_SEGMENTS)
+    initial.update(ram or {})
+    emu = Emulator(assemble(asm), initial)
+    emu.run(cycles)
+    return emu
+
+
+def stack(emu):
+    return emu.ram[256:emu.ram[0]]
+
+
+class TestVmTranslator(unittest.TestCase):
+
+    def test_arithmetic(self):
+        vm = """
+            push constant 7
+            push constant 8
+            add
+            push constant 20
+            sub
+            neg
+            push constant 12
+            push constant 10
+            and
+            push constant 5
+            push constant 3
+            or
+            push constant 0
+            not
+        """
+        for mode in (SPEED, SIZE):
+            emu = run_vm(vm, mode)
+            self.assertEqual([5, 8, 7, 0xFFFF], stack(emu), mode)
+
+    def test_comparisons(self):
+        cases = [(3, 3), (3, 4), (4, 3), (0, 1), (1, 0)]
+        for mode in (SPEED, SIZE):
+            for x, y in cases:
+                vm = "\n".join(f"push constant {x}\npush constant {y}\n{op}" for op in ("eq", "gt", "lt"))
+                emu = run_vm(vm, mode)
+                expected = [0xFFFF if x == y else 0, 0xFFFF if x > y else 0, 0xFFFF if x < y else 0]
+                self.assertEqual(expected, stack(emu), f"{mode}: {x} vs {y}")
+
+    def test_negative_comparison(self):
+        vm = "push constant 1\nneg\npush constant 1\nlt"
+        for mode in (SPEED, SIZE):
+            self.assertEqual([0xFFFF], stack(run_vm(vm, mode)), mode)
+
+    def test_segments(self):
+        vm = """
+            push constant 10
+            pop local 0
+            push constant 21
+            pop local 5
+            push constant 36
+            pop argument 2
+            push constant 3030
+            pop pointer 0
+            push constant 3040
+            pop pointer 1
+            push constant 42
+            pop this 6
+            push constant 45
+            pop that 2
+            push constant 510
+            pop temp 6
+            push constant 77
+            pop static 3
+            push local 0
+            push local 5
+            push argument 2
+            push this 6
+            push that 2
+            push temp 6
+            push static 3
+            push pointer 1
+        """
+        for mode in (SPEED, SIZE):
+            emu = run_vm(vm, mode)
+            self.assertEqual(10, emu.ram[300])
+            self.assertEqual(21, emu.ram[305])
+            self.assertEqual(36, emu.ram[402])
+            self.assertEqual(42, emu.ram[3036])
+            self.assertEqual(45, emu.ram[3042])
+            self.assertEqual(510, emu.ram[11])
+            self.assertEqual([10, 21, 36, 42, 45, 510, 77, 3040], stack(emu), mode)
+
+    def test_branching(self):
+        vm = """
+            push constant 0
+            pop local 0
+            push constant 5
+            pop argument 0
+        label LOOP
+            push argument 0
+            push local 0
+            add
+            pop local 0
+            push argument 0
+            push constant 1
+            sub
+            pop argument 0
+            push argument 0
+            if-goto LOOP
+            push local 0
+        """
+        for mode in (SPEED, SIZE):
+            self.assertEqual([15], stack(run_vm(vm, mode)), mode)
+
+    def test_fibonacci(self):
+        results = {}
+        for mode in (SPEED, SIZE):
+            with open(repo_path("tests", "data", "Fib", "Main.vm")) as f:
+                main = f.read()
+            with open(repo_path("tests", "data", "Fib", "Sys.vm")) as f:
+                sys = f.read()
+
+            code = assemble(translate([("Main", main), ("Sys", sys)], mode))
+            emu = Emulator(code, {5: 12})
+            emu.run(300000)
+            self.assertEqual(144, emu.ram[6], mode)
+            results[mode] = len(code.split())
+
+        self.assertLess(results[SIZE], results[SPEED], "size mode uses less ROM")
+
+    def test_translate_file_directory(self):
+        import tempfile
+        import os
+
+        with tempfile.TemporaryDirectory() as d:
+            output = os.path.join(d, "Fib.asm")
+            translate_file(repo_path("tests", "data", "Fib"), output, SIZE)
+            with open(output) as f:
+                asm = f.read()
+
+        self.assertTrue(asm.startswith("// bootstrap"))
+        self.assertIn("($$CALL)", asm)
+        self.assertIn("($$RETURN)", asm)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            CodeWriter("fast")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,35 +1,28 @@
-from cpu.alu import inc16
-from cpu.gate import not16_gate
+import os
+
+from assembler.assembler import assemble
+from cpu.codec import int_to_bits, word_to_bits
 
 
 def int_as_register(integer, n):
     """ Convert a (nonnegative) integer to a register of n-bits.
     int_as_register(9, 4) returns [1,0,0,1]
+    Overflow beyond n bits is discarded.
     """
-
-    register = [1 if digit == '1' else 0 for digit in bin(integer)[2:]]
-
-    if len(register) == n:
-        return register
-    elif len(register) > n:
-        # return least significant n bits, discarding overflow
-        return register[-n:]
-    else:
-        # pad with zeros
-        while len(register) < n:
-            register = [0] + register
-
-        return register
+    return list(int_to_bits(integer, n))
 
 
 def int16_as_register(integer):
-    mag = abs(integer)
+    """ Convert an integer to a 16-bit register, in 2's complement if negative"""
+    return list(word_to_bits(integer))
+
 
-    output = int_as_register(mag, 16)
+def repo_path(*parts):
+    """Absolute path to a file in the repository, independent of working dir"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), *parts)
 
-    if integer < 0:
-        # do 2's complement for negative
-        complement = not16_gate(output)
-        inc16(complement, output)
 
-    return output
+def assemble_repo_file(*parts):
+    """Assemble a .asm file from the repository, returning Hack-machine code"""
+    with open(repo_path(*parts), "r") as f:
+        return assemble(f.read())
@@ -0,0 +1,296 @@
+"""Write Hack assembly for VM commands.
+
+Two modes trade ROM footprint against cycle count:
+
+  speed: call, return and the comparisons eq/gt/lt are expanded inline at
+         every use, so they take no extra jumps.
+  size:  they are emitted once as shared subroutines and every use is a
+         short jump sequence. Each use costs a few cycles more, but Pong
+         sized programs shrink considerably.
+
+Register use: R13 and R14 are scratch registers for pop and calls, R15
+holds the return address into a shared subroutine.
+"""
+import io
+
+SPEED = "speed"
+SIZE = "size"
+
+# Base pointer symbol of segments addressed through a pointer
+_POINTER_SEGMENTS = {
+    "local": "LCL",
+    "argument": "ARG",
+    "this": "THIS",
+    "that": "THAT",
+}
+
+_POINTER_BASE = 3
+_TEMP_BASE = 5
+
+# Offsets up to this are reached with repeated A=A+1 rather than address arithmetic
+_MAX_INCREMENT_OFFSET = 3
+
+_BINARY_OPERATIONS = {
+    "add": "M=D+M",
+    "sub": "M=M-D",
+    "and": "M=D&M",
+    "or": "M=D|M",
+}
+
+_UNARY_OPERATIONS = {
+    "neg": "M=-M",
+    "not": "M=!M",
+}
+
+# comparison -> jump taken when x-y satisfies it
+_COMPARISONS = {
+    "eq": "JEQ",
+    "gt": "JGT",
+    "lt": "JLT",
+}
+
+# names of shared subroutines in size mode
+_CALL_ROUTINE = "$$CALL"
+_RETURN_ROUTINE = "$$RETURN"
+
+
+def _compare_routine(comparison):
+    return f"$${comparison.upper()}"
+
+
+class CodeWriter:
+    def __init__(self, mode=SPEED):
+        if mode not in (SPEED, SIZE):
+            raise ValueError(f"Unknown code writer mode: {mode}")
+
+        self.mode = mode
+        self._out = io.StringIO()
+        self._file_name = ""
+        self._function = ""
+        self._label_count = 0
+        self._used_routines = set()
+
+    def set_file_name(self, file_name):
+        """Start translating a new .vm file; static variables are named after it"""
+        self._file_name = file_name
+
+    def getvalue(self):
+        """Assembly written so far, followed by any shared subroutines used"""
+        routines = io.StringIO()
+        for name in sorted(self._used_routines):
+            _ROUTINE_WRITERS[name](self, routines)
+
+        return self._out.getvalue() + routines.getvalue()
+
+    def _write(self, *lines):
+        for line in lines:
+            self._out.write(line)
+            self._out.write("\n")
+
+    def _unique_label(self, kind):
+        self._label_count += 1
+        prefix = self._function or self._file_name
+        return f"{prefix}${kind}.{self._label_count}"
+
+    def write_bootstrap(self):
+        """SP=256, call Sys.init"""
+        self._write("// bootstrap", "@256", "D=A", "@SP", "M=D")
+        self.write_call("Sys.init", 0)
+
+    def write_comment(self, text):
+        self._write(f"// {text}")
+
+    def write_arithmetic(self, command):
+        if command in _BINARY_OPERATIONS:
+            self._write("@SP", "AM=M-1", "D=M", "A=A-1", _BINARY_OPERATIONS[command])
+        elif command in _UNARY_OPERATIONS:
+            self._write("@SP", "A=M-1", _UNARY_OPERATIONS[command])
+        elif command in _COMPARISONS:
+            if self.mode == SIZE:
+                routine = _compare_routine(command)
+                self._used_routines.add(routine)
+                self._jump_to_routine(routine)
+            else:
+                end = self._unique_label(command.upper())
+                self._write(
+                    "@SP", "AM=M-1", "D=M", "A=A-1", "D=M-D", "M=-1",
+                    f"@{end}", f"D;{_COMPARISONS[command]}",
+                    "@SP", "A=M-1", "M=0",
+                    f"({end})")
+        else:
+            raise ValueError(f"Unknown arithmetic command: {command}")
+
+    def _jump_to_routine(self, routine):
+        """Jump to a shared routine with the return address in D"""
+        ret = self._unique_label("ret")
+        self._write(f"@{ret}", "D=A", f"@{routine}", "0;JMP", f"({ret})")
+
+    def _push_d(self):
+        self._write("@SP", "AM=M+1", "A=A-1", "M=D")
+
+    def _pop_d(self):
+        self._write("@SP", "AM=M-1", "D=M")
+
+    def _direct_address(self, segment, index):
+        if segment == "pointer":
+            if index > 1:
+                raise ValueError(f"pointer index must be 0 or 1: {index}")
+            return str(_POINTER_BASE + index)
+        if segment == "temp":
+            if index > 7:
+                raise ValueError(f"temp index must be 0-7: {index}")
+            return str(_TEMP_BASE + index)
+        return f"{self._file_name}.{index}"
+
+    def _address_into_a(self, segment, index):
+        """Set A to the address of segment[index] for pointer segments"""
+        base = _POINTER_SEGMENTS[segment]
+        if index == 0:
+            self._write(f"@{base}", "A=M")
+        elif index == 1:
+            self._write(f"@{base}", "A=M+1")
+        elif index <= _MAX_INCREMENT_OFFSET:
+            self._write(f"@{base}", "A=M+1", *["A=A+1"]*(index - 1))
+        else:
+            self._write(f"@{index}", "D=A", f"@{base}", "A=D+M")
+
+    def write_push(self, segment, index):
+        if segment == "constant":
+            if index >= 2**15:
+                raise ValueError(f"constant must be less than 2**15: {index}")
+            if index <= 1:
+                self._write("@SP", "AM=M+1", "A=A-1", f"M={index}")
+                return
+            self._write(f"@{index}", "D=A")
+        elif segment in _POINTER_SEGMENTS:
+            self._address_into_a(segment, index)
+            self._write("D=M")
+        else:
+            self._write(f"@{self._direct_address(segment, index)}", "D=M")
+
+        self._push_d()
+
+    def write_pop(self, segment, index):
+        if segment in _POINTER_SEGMENTS:
+            if index <= _MAX_INCREMENT_OFFSET:
+                self._pop_d()
+                self._address_into_a(segment, index)
+                self._write("M=D")
+            else:
+                base = _POINTER_SEGMENTS[segment]
+                self._write(f"@{index}", "D=A", f"@{base}", "D=D+M", "@R13", "M=D")
+                self._pop_d()
+                self._write("@R13", "A=M", "M=D")
+        elif segment == "constant":
+            raise ValueError("Cannot pop to constant segment")
+        else:
+            self._pop_d()
+            self._write(f"@{self._direct_address(segment, index)}", "M=D")
+
+    def _function_label(self, label):
+        return f"{self._function}${label}"
+
+    def write_label(self, label):
+        self._write(f"({self._function_label(label)})")
+
+    def write_goto(self, label):
+        self._write(f"@{self._function_label(label)}", "0;JMP")
+
+    def write_if(self, label):
+        self._pop_d()
+        self._write(f"@{self._function_label(label)}", "D;JNE")
+
+    def write_function(self, name, local_count):
+        self._function = name
+        self._write(f"({name})")
+        if local_count == 0:
+            return
+
+        self._write("@SP", "A=M")
+        for i in range(local_count):
+            self._write("M=0")
+            if i < local_count - 1:
+                self._write("A=A+1")
+
+        if local_count == 1:
+            self._write("@SP", "M=M+1")
+        else:
+            self._write(f"@{local_count}", "D=A", "@SP", "M=D+M")
+
+    def write_call(self, name, arg_count):
+        ret = self._unique_label("ret")
+        if self.mode == SIZE:
+            self._used_routines.add(_CALL_ROUTINE)
+            self._write(
+                f"@{arg_count}", "D=A", "@R13", "M=D",
+                f"@{name}", "D=A", "@R14", "M=D",
+                f"@{ret}", "D=A", f"@{_CALL_ROUTINE}", "0;JMP",
+                f"({ret})")
+            return
+
+        self._write(f"@{ret}", "D=A")
+        self._push_d()
+        self._write_push_frame()
+        self._write("@SP", "D=M", f"@{arg_count + 5}", "D=D-A", "@ARG", "M=D")
+        self._write("@SP", "D=M", "@LCL", "M=D", f"@{name}", "0;JMP", f"({ret})")
+
+    def _write_push_frame(self):
+        for pointer in ("LCL", "ARG", "THIS", "THAT"):
+            self._write(f"@{pointer}", "D=M")
+            self._push_d()
+
+    def write_return(self):
+        if self.mode == SIZE:
+            self._used_routines.add(_RETURN_ROUTINE)
+            self._write(f"@{_RETURN_ROUTINE}", "0;JMP")
+        else:
+            self._write_return_body()
+
+    def _write_return_body(self):
+        # R14 = return address, read before *ARG is overwritten
+        self._write("@5", "D=A", "@LCL", "A=M-D", "D=M", "@R14", "M=D")
+        # *ARG = pop(), SP = ARG+1
+        self._pop_d()
+        self._write("@ARG", "A=M", "M=D", "D=A+1", "@SP", "M=D")
+        # restore THAT, THIS, ARG, LCL from the frame below LCL
+        for pointer in ("THAT", "THIS", "ARG"):
+            self._write("@LCL", "AM=M-1", "D=M", f"@{pointer}", "M=D")
+        self._write("@LCL", "A=M-1", "D=M", "@LCL", "M=D")
+        self._write("@R14", "A=M", "0;JMP")
+
+    def _write_call_routine(self, out):
+        """Shared call: D = return address, R13 = argument count, R14 = function"""
+        self._out, saved = out, self._out
+        self._write(f"({_CALL_ROUTINE})")
+        self._push_d()
+        self._write_push_frame()
+        self._write("@SP", "D=M", "@R13", "D=D-M", "@5", "D=D-A", "@ARG", "M=D")
+        self._write("@SP", "D=M", "@LCL", "M=D", "@R14", "A=M", "0;JMP")
+        self._out = saved
+
+    def _write_return_routine(self, out):
+        self._out, saved = out, self._out
+        self._write(f"({_RETURN_ROUTINE})")
+        self._write_return_body()
+        self._out = saved
+
+    def _write_compare_routine(self, out, comparison):
+        """Shared comparison: D = return address"""
+        self._out, saved = out, self._out
+        routine = _compare_routine(comparison)
+        self._write(
+            f"({routine})", "@R15", "M=D",
+            "@SP", "AM=M-1", "D=M", "A=A-1", "D=M-D", "M=-1",
+            f"@{routine}.END", f"D;{_COMPARISONS[comparison]}",
+            "@SP", "A=M-1", "M=0",
+            f"({routine}.END)", "@R15", "A=M", "0;JMP")
+        self._out = saved
+
+
+_ROUTINE_WRITERS = {
+    _CALL_ROUTINE: CodeWriter._write_call_routine,
+    _RETURN_ROUTINE: CodeWriter._write_return_routine,
+}
+for _comparison in _COMPARISONS:
+    _ROUTINE_WRITERS[_compare_routine(_comparison)] = \
+        lambda writer, out, comparison=_comparison: writer._write_compare_routine(out, comparison)
@@ -0,0 +1,107 @@
+"""Parse VM language (.vm) files.
+
+Parse stack-machine VM code into commands, the first step of translating
+VM code into Hack assembly.
+"""
+import enum
+
+
+class VmCommand(enum.Enum):
+    ARITHMETIC = 1
+    PUSH = 2
+    POP = 3
+    LABEL = 4
+    GOTO = 5
+    IF_GOTO = 6
+    FUNCTION = 7
+    CALL = 8
+    RETURN = 9
+
+
+ARITHMETIC_COMMANDS = ("add", "sub", "neg", "eq", "gt", "lt", "and", "or", "not")
+
+SEGMENTS = ("constant", "local", "argument", "this", "that", "pointer", "temp", "static")
+
+# keyword -> (command type, number of arguments)
+_COMMANDS = {
+    "push": (VmCommand.PUSH, 2),
+    "pop": (VmCommand.POP, 2),
+    "label": (VmCommand.LABEL, 1),
+    "goto": (VmCommand.GOTO, 1),
+    "if-goto": (VmCommand.IF_GOTO, 1),
+    "function": (VmCommand.FUNCTION, 2),
+    "call": (VmCommand.CALL, 2),
+    "return": (VmCommand.RETURN, 0),
+}
+for _name in ARITHMETIC_COMMANDS:
+    _COMMANDS[_name] = (VmCommand.ARITHMETIC, 0)
+
+
+class VmParser:
+    def __init__(self, vm_string):
+        self._cursor = 0
+        self._current_command = None
+
+        # list of (words, linenumber) once comments/blanklines removed.
+        self._commands = []
+        for i, line in enumerate(vm_string.splitlines()):
+            comment = line.find("//")
+            if comment != -1:
+                line = line[:comment]
+
+            words = line.split()
+            if words:
+                self._commands.append((words, i))
+                self._validate(words, i)
+
+    def _validate(self, words, line):
+        if words[0] not in _COMMANDS:
+            raise SyntaxError(f"Unrecognized command on line {line}: {' '.join(words)}")
+
+        command_type, arg_count = _COMMANDS[words[0]]
+        if len(words) != arg_count + 1:
+            raise SyntaxError(
+                f"'{words[0]}' takes {arg_count} arguments on line {line}: {' '.join(words)}")
+
+        if command_type in (VmCommand.PUSH, VmCommand.POP) and words[1] not in SEGMENTS:
+            raise SyntaxError(f"Unrecognized segment on line {line}: {words[1]}")
+
+        if arg_count == 2 and not words[2].isdigit():
+            raise SyntaxError(f"Expected a non-negative integer on line {line}: {words[2]}")
+
+        if command_type is VmCommand.POP and words[1] == "constant":
+            raise SyntaxError(f"Cannot pop to constant segment on line {line}")
+
+    def has_more(self):
+        return self._cursor < len(self._commands)
+
+    def advance(self):
+        self._current_command = self._commands[self._cursor]
+        self._cursor += 1
+
+    def get_line_number(self):
+        return self._current_command[1]
+
+    def command_type(self):
+        return _COMMANDS[self._current_command[0][0]][0]
+
+    def arg1(self):
+        """First argument: the command itself for arithmetic commands, else
+        the segment, label or function name"""
+        words = self._current_command[0]
+        if self.command_type() is VmCommand.ARITHMETIC:
+            return words[0]
+        if self.command_type() is VmCommand.RETURN:
+            raise Exception("arg1() may not be called when command_type() is RETURN")
+        return words[1]
+
+    def arg2(self):
+        """Second argument (index, number of locals or number of arguments) as int"""
+        words = self._current_command[0]
+        if len(words) != 3:
+            raise Exception(
+                "arg2() may only be called when command_type() is PUSH, POP, FUNCTION or CALL")
+        return int(words[2])
+
+    def reset(self):
+        self._cursor = 0
@@ -0,0 +1,78 @@
+"""Translate VM code (.vm) into Hack assembly (.asm), ready for
+assembler.assemble().
+"""
+import os
+
+from vmtranslator.codewriter import CodeWriter, SPEED
+from vmtranslator.parser import VmParser, VmCommand
+
+
+def translate_file(input_path, output_file, mode=SPEED, bootstrap=None):
+    """Translate a .vm file, or a directory of .vm files, into one .asm file
+    :param bootstrap: whether to emit SP=256, call Sys.init. Defaults to True
+        for directories and False for single files
+    """
+    if os.path.isdir(input_path):
+        paths = sorted(
+            os.path.join(input_path, name) for name in os.listdir(input_path) if name.endswith(".vm"))
+        if bootstrap is None:
+            bootstrap = True
+    else:
+        paths = [input_path]
+        if bootstrap is None:
+            bootstrap = False
+
+    sources = []
+    for path in paths:
+        with open(path, "r") as f:
+            sources.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+
+    asm_string = translate(sources, mode, bootstrap)
+    with open(output_file, "w") as f:
+        f.write(asm_string)
+
+
+def translate(sources, mode=SPEED, bootstrap=True):
+    """Translate VM code into Hack assembly.
+    :param sources: list of (file name, VM code string). The file name, without
+        extension, names the file's static variables
+    :param mode: codewriter.SPEED to expand call/return/comparisons inline, or
+        codewriter.SIZE to share one subroutine for each
+    :param bootstrap: if True, start with SP=256 and call Sys.init
+    :returns Hack assembly string
+    """
+    writer = CodeWriter(mode)
+    if bootstrap:
+        writer.write_bootstrap()
+
+    for file_name, vm_string in sources:
+        writer.set_file_name(file_name)
+        _translate_source(VmParser(vm_string), writer)
+
+    return writer.getvalue()
+
+
+def _translate_source(parser, writer):
+    while parser.has_more():
+        parser.advance()
+        t = parser.command_type()
+        if t is VmCommand.ARITHMETIC:
+            writer.write_arithmetic(parser.arg1())
+        elif t is VmCommand.PUSH:
+            writer.write_push(parser.arg1(), parser.arg2())
+        elif t is VmCommand.POP:
+            writer.write_pop(parser.arg1(), parser.arg2())
+        elif t is VmCommand.LABEL:
+            writer.write_label(parser.arg1())
+        elif t is VmCommand.GOTO:
+            writer.write_goto(parser.arg1())
+        elif t is VmCommand.IF_GOTO:
+            writer.write_if(parser.arg1())
+        elif t is VmCommand.FUNCTION:
+            writer.write_function(parser.arg1(), parser.arg2())
+        elif t is VmCommand.CALL:
+            writer.write_call(parser.arg1(), parser.arg2())
+        elif t is VmCommand.RETURN:
+            writer.write_return()
+        else:
+            raise Exception(f"Unrecognized VM command type: {t}")